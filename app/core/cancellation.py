@@ -0,0 +1,54 @@
+import threading
+import time
+from enum import Enum
+from typing import Optional
+
+from yt_dlp.utils import DownloadCancelled as _YtDlpDownloadCancelled
+
+
+class CancelMode(str, Enum):
+    """What to do with partial files when a download is cancelled"""
+    KEEP = "keep"  # Leave .part/fragment files so the item can resume
+    DISCARD = "discard"  # Delete everything the cancelled download wrote
+
+
+class DownloadCancelled(_YtDlpDownloadCancelled):
+    """
+    Raised from a progress hook to abort the transfer in progress.
+
+    Subclassing yt-dlp's DownloadCancelled lets the exception pass through
+    `ignoreerrors` and out of the fragment thread pool instead of being
+    swallowed as a per-video error.
+    """
+    msg = "Download cancelled by user"
+
+
+class CancellationToken:
+    """Thread-safe flag shared between the UI and a running download"""
+
+    def __init__(self):
+        self._event = threading.Event()
+        self.cancelled_at: Optional[float] = None
+        self.paused = False  # Pausing always keeps partial files
+
+    def cancel(self, pause=False):
+        """Request cancellation (idempotent); pause=True keeps files for resume"""
+        if not self._event.is_set():
+            self.paused = pause
+            self.cancelled_at = time.monotonic()
+            self._event.set()
+
+    @property
+    def is_cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def raise_if_cancelled(self):
+        """Raise DownloadCancelled if cancellation was requested"""
+        if self._event.is_set():
+            raise DownloadCancelled()
+
+    def elapsed_ms(self) -> Optional[float]:
+        """Milliseconds since cancel() was called, or None if not cancelled"""
+        if self.cancelled_at is None:
+            return None
+        return (time.monotonic() - self.cancelled_at) * 1000
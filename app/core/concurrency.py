@@ -0,0 +1,158 @@
+import math
+import threading
+import time
+from dataclasses import dataclass, field
+from core.logger import log_info, log_warning
+
+
+@dataclass
+class HostLimits:
+    """Current AIMD limits and signal history for one host"""
+    fragments: float
+    items: float
+    last_decrease: float = 0.0
+    throttle_events: int = 0
+    healthy_transfers: int = 0
+    speed_history: list = field(default_factory=list)  # Recent average speeds (bytes/s)
+
+
+class AdaptiveConcurrency:
+    """
+    AIMD controller for per-host download concurrency.
+
+    Throttling signals (HTTP 429/403, a sharp mid-transfer speed drop) cut the
+    fragment and item limits multiplicatively; every healthy transfer raises
+    them additively. Limits settle just below the level that triggers blocking.
+    """
+
+    def __init__(self, max_fragments=8, max_items=2, min_fragments=1, min_items=1,
+                 decrease_factor=0.5, increase_step=1.0, cooldown=10.0):
+        self.max_fragments = max_fragments
+        self.max_items = max_items
+        self.min_fragments = min_fragments
+        self.min_items = min_items
+        self.decrease_factor = decrease_factor
+        self.increase_step = increase_step
+        self.cooldown = cooldown  # Seconds in which repeated signals count as one event
+        self._hosts: dict[str, HostLimits] = {}
+        self._lock = threading.Lock()
+
+    def _limits(self, host: str) -> HostLimits:
+        if host not in self._hosts:
+            self._hosts[host] = HostLimits(fragments=self.max_fragments, items=self.max_items)
+        return self._hosts[host]
+
+    def fragments(self, host: str) -> int:
+        """Concurrent fragment downloads to use for the next transfer"""
+        with self._lock:
+            return max(self.min_fragments, math.floor(self._limits(host).fragments))
+
+    def items(self, host: str) -> int:
+        """Concurrent items allowed for the host, never above the current max_items"""
+        with self._lock:
+            return max(self.min_items, min(self.max_items, math.floor(self._limits(host).items)))
+
+    def record_throttle(self, host: str, reason: str):
+        """Multiplicative decrease on a throttling signal"""
+        with self._lock:
+            limits = self._limits(host)
+            now = time.monotonic()
+            limits.throttle_events += 1
+            limits.healthy_transfers = 0
+            if now - limits.last_decrease < self.cooldown:
+                return
+            limits.last_decrease = now
+            limits.fragments = max(self.min_fragments, limits.fragments * self.decrease_factor)
+            limits.items = max(self.min_items, limits.items * self.decrease_factor)
+            fragments, items = math.floor(limits.fragments), math.floor(limits.items)
+        log_warning(f"Throttling on {host} ({reason}): fragments -> {fragments}, items -> {items}")
+
+    def record_healthy(self, host: str, average_speed=None):
+        """Additive increase after a transfer finished without throttling"""
+        with self._lock:
+            limits = self._limits(host)
+            limits.healthy_transfers += 1
+            if average_speed:
+                limits.speed_history = (limits.speed_history + [average_speed])[-20:]
+            before = (math.floor(limits.fragments), math.floor(limits.items))
+            limits.fragments = min(self.max_fragments, limits.fragments + self.increase_step)
+            limits.items = min(self.max_items, limits.items + self.increase_step / max(1.0, limits.items))
+            after = (math.floor(limits.fragments), math.floor(limits.items))
+        if after != before:
+            log_info(f"Transfers healthy on {host}: fragments -> {after[0]}, items -> {after[1]}")
+
+    def snapshot(self) -> dict:
+        """Current limits per host, for logs and diagnostics"""
+        with self._lock:
+            return {
+                host: {
+                    "fragments": math.floor(l.fragments),
+                    "items": math.floor(l.items),
+                    "throttle_events": l.throttle_events,
+                }
+                for host, l in self._hosts.items()
+            }
+
+
+class _StreamSpeed:
+    """Running average and slow-sample count for one stream"""
+    __slots__ = ("average", "samples", "slow_samples")
+
+    def __init__(self):
+        self.average = None
+        self.samples = 0
+        self.slow_samples = 0
+
+
+class SpeedMonitor:
+    """
+    Progress hook that reports one item's transfer speed to the controller.
+
+    Each stream (video and audio format, playlist entry) keeps its own running
+    average, so a small audio track after a fast video isn't taken for a drop.
+    A sustained drop below `drop_ratio` of a stream's own average counts as
+    throttling; an item that finishes without one counts as healthy.
+    """
+
+    WARMUP_SAMPLES = 10
+    SUSTAINED_SAMPLES = 5
+
+    def __init__(self, controller: AdaptiveConcurrency, host: str, drop_ratio=0.3):
+        self.controller = controller
+        self.host = host
+        self.drop_ratio = drop_ratio
+        self.throttled = False
+        self._streams: dict[tuple, _StreamSpeed] = {}
+
+    @staticmethod
+    def _stream_key(d) -> tuple:
+        info = d.get("info_dict") or {}
+        return info.get("id"), info.get("playlist_index"), info.get("format_id")
+
+    def __call__(self, d):
+        if d.get("status") != "downloading" or self.throttled:
+            return
+        speed = d.get("speed")
+        if not speed:
+            return
+        stream = self._streams.setdefault(self._stream_key(d), _StreamSpeed())
+        stream.samples += 1
+        if stream.average is None:
+            stream.average = speed
+            return
+        if stream.samples > self.WARMUP_SAMPLES and speed < stream.average * self.drop_ratio:
+            stream.slow_samples += 1
+            if stream.slow_samples >= self.SUSTAINED_SAMPLES:
+                self.throttled = True
+                self.controller.record_throttle(
+                    self.host, f"speed fell to {speed / 1024:.0f} KiB/s from {stream.average / 1024:.0f} KiB/s"
+                )
+            return
+        stream.slow_samples = 0
+        stream.average = 0.9 * stream.average + 0.1 * speed
+
+    def finish(self):
+        """Report the outcome of the item; the fastest stream stands for its speed"""
+        averages = [stream.average for stream in self._streams.values() if stream.average]
+        if not self.throttled and averages:
+            self.controller.record_healthy(self.host, max(averages))
@@ -0,0 +1,182 @@
+import json
+import os
+import shutil
+import sys
+import threading
+from pathlib import Path
+from yt_dlp.postprocessor.common import PostProcessor
+from core.logger import log_info, log_warning, log_error, log_debug
+
+# ioctl(2) request that clones a file's extents (btrfs, XFS, bcachefs)
+_FICLONE = 0x40049409
+
+
+def content_key(info: dict) -> str | None:
+    """Index key for one video in one format: extractor, video ID, format ID and container"""
+    if not info.get("id") or not info.get("format_id"):
+        return None
+    extractor = (info.get("extractor_key") or info.get("extractor") or "generic").lower()
+    return f"{extractor}:{info['id']}:{info['format_id']}:{info.get('ext', '')}"
+
+
+def link_file(source: str, dest: str) -> str:
+    """
+    Make `dest` share `source`'s data: hardlink, else reflink, else copy.
+
+    Returns the method used.
+    """
+    os.makedirs(os.path.dirname(dest) or ".", exist_ok=True)
+    try:
+        os.link(source, dest)
+        return "hardlink"
+    except OSError:
+        pass
+
+    if sys.platform.startswith("linux"):
+        import fcntl
+        try:
+            with open(source, "rb") as src, open(dest, "wb") as dst:
+                fcntl.ioctl(dst.fileno(), _FICLONE, src.fileno())
+            return "reflink"
+        except OSError:
+            if os.path.exists(dest):
+                os.remove(dest)
+
+    shutil.copyfile(source, dest)
+    return "copy"
+
+
+class DedupeIndex:
+    """Content index of finished downloads, persisted to ~/.vidgrab/dedupe.json"""
+
+    def __init__(self, index_file=None):
+        self.index_file = Path(index_file) if index_file else Path.home() / ".vidgrab" / "dedupe.json"
+        self.index_file.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._entries = self._load()
+
+    def _load(self) -> dict:
+        if not self.index_file.exists():
+            return {}
+        try:
+            with open(self.index_file, "r") as f:
+                return json.load(f)
+        except Exception as e:
+            log_error(f"Failed to load dedupe index: {e}")
+            return {}
+
+    def _save(self):
+        temp = self.index_file.with_suffix(".json.tmp")
+        try:
+            with open(temp, "w") as f:
+                json.dump(self._entries, f, indent=2)
+            os.replace(temp, self.index_file)
+        except OSError as e:
+            log_error(f"Failed to save dedupe index: {e}")
+
+    def lookup(self, key) -> dict | None:
+        """Entry for `key` whose file still exists with the recorded size"""
+        if not key:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if not entry:
+                return None
+            try:
+                if os.path.getsize(entry["path"]) == entry["size"]:
+                    return dict(entry)
+            except OSError:
+                pass
+            log_debug(f"Dedupe entry for {key} is stale, dropping it")
+            del self._entries[key]
+            self._save()
+            return None
+
+    def record(self, key, path, size):
+        """Remember where the file for `key` lives; lookup() checks it by size"""
+        if not key:
+            return
+        with self._lock:
+            self._entries[key] = {"path": os.path.abspath(path), "size": size}
+            self._save()
+
+    def forget(self, path):
+        """Drop the entries for `path`, e.g. a file replaced by its conversion"""
+        path = os.path.abspath(path)
+        with self._lock:
+            stale = [key for key, entry in self._entries.items() if entry["path"] == path]
+            for key in stale:
+                del self._entries[key]
+            if stale:
+                self._save()
+
+
+class DedupePP(PostProcessor):
+    """
+    yt-dlp 'before_dl' step that reuses an indexed copy of the same video and format.
+
+    The existing file is linked to where yt-dlp would write, so yt-dlp reports
+    it as already downloaded and skips the transfer. With a staging folder a
+    symlink stands in until the engine links the real file into the output folder.
+    """
+
+    def __init__(self, index: DedupeIndex, target_dir, staged_links: dict, downloader=None):
+        super().__init__(downloader)
+        self.index = index
+        self.target_dir = target_dir  # Final output folder
+        self.staged_links = staged_links  # staged path -> indexed source, for the engine's move step
+        self.reused_bytes = 0
+
+    def run(self, info):
+        entry = self.index.lookup(content_key(info))
+        if not entry:
+            return [], info
+        target = self._downloader.prepare_filename(info)
+        source = entry["path"]
+        if os.path.exists(target) or os.path.abspath(target) == source:
+            return [], info
+
+        if os.path.dirname(os.path.abspath(target)) == os.path.abspath(self.target_dir):
+            method = link_file(source, target)
+        else:
+            os.makedirs(os.path.dirname(target) or ".", exist_ok=True)
+            try:
+                os.symlink(source, target)
+                self.staged_links[target] = source
+                method = "link after staging"
+            except OSError:
+                # Windows needs a privilege for symlinks; stage a real link or copy instead
+                method = link_file(source, target)
+        self.reused_bytes += entry["size"]
+        log_info(f"Reusing existing copy of {info.get('title', info['id'])} ({method}): {source}")
+        return [], info
+
+
+class DedupeRecordPP(PostProcessor):
+    """yt-dlp 'after_move' step that indexes each finished file"""
+
+    def __init__(self, index: DedupeIndex, target_dir, downloader=None):
+        super().__init__(downloader)
+        self.index = index
+        self.target_dir = target_dir
+
+    def run(self, info):
+        path = info.get("filepath")
+        key = content_key(info)
+        if key and path and os.path.exists(path):
+            # The staging move runs after this step; index the final location
+            final = os.path.join(self.target_dir, os.path.basename(path))
+            self.index.record(key, final, os.path.getsize(path))
+        return [], info
+
+
+def release_staged_link(staged_path: str, source: str, dest_dir: str) -> str:
+    """Replace a staged symlink with a real link of `source` in `dest_dir`"""
+    dest = os.path.join(dest_dir, os.path.basename(staged_path))
+    os.remove(staged_path)
+    if os.path.exists(dest):
+        log_warning(f"Not relinking {dest}: file already exists")
+        return dest
+    method = link_file(source, dest)
+    log_info(f"Linked into download folder ({method}): {os.path.basename(dest)}")
+    return dest
@@ -0,0 +1,263 @@
+import ctypes
+import ctypes.util
+import os
+import shutil
+import sys
+import threading
+import time
+from yt_dlp.postprocessor.common import PostProcessor
+from core.logger import log_info, log_warning, log_debug
+
+# Extra free space kept on the volume beyond an item's own estimate
+SAFETY_MARGIN = 100 * 1024 * 1024
+# fallocate(2) flag: reserve blocks without changing the file's apparent size
+_FALLOC_FL_KEEP_SIZE = 0x01
+
+_libc = None
+
+
+def _format_gib(size) -> str:
+    return f"{size / (1024 ** 3):.2f} GiB"
+
+
+def estimate_bytes(info: dict) -> int:
+    """Expected download size from format metadata; 0 if unknown"""
+    formats = info.get("requested_formats") or [info]
+    total = 0
+    for f in formats:
+        size = f.get("filesize") or f.get("filesize_approx")
+        if not size and f.get("tbr") and info.get("duration"):
+            size = f["tbr"] * 1000 / 8 * info["duration"]
+        if not size:
+            return 0
+        total += int(size)
+    return total
+
+
+def partial_bytes(info: dict, temp_filename: str) -> int:
+    """Bytes already on disk from an earlier attempt: .part files and finished streams"""
+    if not temp_filename:
+        return 0
+    formats = info.get("requested_formats")
+    if formats:
+        # Same names yt-dlp gives each stream before merging: <name>.f<format_id>.<ext>
+        root = os.path.splitext(temp_filename)[0]
+        paths = [f"{root}.f{f.get('format_id')}.{f.get('ext')}" for f in formats]
+    else:
+        paths = [temp_filename]
+    total = 0
+    for path in paths:
+        for candidate in (path, f"{path}.part"):
+            if os.path.isfile(candidate):
+                total += os.path.getsize(candidate)
+                break
+    return total
+
+
+def required_bytes(info: dict, existing: int = 0) -> int:
+    """Free space needed: the rest of the streams, plus the merged copy while both exist"""
+    size = estimate_bytes(info)
+    if not size:
+        return 0
+    merge_headroom = size if len(info.get("requested_formats") or []) > 1 else 0
+    return max(0, size - existing) + merge_headroom + SAFETY_MARGIN
+
+
+def _existing(path: str) -> str:
+    while path and not os.path.exists(path):
+        path = os.path.dirname(path)
+    return path or "."
+
+
+def free_bytes(path: str) -> int:
+    """Free space on the filesystem holding `path`"""
+    return shutil.disk_usage(_existing(path)).free
+
+
+class SpaceReservations:
+    """
+    Bytes promised to downloads that passed preflight, per volume.
+
+    Parallel downloads check free space minus what the others have already
+    claimed, so two items can't both pass and then fill the disk together.
+    A reservation lasts until the item's download ends, even as the bytes
+    land on disk, which errs on the side of holding the next item.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._reserved = {}  # st_dev -> bytes
+
+    def reserve(self, needs: dict):
+        """Claim `needs` ({path: bytes}) all together; None if any volume lacks room yet"""
+        by_volume = {}  # st_dev -> (path, bytes)
+        for path, size in needs.items():
+            path = _existing(path)
+            volume = os.stat(path).st_dev
+            by_volume[volume] = (path, by_volume.get(volume, (path, 0))[1] + size)
+        with self._lock:
+            for volume, (path, size) in by_volume.items():
+                if free_bytes(path) - self._reserved.get(volume, 0) < size:
+                    return None
+            for volume, (_, size) in by_volume.items():
+                self._reserved[volume] = self._reserved.get(volume, 0) + size
+            return [(volume, size) for volume, (_, size) in by_volume.items()]
+
+    def release(self, reservation):
+        with self._lock:
+            for volume, size in reservation or []:
+                self._reserved[volume] -= size
+                if not self._reserved[volume]:
+                    del self._reserved[volume]
+
+    def reserved(self, path: str) -> int:
+        with self._lock:
+            return self._reserved.get(os.stat(_existing(path)).st_dev, 0)
+
+
+# Shared by every download in the process
+RESERVATIONS = SpaceReservations()
+
+
+def preallocate(path: str, size: int) -> bool:
+    """
+    Reserve `size` bytes of contiguous blocks for `path` without changing its size.
+
+    Uses fallocate(FALLOC_FL_KEEP_SIZE) on Linux, so a writer that appends
+    (like yt-dlp) fills the reserved extent instead of fragmenting the file.
+    Returns False where the platform or filesystem doesn't support it.
+    """
+    global _libc
+    if not sys.platform.startswith("linux") or size <= 0:
+        return False
+    try:
+        if _libc is None:
+            _libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+            _libc.fallocate.argtypes = [ctypes.c_int, ctypes.c_int, ctypes.c_longlong, ctypes.c_longlong]
+        fd = os.open(path, os.O_WRONLY)
+        try:
+            if _libc.fallocate(fd, _FALLOC_FL_KEEP_SIZE, 0, size) != 0:
+                log_debug(f"fallocate unsupported for {path}: errno {ctypes.get_errno()}")
+                return False
+        finally:
+            os.close(fd)
+        return True
+    except (OSError, AttributeError) as e:
+        log_debug(f"Preallocation unavailable for {path}: {e}")
+        return False
+
+
+def same_volume(a: str, b: str) -> bool:
+    return os.stat(_existing(a)).st_dev == os.stat(_existing(b)).st_dev
+
+
+def space_needs(info: dict, work_dir: str, output_dir: str = None, temp_filename=None) -> dict:
+    """
+    Bytes `info` needs per folder: {path: bytes}, empty if its size is unknown.
+
+    The work dir holds the streams and, while merging, the merged copy. A
+    separate output volume only receives the finished file, so it needs the
+    final size; on the same volume the move is a rename and costs nothing.
+    """
+    size = estimate_bytes(info)
+    if not size:
+        return {}
+    needs = {work_dir: required_bytes(info, partial_bytes(info, temp_filename))}
+    if output_dir and not same_volume(work_dir, output_dir):
+        needs[output_dir] = size + SAFETY_MARGIN
+    return needs
+
+
+def _shortfall(needs: dict, reservations) -> str:
+    return ", ".join(
+        f"{path}: need {_format_gib(size)}, available {_format_gib(max(0, free_bytes(path) - reservations.reserved(path)))}"
+        for path, size in needs.items()
+    )
+
+
+def wait_for_space(info: dict, work_dir: str, cancel_token=None, on_wait=None, poll_interval=5.0,
+                   temp_filename=None, output_dir=None, reservations=RESERVATIONS):
+    """
+    Block until `work_dir` (and `output_dir`, if on another volume) have room
+    for `info`, polling every `poll_interval`.
+
+    Bytes a resumed download already has at `temp_filename` are not counted
+    again, and bytes other downloads have reserved are. Returns the
+    reservation (None when the size is unknown), to be released once the
+    download ends. Raises if the item is larger than a whole volume.
+    Honors `cancel_token` while waiting; `on_wait(message)` reports the hold.
+    """
+    needs = space_needs(info, work_dir, output_dir, temp_filename)
+    if not needs:
+        log_info("Disk preflight: size unknown, skipping space check")
+        return None
+    title = info.get("title", "item")
+    for path, size in needs.items():
+        capacity = shutil.disk_usage(_existing(path)).total
+        if size > capacity:
+            raise Exception(f"Not enough disk space for {title}: needs {_format_gib(size)} in {path}, "
+                            f"larger than the whole volume ({_format_gib(capacity)})")
+    reservation = reservations.reserve(needs)
+    if reservation:
+        log_info(f"Disk preflight ok for {title}: "
+                 + ", ".join(f"{_format_gib(size)} in {path}" for path, size in needs.items()))
+        return reservation
+
+    log_warning(f"Holding {title}: {_shortfall(needs, reservations)}")
+    while not reservation:
+        if on_wait:
+            on_wait(f"Waiting for disk space: {_shortfall(needs, reservations)}")
+        deadline = time.monotonic() + poll_interval
+        while time.monotonic() < deadline:
+            if cancel_token:
+                cancel_token.raise_if_cancelled()
+            time.sleep(0.2)
+        reservation = reservations.reserve(needs)
+    log_info(f"Disk space available for {title}, resuming")
+    return reservation
+
+
+class DiskSpacePreflightPP(PostProcessor):
+    """
+    yt-dlp 'before_dl' step that holds each video until its size fits on disk.
+
+    The space is reserved until the next video starts or release() is
+    called when the download ends.
+    """
+
+    def __init__(self, work_dir, cancel_token=None, on_wait=None, output_dir=None, downloader=None):
+        super().__init__(downloader)
+        self.work_dir = work_dir
+        self.output_dir = output_dir  # Where finished files are moved, if not work_dir
+        self.cancel_token = cancel_token
+        self.on_wait = on_wait
+        self._reservation = None
+
+    def run(self, info):
+        self.release()  # The previous playlist entry is done
+        temp_filename = self._downloader.prepare_filename(info, "temp") if self._downloader else None
+        self._reservation = wait_for_space(info, self.work_dir, self.cancel_token, self.on_wait,
+                                           temp_filename=temp_filename, output_dir=self.output_dir)
+        return [], info
+
+    def release(self):
+        RESERVATIONS.release(self._reservation)
+        self._reservation = None
+
+
+class PreallocateHook:
+    """Progress hook that preallocates each .part file once its total size is known"""
+
+    def __init__(self):
+        self._done = set()
+
+    def __call__(self, d):
+        if d.get("status") != "downloading":
+            return
+        path = d.get("tmpfilename")
+        total = d.get("total_bytes") or d.get("total_bytes_estimate")
+        if not path or not total or path in self._done or not os.path.exists(path):
+            return
+        self._done.add(path)
+        if preallocate(path, int(total)):
+            log_debug(f"Preallocated {int(total)} bytes for {os.path.basename(path)}")
@@ -0,0 +1,419 @@
+import argparse
+import hmac
+import json
+import os
+import secrets
+import socket
+import socketserver
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from core.logger import log_info, log_warning, log_error
+from core.retry import RETRYABLE_KINDS, classify_failure
+
+DEFAULT_PORT = 8765
+LEASE_SECONDS = 60.0  # A worker that misses heartbeats for this long loses its item
+MAX_ATTEMPTS = 3
+TOKEN_FILE = Path.home() / ".vidgrab" / "coordinator.token"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS items (
+    id INTEGER PRIMARY KEY,
+    url TEXT NOT NULL UNIQUE,
+    download_type TEXT NOT NULL DEFAULT 'auto',
+    status TEXT NOT NULL DEFAULT 'waiting',
+    worker TEXT,
+    lease_expires REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    progress INTEGER NOT NULL DEFAULT 0,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_items_status ON items (status, id);
+CREATE INDEX IF NOT EXISTS idx_items_lease ON items (status, lease_expires);
+"""
+
+
+def load_token(create=False, token_file=TOKEN_FILE) -> str:
+    """
+    Shared secret for the coordinator: VIDGRAB_TOKEN, else the token file.
+
+    With `create`, a missing token file is filled with a new random token
+    (readable only by the owner); copy it to the worker machines.
+    """
+    token = os.environ.get("VIDGRAB_TOKEN", "").strip()
+    if token:
+        return token
+    try:
+        return token_file.read_text().strip()
+    except FileNotFoundError:
+        if not create:
+            return ""
+    token_file.parent.mkdir(parents=True, exist_ok=True)
+    token = secrets.token_urlsafe(32)
+    fd = os.open(token_file, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    with os.fdopen(fd, "w") as f:
+        f.write(token + "\n")
+    log_info(f"Created coordinator token in {token_file}")
+    return token
+
+
+class LeaseStore:
+    """
+    Shared queue with leases, kept in SQLite by the coordinator.
+
+    An item is leased to one worker at a time. Heartbeats extend the lease;
+    when a worker stops sending them (crash, network loss) the item goes back
+    to waiting and another worker picks it up.
+    """
+
+    def __init__(self, db_file=None, lease_seconds=LEASE_SECONDS, max_attempts=MAX_ATTEMPTS):
+        self.db_file = Path(db_file) if db_file else Path.home() / ".vidgrab" / "coordinator.db"
+        self.db_file.parent.mkdir(parents=True, exist_ok=True)
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.db_file, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+        self._conn.commit()
+
+    def enqueue(self, urls, download_type="auto") -> int:
+        """Add URLs not already known; returns how many were added"""
+        with self._lock, self._conn:
+            before = self._conn.total_changes
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO items (url, download_type) VALUES (?, ?)",
+                [(url, download_type) for url in urls],
+            )
+            return self._conn.total_changes - before
+
+    def reclaim_expired(self) -> int:
+        """Return items whose lease ran out to the waiting state"""
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                "UPDATE items SET status = 'waiting', worker = NULL, lease_expires = NULL "
+                "WHERE status = 'leased' AND lease_expires < ?",
+                (time.time(),),
+            )
+        if cursor.rowcount:
+            log_warning(f"Reclaimed {cursor.rowcount} expired lease(s)")
+        return cursor.rowcount
+
+    def lease(self, worker: str) -> dict | None:
+        """Lease the oldest waiting item to `worker`"""
+        self.reclaim_expired()
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT id, url, download_type, attempts FROM items "
+                "WHERE status = 'waiting' ORDER BY id LIMIT 1"
+            ).fetchone()
+            if not row:
+                return None
+            self._conn.execute(
+                "UPDATE items SET status = 'leased', worker = ?, lease_expires = ?, "
+                "attempts = attempts + 1, progress = 0 WHERE id = ?",
+                (worker, time.time() + self.lease_seconds, row["id"]),
+            )
+        log_info(f"Leased item {row['id']} to {worker}: {row['url']}")
+        return {"id": row["id"], "url": row["url"], "download_type": row["download_type"],
+                "attempt": row["attempts"] + 1, "lease_seconds": self.lease_seconds}
+
+    def heartbeat(self, worker: str, item_id: int, progress: int = 0) -> bool:
+        """Extend `worker`'s lease; False if the lease was lost meanwhile"""
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                "UPDATE items SET lease_expires = ?, progress = ? "
+                "WHERE id = ? AND worker = ? AND status = 'leased'",
+                (time.time() + self.lease_seconds, progress, item_id, worker),
+            )
+        return cursor.rowcount == 1
+
+    def report(self, worker: str, item_id: int, success: bool, error: str = "") -> bool:
+        """Record the result; a stale report from a worker that lost its lease is ignored"""
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT attempts FROM items WHERE id = ? AND worker = ? AND status = 'leased'",
+                (item_id, worker),
+            ).fetchone()
+            if not row:
+                return False
+            if success:
+                status = "completed"
+            elif classify_failure(error) in RETRYABLE_KINDS and row["attempts"] < self.max_attempts:
+                status = "waiting"
+            else:
+                status = "failed"
+            self._conn.execute(
+                "UPDATE items SET status = ?, worker = NULL, lease_expires = NULL, error = ?, "
+                "progress = CASE WHEN ? THEN 100 ELSE progress END WHERE id = ?",
+                (status, error, success, item_id),
+            )
+        log_info(f"Item {item_id} from {worker}: {status}" + (f" ({error})" if error else ""))
+        return True
+
+    def status(self) -> dict:
+        """Counts per state and the items currently leased"""
+        with self._lock:
+            counts = dict(self._conn.execute("SELECT status, COUNT(*) FROM items GROUP BY status").fetchall())
+            leased = [dict(r) for r in self._conn.execute(
+                "SELECT id, url, worker, progress, lease_expires FROM items WHERE status = 'leased'"
+            ).fetchall()]
+        return {"counts": counts, "leased": leased}
+
+    def close(self):
+        self._conn.close()
+
+
+class _CoordinatorHandler(socketserver.StreamRequestHandler):
+    """One JSON request per line, one JSON reply per line"""
+
+    def handle(self):
+        for line in self.rfile:
+            if not line.strip():
+                continue
+            try:
+                response = self.server.dispatch(json.loads(line))
+            except Exception as e:
+                log_error(f"Coordinator request failed: {e}", exc_info=True)
+                response = {"ok": False, "error": str(e)}
+            self.wfile.write(json.dumps(response).encode("utf-8") + b"\n")
+
+
+class Coordinator(socketserver.ThreadingTCPServer):
+    """
+    TCP front end of a LeaseStore for workers on this or other machines.
+
+    Every request must carry the shared `token`; the protocol has no other
+    protection, and the port is reachable by the whole network once bound
+    to a non-loopback address.
+    """
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, store: LeaseStore, host="127.0.0.1", port=DEFAULT_PORT, token=""):
+        if not token:
+            raise ValueError("the coordinator needs a shared token")
+        super().__init__((host, port), _CoordinatorHandler)
+        self.store = store
+        self.token = token
+
+    def dispatch(self, request: dict) -> dict:
+        if not hmac.compare_digest(str(request.get("token", "")).encode("utf-8"), self.token.encode("utf-8")):
+            log_warning(f"Rejected coordinator request without a valid token (op {request.get('op')})")
+            return {"ok": False, "error": "unauthorized"}
+        op = request.get("op")
+        if op == "lease":
+            return {"ok": True, "item": self.store.lease(request["worker"])}
+        if op == "heartbeat":
+            return {"ok": self.store.heartbeat(request["worker"], request["id"], request.get("progress", 0))}
+        if op == "report":
+            return {"ok": self.store.report(request["worker"], request["id"], request["success"],
+                                            request.get("error", ""))}
+        if op == "enqueue":
+            return {"ok": True, "added": self.store.enqueue(request.get("urls", []),
+                                                            request.get("type", "auto"))}
+        if op == "status":
+            return {"ok": True, **self.store.status()}
+        return {"ok": False, "error": f"unknown op: {op}"}
+
+    def serve(self, reclaim_interval=5.0):
+        """Serve until interrupted, reclaiming expired leases in the background"""
+        def reclaim():
+            while True:
+                time.sleep(reclaim_interval)
+                self.store.reclaim_expired()
+
+        threading.Thread(target=reclaim, name="vidgrab-reclaim", daemon=True).start()
+        log_info(f"Coordinator listening on {self.server_address[0]}:{self.server_address[1]}")
+        self.serve_forever()
+
+
+def call(address, request: dict, token="", timeout=10.0) -> dict:
+    """Send one request, authenticated with `token`, to the coordinator at (host, port)"""
+    with socket.create_connection(address, timeout=timeout) as conn:
+        conn.sendall(json.dumps({**request, "token": token}).encode("utf-8") + b"\n")
+        reply = conn.makefile("rb").readline()
+    if not reply:
+        raise ConnectionError("coordinator closed the connection")
+    return json.loads(reply)
+
+
+class Worker:
+    """
+    Lease items from a coordinator and download them with DownloadEngine.
+
+    A heartbeat thread extends the lease and reports progress; if the lease is
+    lost the download is cancelled (keeping partial files) so the item isn't
+    downloaded twice.
+    """
+
+    def __init__(self, address, output_dir, settings=None, worker_id=None, idle_wait=5.0, token=""):
+        from core.settings import Settings
+        self.address = address
+        self.token = token
+        self.output_dir = output_dir
+        self.settings = settings or Settings()
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+        self.idle_wait = idle_wait
+        self._stop = threading.Event()
+
+    def stop(self):
+        self._stop.set()
+
+    def run(self):
+        log_info(f"Worker {self.worker_id} using coordinator {self.address[0]}:{self.address[1]}")
+        while not self._stop.is_set():
+            try:
+                reply = call(self.address, {"op": "lease", "worker": self.worker_id}, self.token)
+            except OSError as e:
+                log_warning(f"Coordinator unreachable: {e}")
+                self._stop.wait(self.idle_wait)
+                continue
+            if reply.get("error") == "unauthorized":
+                log_error("Coordinator rejected the token; set VIDGRAB_TOKEN or --token")
+                return
+            item = reply.get("item")
+            if not item:
+                self._stop.wait(self.idle_wait)
+                continue
+            self._process(item)
+
+    def _process(self, item):
+        from core.cancellation import CancellationToken, DownloadCancelled
+        from core.engine import DownloadEngine
+        from core.hooks import progress_hook_factory
+
+        token = CancellationToken()
+        progress = {"percent": 0}
+        lost = threading.Event()
+        done = threading.Event()
+
+        def heartbeat():
+            interval = item["lease_seconds"] / 3
+            while not done.wait(interval):
+                try:
+                    ok = call(self.address, {"op": "heartbeat", "worker": self.worker_id,
+                                             "id": item["id"], "progress": progress["percent"]}, self.token).get("ok")
+                except OSError as e:
+                    log_warning(f"Heartbeat failed for item {item['id']}: {e}")
+                    continue  # The lease only expires after several missed beats
+                if not ok:
+                    log_warning(f"Lease on item {item['id']} lost, stopping download")
+                    lost.set()
+                    token.cancel(pause=True)
+                    return
+
+        def on_progress(percent, detail=""):
+            progress["percent"] = percent
+
+        engine = DownloadEngine(
+            self.output_dir,
+            hooks=[progress_hook_factory(on_progress, lambda filename: None)],
+            quality=self.settings.video_quality,
+            format=self.settings.format,
+            cancel_token=token,
+            format_policy=self.settings.format_policy,
+            staging_dir=self.settings.staging_folder or None,
+        )
+        beat = threading.Thread(target=heartbeat, name="vidgrab-heartbeat", daemon=True)
+        beat.start()
+        success, error = False, ""
+        try:
+            engine.download(item["url"])
+            success = True
+        except DownloadCancelled:
+            error = "Download cancelled"
+        except Exception as e:
+            error = f"Download failed: {e}"
+            log_error(f"Worker download failed for {item['url']}: {e}")
+        finally:
+            done.set()
+            beat.join()
+        if lost.is_set():
+            return  # Another worker owns the item now
+        try:
+            call(self.address, {"op": "report", "worker": self.worker_id, "id": item["id"],
+                                "success": success, "error": error}, self.token)
+        except OSError as e:
+            # The lease expires and the item is retried elsewhere
+            log_warning(f"Could not report item {item['id']}: {e}")
+
+
+def _address(value: str):
+    host, _, port = value.rpartition(":")
+    return (host or "127.0.0.1", int(port or DEFAULT_PORT))
+
+
+def main(argv=None):
+    """CLI: python -m core.distributed {coordinator,worker,enqueue,status} (run from the app directory)"""
+    parser = argparse.ArgumentParser(description="VidGrab distributed download mode")
+    sub = parser.add_subparsers(dest="mode", required=True)
+
+    coordinator = sub.add_parser("coordinator", help="Serve the shared queue")
+    coordinator.add_argument("--bind", default=f"127.0.0.1:{DEFAULT_PORT}", help="host:port to listen on")
+    coordinator.add_argument("--db", help="Lease database (default ~/.vidgrab/coordinator.db)")
+    coordinator.add_argument("--lease", type=float, default=LEASE_SECONDS, help="Lease timeout in seconds")
+    coordinator.add_argument("--import-queue", action="store_true",
+                             help="Add the waiting items of the desktop queue (~/.vidgrab/queue.json)")
+
+    worker = sub.add_parser("worker", help="Download items leased from a coordinator")
+    worker.add_argument("--coordinator", default=f"127.0.0.1:{DEFAULT_PORT}", help="host:port")
+    worker.add_argument("--output", help="Download folder (default: the one in Settings)")
+
+    enqueue = sub.add_parser("enqueue", help="Add URLs to the shared queue")
+    enqueue.add_argument("urls", nargs="+")
+    enqueue.add_argument("--coordinator", default=f"127.0.0.1:{DEFAULT_PORT}", help="host:port")
+    enqueue.add_argument("--type", default="auto")
+
+    status = sub.add_parser("status", help="Show shared queue state")
+    status.add_argument("--coordinator", default=f"127.0.0.1:{DEFAULT_PORT}", help="host:port")
+
+    for mode_parser in (coordinator, worker, enqueue, status):
+        mode_parser.add_argument("--token", help="Shared secret (default: VIDGRAB_TOKEN or ~/.vidgrab/coordinator.token)")
+
+    args = parser.parse_args(argv)
+    # The coordinator creates the token file on first start; clients on other machines need a copy
+    token = args.token or load_token(create=args.mode == "coordinator")
+    if not token:
+        parser.error(f"no token: pass --token, set VIDGRAB_TOKEN or copy {TOKEN_FILE} from the coordinator")
+    if args.mode == "coordinator":
+        store = LeaseStore(args.db, lease_seconds=args.lease)
+        if args.import_queue:
+            from core.queue import QueueManager
+            from core.queue_persistence import QueuePersistence
+            from core.types import ItemStatus
+            queue = QueueManager()
+            QueuePersistence().load_queue(queue)
+            waiting = [item for item in queue.queue if item.status == ItemStatus.WAITING]
+            added = sum(store.enqueue([item.url], item.download_type) for item in waiting)
+            log_info(f"Imported {added} of {len(waiting)} waiting queue item(s)")
+        server = Coordinator(store, *_address(args.bind), token=token)
+        try:
+            server.serve()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+            store.close()
+    elif args.mode == "worker":
+        from core.settings import SettingsManager
+        settings = SettingsManager().get()
+        node = Worker(_address(args.coordinator), args.output or settings.download_folder, settings, token=token)
+        try:
+            node.run()
+        except KeyboardInterrupt:
+            node.stop()
+    elif args.mode == "enqueue":
+        reply = call(_address(args.coordinator), {"op": "enqueue", "urls": args.urls, "type": args.type}, token)
+        if not reply.get("ok"):
+            parser.exit(1, f"Enqueue failed: {reply.get('error')}\n")
+        print(f"Added {reply.get('added', 0)} of {len(args.urls)} URL(s)")
+    else:
+        print(json.dumps(call(_address(args.coordinator), {"op": "status"}, token), indent=2))
+
+
+if __name__ == "__main__":
+    main()
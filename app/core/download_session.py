@@ -1,6 +1,6 @@
 from dataclasses import dataclass, field
-from typing import Optional
 from PyQt6.QtCore import QObject
+from core.hosts import host_for
 from core.types import QueueItem
 
 
@@ -10,8 +10,9 @@ class DownloadSession(QObject):
     queue_items: list = field(default_factory=list)
     total_items: int = 0
     completed_items: int = 0
+    bytes_saved: int = 0  # Size-efficient format policy savings for this batch
     is_running: bool = False
-    current_worker: Optional[QObject] = None
+    workers: dict = field(default_factory=dict)  # item.id -> DownloadWorker still transferring
     
     def __post_init__(self):
         super().__init__()
@@ -29,12 +30,26 @@ class DownloadSession(QObject):
         """Return number of items not yet completed"""
         return self.total_items - self.completed_items
     
+    @property
+    def active_workers(self) -> list:
+        """Workers whose thread is still running"""
+        return [worker for worker in self.workers.values() if worker.isRunning()]
+    
+    def active_on(self, host: str) -> int:
+        """Download slots taken on `host`, counting workers until their result is handled"""
+        return sum(1 for worker in self.workers.values() if host_for(worker.item.url) == host)
+    
     def mark_item_done(self):
         """Increment completed item counter"""
         self.completed_items += 1
     
+    def add_bytes_saved(self, bytes_saved: int):
+        """Accumulate bytes avoided by the size-efficient format policy"""
+        self.bytes_saved += bytes_saved or 0
+    
     def reset(self):
         """Reset session state after completion"""
         self.is_running = False
         self.completed_items = 0
-        self.current_worker = None
+        self.bytes_saved = 0
+        self.workers.clear()
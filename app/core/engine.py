@@ -1,14 +1,30 @@
 import yt_dlp
+from yt_dlp.postprocessor import FFmpegMergerPP
 import os
 import shutil
-import time
 import platform
-from core.logger import log_info, log_error, log_warning
+import glob
+import re
+import sys
+from core.logger import log_debug, log_info, log_error, log_warning
+from core.cancellation import CancelMode, DownloadCancelled
+from core.hooks import cancellation_hook_factory
+from core.postprocess import MergeJob, StreamFile
+from core.format_selector import FormatSelector
+from core.concurrency import SpeedMonitor
+from core.hosts import host_for
+from core.diskspace import DiskSpacePreflightPP, PreallocateHook
+from core.staging import move_into_place
+from core.dedupe import DedupePP, DedupeRecordPP, content_key, release_staged_link
+from core.playlist import PlaylistSummary, is_playlist, resolve, stream_playlist
+from core.segmented import STATE_SUFFIX, SegmentedYoutubeDL
 
 FFMPEG_BINARY = None
 NODE_BINARY = None
+ARIA2C_BINARY = None
 _FFMPEG_CHECKED = False
 _NODE_CHECKED = False
+_ARIA2C_CHECKED = False
 
 
 def _resolve_ffmpeg():
@@ -93,12 +109,236 @@ def _resolve_node():
 
     return NODE_BINARY
 
+def _resolve_aria2c():
+    """Resolve aria2c lazily; None when it is not installed."""
+    global ARIA2C_BINARY, _ARIA2C_CHECKED
+    if _ARIA2C_CHECKED:
+        return ARIA2C_BINARY
+    _ARIA2C_CHECKED = True
+
+    aria2c_candidates = [
+        shutil.which("aria2c"),  # System PATH
+        "/usr/local/bin/aria2c",  # macOS Homebrew (Intel)
+        "/opt/homebrew/bin/aria2c",  # macOS Homebrew (Apple Silicon)
+        "/usr/bin/aria2c",  # Linux
+    ]
+    for candidate in aria2c_candidates:
+        if not candidate or not os.path.exists(candidate):
+            continue
+        try:
+            result = os.popen(f'"{candidate}" --version').read().strip()
+            if result.startswith("aria2"):
+                ARIA2C_BINARY = candidate
+                log_info(f"aria2c found: {ARIA2C_BINARY} ({result.splitlines()[0]})")
+                break
+        except Exception:
+            continue
+
+    if not ARIA2C_BINARY:
+        log_warning("aria2c not found - using the built-in segmented downloader")
+
+    return ARIA2C_BINARY
+
+
+def extraction_options() -> dict:
+    """
+    yt-dlp options that shape extraction, shared by DownloadEngine.download
+    and the extractions done ahead of it (prefetch, title fetch), so a stored
+    result is the one the engine would have produced itself.
+    """
+    ydl_opts = {
+        "socket_timeout": 30,  # Increase socket timeout
+        "retries": 3,  # Retry failed downloads
+    }
+    if _resolve_node():
+        # yt-dlp expects js_runtimes as a dict: {runtime_name: {config_dict}}
+        ydl_opts["js_runtimes"] = {"node": {}}  # Empty config uses default node from PATH
+    return ydl_opts
+
+
+def extract_for_download(url):
+    """
+    Extract `url` without processing it, as DownloadEngine.download would.
+
+    Returns None for playlists (they are streamed entry by entry) and on
+    failure, so callers only ever store single-video results.
+    """
+    ydl_opts = {**extraction_options(), "quiet": True, "no_warnings": True}
+    with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+        ie_result = resolve(ydl, ydl.extract_info(url, download=False, process=False))
+    if not ie_result or is_playlist(ie_result) or ie_result.get("_type", "video") != "video":
+        return None
+    return ie_result
+
+
+_THROTTLE_PATTERN = re.compile(r"HTTP Error (429|403)", re.IGNORECASE)
+_PROGRESS_LINE = re.compile(r"\[download\]\s+[\d.]+%")
+
+
+class _YtDlpLogger:
+    """Keep yt-dlp's console output, log its warnings/errors and remember the last error"""
+
+    def __init__(self, on_throttle=None):
+        self.last_error = ""
+        self.on_throttle = on_throttle  # Called with the message on HTTP 429/403
+
+    def debug(self, msg):
+        # Progress lines arrive on every tick; only the console gets those
+        if not _PROGRESS_LINE.match(msg):
+            log_debug(f"yt-dlp: {msg}")
+        # Windowed (PyInstaller --windowed) builds have no console: sys.stdout is None
+        if sys.stdout is not None:
+            sys.stdout.write(f"{msg}\n")
+
+    def _check_throttle(self, msg):
+        # yt-dlp reports each internal retry as a warning, long before it gives up
+        if self.on_throttle and _THROTTLE_PATTERN.search(msg):
+            self.on_throttle(msg)
+
+    def warning(self, msg):
+        log_warning(f"yt-dlp: {msg}")
+        self._check_throttle(msg)
+
+    def error(self, msg):
+        self.last_error = msg
+        log_error(f"yt-dlp: {msg}")
+        self._check_throttle(msg)
+
+
+class PipelinedYoutubeDL(SegmentedYoutubeDL):
+    """
+    YoutubeDL that can hand a video's stream merge to a callback.
+
+    Download, match filters, archive and post hooks all take yt-dlp's normal
+    process_info path. When `defer_merge` is set and the merge is the only
+    post-processing step left, post_process returns before running it and
+    `defer_merge(filename, info)` queues the merge instead. Videos that also
+    need fixups are merged inline as usual.
+    """
+
+    def __init__(self, params=None, segments=1, **kwargs):
+        super().__init__(params, segments=segments, **kwargs)
+        self.defer_merge = None
+
+    def post_process(self, filename, info, files_to_move=None):
+        pps = info.get("__postprocessors") or []
+        deferrable = (
+            self.defer_merge and info.get("__files_to_merge") and info.get("requested_formats")
+            and len(pps) == 1 and isinstance(pps[0], FFmpegMergerPP)
+            and not self._pps["post_process"] and not files_to_move
+        )
+        if not deferrable:
+            return super().post_process(filename, info, files_to_move)
+        self.defer_merge(filename, info)
+        info["filepath"] = filename
+        info["__postprocessors"] = []
+        return info
+
+
+def _is_format_intermediate(filename) -> bool:
+    """True for yt-dlp per-format files awaiting merge (e.g. video.f401.mp4)"""
+    name = os.path.basename(filename)
+    return '.f' in name and name.split('.')[-2].lstrip('f').isdigit()
+
+
 class DownloadEngine:
-    def __init__(self, output_dir, hooks=None, quality="best", format="mp4"):
+    def __init__(self, output_dir, hooks=None, quality="best", format="mp4",
+                 cancel_token=None, cancel_mode=CancelMode.KEEP, format_id=None,
+                 pipeline_merges=False, format_policy="quality", concurrency=None,
+                 on_disk_wait=None, staging_dir=None, dedupe_index=None, extraction_cache=None,
+                 connections=1, external_downloader="native"):
         self.output_dir = output_dir
+        # Partial files, fragments and merges go here; finished files are moved to output_dir
+        self.work_dir = staging_dir or output_dir
         self.hooks = hooks or []
         self.quality = quality
         self.format = format
+        self.cancel_token = cancel_token
+        self.cancel_mode = CancelMode(cancel_mode)
+        self.format_id = format_id  # Pinned format from a previous attempt
+        self.pipeline_merges = pipeline_merges  # Hand merges to the post-processing pool
+        self.pending_merge = None  # MergeJob left for the caller when merges are pipelined
+        self.format_policy = format_policy
+        self.bytes_saved = 0  # Reported by the size-efficient format policy
+        self.concurrency = concurrency  # Shared AdaptiveConcurrency controller, if any
+        self.on_disk_wait = on_disk_wait  # Called with a status message while held for disk space
+        self.dedupe_index = dedupe_index  # Shared DedupeIndex; None disables reuse of existing files
+        self.extraction_cache = extraction_cache  # Prefetched extractions, taken by URL if still fresh
+        self.connections = connections  # Byte-range connections per progressive (single-URL) stream
+        self.external_downloader = external_downloader  # "native" or "aria2c"
+        self._staged_links = {}  # Staged symlink -> indexed file it stands in for
+        self._ytdlp_logger = _YtDlpLogger()
+        self._touched_files = set()  # Files yt-dlp reported writing for this download
+        # Byte state of the current single video, persisted with the queue item for resume
+        self.resume_state = {"format_ids": [], "downloaded_bytes": 0, "total_bytes": 0}
+        self._stream_bytes = {}  # format_id -> (downloaded, total)
+        self._stream_start_bytes = {}  # format_id -> bytes already on disk when this attempt began
+        self.playlist_summary = None  # PlaylistSummary when the URL was a playlist
+        self.final_files = []  # Finished output paths (merged, fixed-up, moved), for the transcode stage
+        self._finished_paths = []  # Files yt-dlp finished for a single video, released once verified
+        self._release_each_file = False  # Playlist entries leave the staging dir as they finish
+
+    def _track_files_hook(self, d):
+        """Record every file the download writes and its byte offsets"""
+        for key in ("tmpfilename", "filename"):
+            path = d.get(key)
+            if path:
+                self._touched_files.add(path)
+
+        info = d.get("info_dict") or {}
+        if info.get("playlist_index"):
+            return  # Formats are only pinned for single videos
+        format_id = info.get("format_id")
+        if not format_id:
+            return
+        if format_id not in self.resume_state["format_ids"]:
+            self.resume_state["format_ids"].append(format_id)
+        total = d.get("total_bytes") or d.get("total_bytes_estimate") or 0
+        downloaded = d.get("downloaded_bytes") or 0
+        if d.get("status") == "finished":
+            # "Already downloaded" streams report only total_bytes
+            downloaded = max(downloaded, total)
+        # The first tick of a resumed .part (or fragment set) starts at the reused offset
+        self._stream_start_bytes.setdefault(format_id, downloaded)
+        self._stream_bytes[format_id] = (downloaded, total)
+        self.resume_state["downloaded_bytes"] = sum(b[0] for b in self._stream_bytes.values())
+        self.resume_state["total_bytes"] = sum(b[1] for b in self._stream_bytes.values())
+
+    def _log_reuse_summary(self):
+        """Log how many bytes this attempt reused from earlier attempts vs fetched"""
+        if not self.format_id or not self._stream_bytes:
+            return
+        reused = sum(self._stream_start_bytes.values())
+        total = sum(b[1] for b in self._stream_bytes.values())
+        fetched = max(0, sum(b[0] for b in self._stream_bytes.values()) - reused)
+        for format_id, start in self._stream_start_bytes.items():
+            stream_total = self._stream_bytes[format_id][1]
+            if stream_total and start >= stream_total:
+                log_info(f"Reused completed stream f{format_id} ({start} bytes)")
+        log_info(f"Resumed attempt: reused {reused} bytes, fetched {fetched} of {total} bytes")
+
+    @property
+    def pinned_format_id(self) -> str:
+        """Format spec that selects the same streams again (e.g. "401+251")"""
+        return "+".join(self.resume_state["format_ids"])
+
+    def _cleanup_partial_files(self):
+        """Delete partial files (.part, fragments, .ytdl state) left by a cancelled download"""
+        candidates = set()
+        for path in self._touched_files:
+            base = path[:-len(".part")] if path.endswith(".part") else path
+            candidates.update({base + ".part", base + ".ytdl", base + ".part.ytdl", base + ".part" + STATE_SUFFIX})
+            candidates.update(glob.glob(glob.escape(base) + ".part-Frag*"))
+            if path.endswith(".part") or _is_format_intermediate(path):
+                candidates.add(path)
+
+        for path in candidates:
+            if os.path.exists(path):
+                try:
+                    os.remove(path)
+                    log_info(f"Removed partial file: {os.path.basename(path)}")
+                except OSError as e:
+                    log_warning(f"Could not remove partial file {path}: {e}")
 
     def _get_format_string(self) -> str:
         """Generate yt-dlp format string based on quality and format"""
@@ -111,43 +351,141 @@ class DownloadEngine:
         }
         return quality_map.get(self.quality, "bestvideo+bestaudio/best")
 
+    def _defer_merge(self, filename, info):
+        """
+        PipelinedYoutubeDL callback: leave the merge of a video's finished
+        streams to the post-processing pool as `self.pending_merge`.
+        """
+        streams = [
+            StreamFile(
+                path=fmt["filepath"],
+                has_video=fmt.get("vcodec") != "none",
+                has_audio=fmt.get("acodec") != "none",
+            )
+            for fmt in info["requested_formats"]
+        ]
+        self.pending_merge = MergeJob(
+            streams=streams,
+            output=filename,
+            ffmpeg=_resolve_ffmpeg(),
+            title=info.get("title", ""),
+            destination_dir=self.output_dir if self.work_dir != self.output_dir else "",
+            content_key=content_key(info) or "",
+        )
+        log_info(f"Streams downloaded, merge handed to post-processing: {os.path.basename(filename)}")
+        return self.pending_merge
+
+    def _move_to_output(self, path):
+        """Move a finished file from the staging dir to the output dir"""
+        source = self._staged_links.pop(path, None)
+        if source:
+            return release_staged_link(path, source, self.output_dir)
+        return move_into_place(path, self.output_dir)
+
+    def _on_file_finished(self, path):
+        """yt-dlp post hook: runs on each finished file, including playlist entries"""
+        if self.pending_merge and path == self.pending_merge.output:
+            return  # Not merged yet; the pool moves it and reports the final path
+        if self._release_each_file:
+            self._release_file(path)
+        else:
+            self._finished_paths.append(path)  # Verified by download() before it's released
+
+    def _release_file(self, path):
+        """Hand a finished file over: out of the staging dir and on to the transcode stage"""
+        if self.work_dir != self.output_dir:
+            path = self._move_to_output(path)
+        self.final_files.append(path)
+
+    def _failure(self, message) -> Exception:
+        """Exception carrying yt-dlp's last error so failures can be classified"""
+        if self._ytdlp_logger.last_error:
+            message = f"{message}: {self._ytdlp_logger.last_error}"
+        return Exception(message)
+
     def download(self, url):
         format_str = self._get_format_string()
+        # Ranks formats by post-processing cost for the target container. A pinned
+        # format from an interrupted attempt wins so .part files continue with an
+        # HTTP range request; the preset string is the fallback when nothing ranks
+        merge_format = self.format if self.quality != "audio-only" else "m4a"
+        format_selector = FormatSelector(
+            quality=self.quality,
+            container=self.format,
+            pinned_format_id=self.format_id,
+            policy=self.format_policy,
+        )
         
         # Ensure output directory exists
         os.makedirs(self.output_dir, exist_ok=True)
+        os.makedirs(self.work_dir, exist_ok=True)
         
         output_template = os.path.join(
-            self.output_dir,
+            self.work_dir,
             "%(playlist_index)s - %(title)s.%(ext)s"
         )
         
         log_info(f"Download directory: {self.output_dir}")
         log_info(f"Output template: {output_template}")
+        if self.work_dir != self.output_dir:
+            log_info(f"Staging directory: {self.work_dir}")
         
-        # Get file count before download to detect if files were actually created
-        files_before = set(os.listdir(self.output_dir)) if os.path.exists(self.output_dir) else set()
+        log_info(f"Fallback format string: {format_str}")
+        log_info(f"Quality: {self.quality}, Merge format: {merge_format}")
         
-        log_info(f"Format string: {format_str}")
-        log_info(f"Quality: {self.quality}, Merge format: {self.format if self.quality != 'audio-only' else 'm4a'}")
+        hooks = [self._track_files_hook, PreallocateHook()] + list(self.hooks)
         
+        # AIMD limits for this host; throttling seen now shapes the next transfer
+        fragment_downloads = 8
+        speed_monitor = None
+        if self.concurrency:
+            host = host_for(url)
+            fragment_downloads = self.concurrency.fragments(host)
+            speed_monitor = SpeedMonitor(self.concurrency, host)
+            hooks.append(speed_monitor)
+            self._ytdlp_logger.on_throttle = lambda msg: self.concurrency.record_throttle(host, msg)
+            log_info(f"Concurrent fragments for {host}: {fragment_downloads}")
+        postprocessor_hooks = []
+        if self.cancel_token:
+            # Cancellation check runs first so no other hook sees a cancelled tick
+            cancel_hook = cancellation_hook_factory(self.cancel_token)
+            hooks.insert(0, cancel_hook)
+            postprocessor_hooks.append(cancel_hook)
+            self.cancel_token.raise_if_cancelled()
+
         ydl_opts = {
+            **extraction_options(),
             "outtmpl": output_template,
-            "progress_hooks": self.hooks,
+            "logger": self._ytdlp_logger,  # Keeps the real cause when ignoreerrors swallows it
+            "progress_hooks": hooks,
+            "postprocessor_hooks": postprocessor_hooks,
             "ignoreerrors": True,  # Allow playlist downloads to continue on individual video failures
-            "format": format_str,
-            "merge_output_format": self.format if self.quality != "audio-only" else "m4a",
+            "format": format_selector,
+            "merge_output_format": merge_format,
             "postprocessors": [],
             "extract_flat": False,  # Don't extract flat, actually download
             "skip_unavailable_fragments": False,  # Fail on unavailable fragments
             "no_warnings": False,  # Show all warnings for debugging
-            "socket_timeout": 30,  # Increase socket timeout
-            "retries": 3,  # Retry failed downloads
             "fragment_retries": 5,  # Retry failed fragments more aggressively
             "file_access_retries": 5,  # Retry file access
-            "concurrent_fragment_downloads": 8,  # Download fragments in parallel (higher = faster)
+            "continuedl": True,  # Resume .part files with HTTP range requests
+            "concurrent_fragment_downloads": fragment_downloads,  # Adapted per host when throttled
             "downloader_args": {"http_chunk_size": 10485760},  # 10MB chunks for faster downloads
         }
+        segments = 1  # SegmentedYoutubeDL with one segment is plain yt-dlp
+        aria2c_bin = _resolve_aria2c() if self.external_downloader == "aria2c" else None
+        if aria2c_bin:
+            # Progressive streams only; DASH/HLS fragments keep the native concurrent downloader
+            ydl_opts["external_downloader"] = {"http": aria2c_bin}
+            ydl_opts["external_downloader_args"] = {"aria2c": [
+                f"--max-connection-per-server={self.connections}", f"--split={self.connections}",
+                "--min-split-size=1M", "--file-allocation=none",
+            ]}
+            log_info(f"Using aria2c for progressive streams ({self.connections} connections)")
+        elif self.connections > 1:
+            segments = self.connections
+            log_info(f"Segmented downloads: up to {self.connections} connections per progressive stream")
+        ydl_opts["post_hooks"] = [self._on_file_finished]
         
         ffmpeg_bin = _resolve_ffmpeg()
         node_bin = _resolve_node()
@@ -160,85 +498,123 @@ class DownloadEngine:
         else:
             log_error("FFmpeg not available - merging may fail")
         
-        # Configure Node.js for YouTube extraction
+        # Node.js for YouTube extraction is configured by extraction_options()
         if node_bin:
-            # yt-dlp expects js_runtimes as a dict: {runtime_name: {config_dict}}
-            ydl_opts["js_runtimes"] = {
-                "node": {}  # Empty config uses default node from PATH
-            }
             log_info(f"Using Node.js from: {node_bin}")
         else:
             # If Node.js not found, log warning but continue
             log_warning("Node.js not configured - YouTube extraction may fail for protected videos")
 
-        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-            info = ydl.extract_info(url, download=True)
+        # A staging dir on another volume is checked for the streams, the output volume for the result
+        preflight = DiskSpacePreflightPP(self.work_dir, self.cancel_token, self.on_disk_wait,
+                                         output_dir=self.output_dir)
+        try:
+            with PipelinedYoutubeDL(ydl_opts, segments=segments) as ydl:
+                format_selector.fallback = ydl.build_format_selector(format_str)
+                # Same test-download step yt-dlp's own selector applies to has_drm="maybe" formats;
+                # private API, so selection goes on untested if a yt-dlp release drops it
+                format_selector.check_formats = getattr(ydl, "_check_formats", None)
+                if self.dedupe_index:
+                    # Reuse a copy already downloaded to another folder before anything else
+                    ydl.add_post_processor(
+                        DedupePP(self.dedupe_index, self.output_dir, self._staged_links),
+                        when="before_dl",
+                    )
+                    ydl.add_post_processor(
+                        DedupeRecordPP(self.dedupe_index, self.output_dir),
+                        when="after_move",
+                    )
+                # Hold each video until its estimated size (plus merge headroom) fits
+                ydl.add_post_processor(preflight, when="before_dl")
+                ie_result = self.extraction_cache.take(url, cancel_token=self.cancel_token) if self.extraction_cache else None
+                if ie_result is not None:
+                    # Formats and stream URLs were resolved ahead of time; go straight to the transfer
+                    log_info(f"Using prefetched extraction: {url}")
+                else:
+                    ie_result = resolve(ydl, ydl.extract_info(url, download=False, process=False))
+                if is_playlist(ie_result):
+                    # Entries are downloaded and released one by one
+                    self._release_each_file = True
+                    info = self.playlist_summary = stream_playlist(ydl, ie_result, self.cancel_token)
+                else:
+                    if self.pipeline_merges and ffmpeg_bin:
+                        # Single videos only: a playlist's entries merge inline, one after another
+                        ydl.defer_merge = self._defer_merge
+                    info = ydl.process_ie_result(ie_result, download=True) if ie_result else None
+        except DownloadCancelled:
+            log_info(f"Download cancelled (mode: {self.cancel_mode.value}): {url}")
+            if self.cancel_mode == CancelMode.DISCARD and not self.cancel_token.paused:
+                self._cleanup_partial_files()
+            raise
+        finally:
+            preflight.release()
+            self._log_reuse_summary()
+            self.bytes_saved = format_selector.bytes_saved
+            if self.bytes_saved:
+                log_info(f"Size-efficient policy saved {self.bytes_saved} bytes")
+
+        # Cancellation during extraction never reaches a progress hook
+        if self.cancel_token:
+            self.cancel_token.raise_if_cancelled()
+        
+        if speed_monitor and info:
+            speed_monitor.finish()
         
         # Check if download actually succeeded
         # For single videos: info will be the video dict
-        # For playlists: info will be a playlist dict with entries
+        # For playlists: info will be a PlaylistSummary of counts and failed IDs
         if not info:
-            raise Exception("No video information retrieved")
+            raise self._failure("No video information retrieved")
         
         # Check if this was a playlist
-        if 'entries' in info:
+        if isinstance(info, PlaylistSummary):
             # Playlist case: check if any videos were actually downloaded
-            successful_entries = [e for e in info.get('entries', []) if e is not None]
-            if not successful_entries:
-                raise Exception("No videos were successfully downloaded from the playlist")
-            log_info(f"Playlist download: {len(successful_entries)} of {len(info['entries'])} videos downloaded")
+            if not info.downloaded:
+                raise self._failure("No videos were successfully downloaded from the playlist")
+            log_info(f"Playlist download: {info.downloaded} of {info.total} videos downloaded")
+            if info.failed:
+                shown = ", ".join(info.failed_ids)
+                more = f" (+{info.failed - len(info.failed_ids)} more)" if info.failed > len(info.failed_ids) else ""
+                log_warning(f"Playlist entries failed: {shown}{more}")
+        elif self.pending_merge:
+            # Streams were verified as they finished; the merge output is checked by the pool
+            pass
         else:
-            # Single video: verify that a file was actually created and is complete
-            # Give yt-dlp a moment to finalize file operations
-            time.sleep(1.0)
-            files_after = set(os.listdir(self.output_dir)) if os.path.exists(self.output_dir) else set()
-            new_files = files_after - files_before
+            # Single video: verify the files yt-dlp finished before they leave the staging dir.
+            # Only this download's own files count; a parallel download may share the folder
+            for path in sorted(self._touched_files):
+                # Streams yt-dlp couldn't merge are kept so the next attempt with the
+                # pinned format reuses them instead of re-downloading
+                if _is_format_intermediate(path) and os.path.exists(path):
+                    log_warning(f"Found unmerged intermediate file {os.path.basename(path)} "
+                                f"({os.path.getsize(path)} bytes) - kept for resume")
             
-            if not new_files:
-                # No new files created = download failed despite yt-dlp not raising an exception
-                raise Exception("Download failed: no file was created (possibly HTTP 403 or stream unavailable)")
+            if not self._finished_paths:
+                # No finished file = download failed despite yt-dlp not raising an exception
+                raise self._failure("Download failed: no file was created (possibly HTTP 403 or stream unavailable)")
             
-            # Verify that new files are actually the final output (not intermediate format files)
-            # yt-dlp creates intermediate files with .f### extension (format ID) during download
-            # These should be merged into a final file, so if only .f### files exist = incomplete download
             valid_files = []
-            
-            for filename in new_files:
-                filepath = os.path.join(self.output_dir, filename)
-                
-                # Skip intermediate format files (e.g., video.f401.mp4, video.f251.m4a)
-                # These indicate the download was incomplete and yt-dlp couldn't merge them
-                if '.f' in filename and filename.split('.')[-2].lstrip('f').isdigit():
-                    try:
-                        file_size = os.path.getsize(filepath)
-                        log_warning(f"Found incomplete intermediate file {filename} ({file_size} bytes) - download failed mid-process")
-                        # Clean up the partial format file
-                        try:
-                            os.remove(filepath)
-                            log_info(f"Removed incomplete format file: {filename}")
-                        except Exception as e:
-                            log_warning(f"Could not remove format file {filename}: {e}")
-                    except OSError as e:
-                        log_warning(f"Could not check intermediate file {filename}: {e}")
+            for path in self._finished_paths:
+                try:
+                    file_size = os.path.getsize(path)
+                except OSError as e:
+                    log_warning(f"Could not check file size for {os.path.basename(path)}: {e}")
+                    continue
+                # Even final files should have minimum size to be valid
+                if file_size >= 1_000_000:  # 1MB minimum for valid video
+                    valid_files.append(path)
                 else:
-                    # This is a final output file (no .f### pattern)
+                    log_warning(f"Skipping small output file {os.path.basename(path)} ({file_size} bytes)")
                     try:
-                        file_size = os.path.getsize(filepath)
-                        # Even final files should have minimum size to be valid
-                        if file_size >= 1_000_000:  # 1MB minimum for valid video
-                            valid_files.append(filename)
-                        else:
-                            log_warning(f"Skipping small output file {filename} ({file_size} bytes)")
-                            try:
-                                os.remove(filepath)
-                            except:
-                                pass
-                    except OSError as e:
-                        log_warning(f"Could not check file size for {filename}: {e}")
+                        os.remove(path)
+                    except OSError:
+                        pass
             
             if not valid_files:
-                raise Exception("Download failed: no complete file was created (possibly HTTP 403, connection lost, or stream unavailable)")
+                raise self._failure("Download failed: no complete file was created (possibly HTTP 403, connection lost, or stream unavailable)")
             
+            for path in valid_files:
+                self._release_file(path)
             log_info(f"Download verified: {len(valid_files)} file(s) created successfully")
         
         return info
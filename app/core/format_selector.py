@@ -0,0 +1,352 @@
+from core.logger import log_info, log_debug, log_warning
+
+# Codecs that can be stream-copied into each container without re-encoding
+CONTAINER_CODECS = {
+    "mp4": {
+        "video": {"avc1", "h264", "hev1", "hvc1", "h265", "av01"},
+        "audio": {"mp4a", "aac", "mp3", "ac-3", "ec-3"},
+    },
+    "m4a": {
+        "video": set(),
+        "audio": {"mp4a", "aac"},
+    },
+    "webm": {
+        "video": {"vp8", "vp9", "vp09", "av01"},
+        "audio": {"opus", "vorbis"},
+    },
+    "mkv": None,  # Matroska accepts every codec yt-dlp delivers
+}
+
+# Expected post-processing cost, lowest first
+COST_NATIVE = 0  # Single file already in the target container
+COST_REMUX = 1  # Single file, stream-copied into the target container
+COST_MERGE_COPY = 2  # Separate streams, stream-copy merge
+COST_UNKNOWN = 3  # Codec not reported; merge may or may not copy
+COST_INCOMPATIBLE = 5  # Codec not allowed in the container; slow or failing mux
+
+# Format policies: "quality" takes the best stream up to the height cap,
+# "size-efficient" the smallest stream that meets the same constraints
+POLICY_QUALITY = "quality"
+POLICY_SIZE = "size-efficient"
+# Size-efficient audio-only never goes below this (kbps); the video path's floor is the height cap
+MIN_AUDIO_KBPS = 96
+
+COST_REASONS = {
+    COST_NATIVE: "single file in target container, no post-processing",
+    COST_REMUX: "single file, remux by stream copy",
+    COST_MERGE_COPY: "separate streams, stream-copy merge",
+    COST_UNKNOWN: "separate streams, codec unknown",
+    COST_INCOMPATIBLE: "codec not supported by container",
+}
+
+
+def _codec_family(codec) -> str:
+    """Normalize 'avc1.64001F' -> 'avc1', 'mp4a.40.2' -> 'mp4a'"""
+    if not codec or codec == "none":
+        return ""
+    return codec.split(".")[0].lower()
+
+
+def _format_bytes(size) -> str:
+    if not size:
+        return "? bytes"
+    return f"{size / (1024 * 1024):.1f}MiB"
+
+
+def _has_video(f) -> bool:
+    return f.get("vcodec") != "none" and (f.get("vcodec") is not None or f.get("height"))
+
+
+def _has_audio(f) -> bool:
+    return f.get("acodec") != "none" and f.get("acodec") is not None
+
+
+def _preference(f) -> tuple:
+    """
+    yt-dlp's own ranking fields, highest first: original/default language
+    track, extractor preference (damaged formats are negative) and quality
+    (YouTube marks -drc tracks half a step lower).
+    """
+    language = f.get("language_preference")
+    preference = f.get("preference")
+    return (
+        -1 if language is None else language,
+        0 if preference is None else preference,
+        f.get("quality") or 0,
+    )
+
+
+def _needs_testing(f) -> bool:
+    """Formats yt-dlp's own selector test-downloads before using"""
+    return bool(f.get("has_drm") or f.get("__needs_testing"))
+
+
+def codec_fits(container: str, kind: str, codec) -> bool | None:
+    """True/False if `codec` can be copied into `container`; None if unknown"""
+    allowed = CONTAINER_CODECS.get(container)
+    if allowed is None:
+        return True
+    family = _codec_family(codec)
+    if not family:
+        return None
+    return family in allowed[kind]
+
+
+class FormatSelector:
+    """
+    Container-aware yt-dlp format selector.
+
+    Picks the highest resolution allowed by `quality`, then among formats at
+    that resolution the one with the lowest expected post-processing cost for
+    `container`: progressive files over merges, stream-copyable codecs over
+    ones that need a slow or failing mux. Passed to yt-dlp as the `format`
+    option (yt-dlp accepts a callable taking the selection context).
+
+    With the size-efficient policy the smallest candidate at that resolution
+    wins instead (e.g. an AV1 rendition over a larger H.264 one).
+
+    As in yt-dlp's own selector, a pick that includes a format flagged
+    has_drm="maybe" or __needs_testing is test-downloaded through
+    `check_formats` first; formats that fail are dropped and selection runs
+    again.
+    """
+
+    QUALITY_HEIGHTS = {"best": None, "1080p": 1080, "720p": 720, "480p": 480}
+
+    def __init__(self, quality="best", container="mp4", pinned_format_id=None, fallback=None,
+                 policy=POLICY_QUALITY):
+        self.quality = quality
+        self.policy = policy
+        self.audio_only = quality == "audio-only"
+        self.container = "m4a" if self.audio_only else container
+        self.max_height = self.QUALITY_HEIGHTS.get(quality)
+        self.pinned_format_id = pinned_format_id
+        self.fallback = fallback  # yt-dlp selector used when nothing here matches
+        self.check_formats = None  # YoutubeDL._check_formats; yields the formats that work
+        self.last_reason = ""
+        self.bytes_saved = 0  # Size-efficient policy: bytes avoided vs. the quality pick
+
+    def __call__(self, ctx):
+        formats = list(ctx.get("formats") or [])
+        while True:
+            chosen = self._select_pinned(formats) or (
+                self._select_audio(formats) if self.audio_only else self._select_video(formats))
+            if not chosen:
+                break
+            failed = [f for f in chosen.get("requested_formats") or [chosen] if not self._works(f)]
+            if not failed:
+                yield chosen
+                return
+            log_info(f"Format {'+'.join(f['format_id'] for f in failed)} failed testing, selecting again")
+            failed_ids = {id(f) for f in failed}
+            formats = [f for f in formats if id(f) not in failed_ids]
+        if self.fallback:
+            log_info(f"No ranked candidate for {self.quality}/{self.container}, using fallback selector")
+            yield from self.fallback(ctx)
+
+    def _works(self, f) -> bool:
+        if not _needs_testing(f) or self.check_formats is None:
+            return True
+        try:
+            return any(True for _ in self.check_formats([f]))
+        except Exception as e:
+            # check_formats is private yt-dlp API; if it changes, select without testing
+            log_warning(f"Format testing unavailable ({e}), using formats untested")
+            self.check_formats = None
+            return True
+
+    # ---------------- Candidates ----------------
+    def _select_pinned(self, formats):
+        """Reuse the exact formats of a previous attempt so partial files resume"""
+        if not self.pinned_format_id:
+            return None
+        by_id = {f.get("format_id"): f for f in formats}
+        wanted = self.pinned_format_id.split("+")
+        if len(wanted) > 2:
+            # Only single formats and video+audio pairs are ever pinned
+            log_warning(f"Pinned format {self.pinned_format_id} has more than two streams, selecting again")
+            return None
+        if not all(fid in by_id for fid in wanted):
+            log_info(f"Pinned format {self.pinned_format_id} no longer offered, selecting again")
+            return None
+        picked = [by_id[fid] for fid in wanted]
+        self._log_choice(picked, "pinned from previous attempt")
+        return picked[0] if len(picked) == 1 else self._merge(picked[0], picked[1])
+
+    def _within_quality(self, f) -> bool:
+        if self.max_height is None:
+            return True
+        height = f.get("height")
+        return height is not None and height <= self.max_height
+
+    def _progressive_cost(self, f) -> int:
+        video_fit = codec_fits(self.container, "video", f.get("vcodec"))
+        audio_fit = codec_fits(self.container, "audio", f.get("acodec"))
+        if video_fit is False or audio_fit is False:
+            return COST_INCOMPATIBLE
+        if f.get("ext") == self.container:
+            return COST_NATIVE
+        return COST_REMUX if video_fit and audio_fit else COST_UNKNOWN
+
+    def _pair_cost(self, video, audio) -> int:
+        fits = (
+            codec_fits(self.container, "video", video.get("vcodec")),
+            codec_fits(self.container, "audio", audio.get("acodec")),
+        )
+        if False in fits:
+            return COST_INCOMPATIBLE
+        if None in fits:
+            return COST_UNKNOWN
+        return COST_MERGE_COPY
+
+    @staticmethod
+    def _bitrate(f) -> float:
+        return f.get("tbr") or f.get("vbr") or f.get("abr") or 0
+
+    def _best_audio(self, audio_formats):
+        """
+        Best audio by yt-dlp's language and preference fields, then codecs the
+        container can copy, then bitrate. The original-language, non-DRC track
+        wins over a higher bitrate dub.
+        """
+        def key(f):
+            fit = codec_fits(self.container, "audio", f.get("acodec"))
+            language, preference, quality = _preference(f)
+            return (language, preference, fit is not False, fit is True, quality, self._bitrate(f))
+        return max(audio_formats, key=key) if audio_formats else None
+
+    def _select_video(self, formats):
+        progressive = [f for f in formats if _has_video(f) and _has_audio(f) and self._within_quality(f)]
+        video_only = [f for f in formats if _has_video(f) and not _has_audio(f) and self._within_quality(f)]
+        audio_only = [f for f in formats if _has_audio(f) and not _has_video(f)]
+
+        heights = [f.get("height") or 0 for f in progressive + video_only]
+        if not heights:
+            return None
+        target_height = max(heights)
+
+        # (cost, -preference, -fps, -bitrate, candidate) - lowest cost at the requested resolution
+        # wins; yt-dlp's preference fields rank damaged or dubbed formats below the rest
+        ranked = []
+        for f in progressive:
+            if (f.get("height") or 0) == target_height:
+                ranked.append((self._progressive_cost(f), tuple(-p for p in _preference(f)),
+                               -(f.get("fps") or 0), -self._bitrate(f), [f]))
+        if audio_only:
+            audio = self._best_audio(audio_only)
+            for video in video_only:
+                if (video.get("height") or 0) != target_height:
+                    continue
+                ranked.append((self._pair_cost(video, audio), tuple(-p for p in _preference(video)),
+                               -(video.get("fps") or 0), -self._bitrate(video), [video, audio]))
+        if not ranked:
+            return None
+
+        ranked.sort(key=lambda r: r[:4])
+        best_quality = ranked[0]
+        chosen = best_quality
+        if self.policy == POLICY_SIZE:
+            chosen = self._smallest(ranked)
+            self._record_savings(best_quality[4], chosen[4])
+
+        cost, _, _, _, picked = chosen
+        for other in ranked[:4]:
+            if other is not chosen:
+                log_debug(f"Format candidate {'+'.join(f['format_id'] for f in other[4])} "
+                          f"rejected: cost {other[0]} ({COST_REASONS[other[0]]}), "
+                          f"~{_format_bytes(self._estimate_size(other[4]))}")
+        reason = f"{target_height}p, {COST_REASONS[cost]}"
+        if self.policy == POLICY_SIZE:
+            reason += f", smallest at ~{_format_bytes(self._estimate_size(picked))}"
+        self._log_choice(picked, reason)
+        return picked[0] if len(picked) == 1 else self._merge(picked[0], picked[1])
+
+    def _select_audio(self, formats):
+        audio_only = [f for f in formats if _has_audio(f) and not _has_video(f)]
+        if not audio_only:
+            return None
+        best = self._best_audio(audio_only)
+        if self.policy == POLICY_SIZE:
+            # Smallest track in the same language and preference class as the best one
+            same_track = [a for a in audio_only if _preference(a)[:2] == _preference(best)[:2]]
+            compatible = [
+                a for a in same_track
+                if codec_fits(self.container, "audio", a.get("acodec")) is not False
+            ] or same_track
+            # Tracks of unknown bitrate can't be shown to meet the floor
+            good_enough = [a for a in compatible if self._bitrate(a) >= MIN_AUDIO_KBPS] or [best]
+            chosen = min(good_enough, key=lambda f: (self._estimate_size([f]) or float("inf"), self._bitrate(f)))
+            self._record_savings([best], [chosen])
+            best = chosen
+        fit = codec_fits(self.container, "audio", best.get("acodec"))
+        cost = COST_NATIVE if best.get("ext") == self.container else (
+            COST_REMUX if fit else COST_INCOMPATIBLE if fit is False else COST_UNKNOWN)
+        self._log_choice([best], COST_REASONS[cost])
+        return best
+
+    # ---------------- Size policy ----------------
+    @staticmethod
+    def _estimate_size(picked):
+        """Bytes for the candidate from filesize/filesize_approx, None if unknown"""
+        total = 0
+        for f in picked:
+            size = f.get("filesize") or f.get("filesize_approx")
+            if not size:
+                return None
+            total += size
+        return total
+
+    def _smallest(self, ranked):
+        """
+        Smallest candidate that the container can hold.
+
+        Falls back to the lowest bitrate when a candidate has no size
+        metadata, since streams of the same video share one duration.
+        """
+        usable = [r for r in ranked if r[0] < COST_INCOMPATIBLE] or ranked
+
+        def key(r):
+            size = self._estimate_size(r[4])
+            tbr = sum(self._bitrate(f) for f in r[4])
+            return (size is None, size or 0, tbr, r[0])
+
+        return min(usable, key=key)
+
+    def _record_savings(self, baseline, chosen):
+        """Remember bytes saved versus what the quality policy would download"""
+        baseline_size = self._estimate_size(baseline)
+        chosen_size = self._estimate_size(chosen)
+        if baseline_size and chosen_size:
+            # Accumulates across playlist entries selected by the same instance
+            self.bytes_saved += max(0, baseline_size - chosen_size)
+
+    # ---------------- Helpers ----------------
+    def _merge(self, video, audio) -> dict:
+        """Combined format dict in the shape yt-dlp's own selector produces"""
+        return {
+            "requested_formats": [video, audio],
+            "format": f"{video.get('format')}+{audio.get('format')}",
+            "format_id": f"{video['format_id']}+{audio['format_id']}",
+            "ext": self.container,
+            "protocol": f"{video.get('protocol')}+{audio.get('protocol')}",
+            "width": video.get("width"),
+            "height": video.get("height"),
+            "fps": video.get("fps"),
+            "vcodec": video.get("vcodec"),
+            "acodec": audio.get("acodec"),
+            "dynamic_range": video.get("dynamic_range"),
+            "tbr": self._bitrate(video) + self._bitrate(audio),
+            "filesize_approx": (
+                (video.get("filesize") or video.get("filesize_approx") or 0)
+                + (audio.get("filesize") or audio.get("filesize_approx") or 0)
+            ) or None,
+        }
+
+    def _log_choice(self, picked, reason):
+        desc = " + ".join(
+            f"{f.get('format_id')} ({f.get('ext')}, {_codec_family(f.get('vcodec')) or '-'}/"
+            f"{_codec_family(f.get('acodec')) or '-'})"
+            for f in picked
+        )
+        self.last_reason = reason
+        log_info(f"Format chosen for {self.container}: {desc} - {reason}")
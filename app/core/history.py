@@ -0,0 +1,219 @@
+import argparse
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass, asdict
+from pathlib import Path
+from core.hosts import host_for
+from core.logger import log_error
+
+SCHEMA_VERSION = 1
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS downloads (
+    id INTEGER PRIMARY KEY,
+    url TEXT NOT NULL,
+    host TEXT NOT NULL,
+    title TEXT,
+    status TEXT NOT NULL,
+    format_id TEXT,
+    quality TEXT,
+    container TEXT,
+    started_at REAL NOT NULL,
+    finished_at REAL NOT NULL,
+    download_seconds REAL,
+    process_seconds REAL,
+    bytes INTEGER,
+    avg_speed REAL,
+    peak_speed REAL,
+    retries INTEGER,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_downloads_finished ON downloads (finished_at);
+CREATE INDEX IF NOT EXISTS idx_downloads_host ON downloads (host, finished_at);
+CREATE INDEX IF NOT EXISTS idx_downloads_format ON downloads (format_id);
+CREATE INDEX IF NOT EXISTS idx_downloads_status ON downloads (status, finished_at);
+"""
+
+
+@dataclass
+class HistoryRecord:
+    """One finished, failed or cancelled queue item"""
+    url: str
+    title: str
+    status: str
+    started_at: float
+    finished_at: float
+    format_id: str = ""
+    quality: str = ""
+    container: str = ""
+    download_seconds: float = 0.0
+    process_seconds: float = 0.0  # Time in the post-processing pool after the download
+    bytes: int = 0
+    avg_speed: float = 0.0
+    peak_speed: float = 0.0
+    retries: int = 0
+    error: str = ""
+
+
+class TransferStats:
+    """Progress hook that measures bytes moved and speeds for one download"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._files = {}  # tmpfilename -> [bytes at first tick, latest bytes]
+        self.first_tick = None
+        self.last_tick = None
+        self.peak_speed = 0.0
+
+    def __call__(self, d):
+        if d.get("status") not in ("downloading", "finished"):
+            return
+        path = d.get("tmpfilename") or d.get("filename")
+        downloaded = d.get("downloaded_bytes") or d.get("total_bytes") or 0
+        now = time.monotonic()
+        with self._lock:
+            if self.first_tick is None:
+                self.first_tick = now
+            self.last_tick = now
+            entry = self._files.setdefault(path, [downloaded, downloaded])
+            entry[1] = max(entry[1], downloaded)
+            self.peak_speed = max(self.peak_speed, d.get("speed") or 0)
+
+    @property
+    def bytes(self) -> int:
+        """Bytes transferred in this attempt (resumed bytes excluded)"""
+        with self._lock:
+            return sum(last - first for first, last in self._files.values())
+
+    @property
+    def seconds(self) -> float:
+        if self.first_tick is None:
+            return 0.0
+        return self.last_tick - self.first_tick
+
+    @property
+    def avg_speed(self) -> float:
+        return self.bytes / self.seconds if self.seconds > 0 else 0.0
+
+
+class HistoryStore:
+    """SQLite history of downloads in ~/.vidgrab/history.db"""
+
+    def __init__(self, db_file=None):
+        self.db_file = Path(db_file) if db_file else Path.home() / ".vidgrab" / "history.db"
+        self.db_file.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(self.db_file)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+        self._conn.execute(f"PRAGMA user_version={SCHEMA_VERSION}")
+        self._conn.commit()
+
+    def record(self, record: HistoryRecord):
+        """Insert one history row"""
+        row = asdict(record)
+        row["host"] = host_for(record.url)
+        columns = ", ".join(row)
+        placeholders = ", ".join(f":{name}" for name in row)
+        try:
+            self._conn.execute(f"INSERT INTO downloads ({columns}) VALUES ({placeholders})", row)
+            self._conn.commit()
+        except sqlite3.Error as e:
+            log_error(f"Failed to record history for {record.title}: {e}")
+
+    def daily(self, days=14) -> list:
+        """Per-day item counts, failures, bytes and average speed"""
+        return self._conn.execute(
+            """
+            SELECT date(finished_at, 'unixepoch', 'localtime') AS day,
+                   COUNT(*) AS items,
+                   SUM(status = 'Failed') AS failed,
+                   SUM(bytes) AS bytes,
+                   SUM(bytes) / NULLIF(SUM(download_seconds), 0) AS avg_speed,
+                   MAX(peak_speed) AS peak_speed
+            FROM downloads
+            WHERE finished_at >= ?
+            GROUP BY day ORDER BY day
+            """,
+            (time.time() - days * 86400,),
+        ).fetchall()
+
+    def by_format(self, days=14, limit=10) -> list:
+        """Formats by use, with their failure count and average speed"""
+        return self._conn.execute(
+            """
+            SELECT format_id, COUNT(*) AS items,
+                   SUM(status = 'Failed') AS failed,
+                   SUM(bytes) / NULLIF(SUM(download_seconds), 0) AS avg_speed,
+                   AVG(process_seconds) AS avg_process_seconds
+            FROM downloads
+            WHERE finished_at >= ? AND format_id != ''
+            GROUP BY format_id ORDER BY items DESC LIMIT ?
+            """,
+            (time.time() - days * 86400, limit),
+        ).fetchall()
+
+    def slowest(self, days=14, limit=10) -> list:
+        """Completed items with the lowest average speed"""
+        return self._conn.execute(
+            """
+            SELECT title, host, format_id, bytes, avg_speed, download_seconds, retries
+            FROM downloads
+            WHERE finished_at >= ? AND status = 'Completed' AND bytes > 0
+            ORDER BY avg_speed ASC LIMIT ?
+            """,
+            (time.time() - days * 86400, limit),
+        ).fetchall()
+
+    def close(self):
+        self._conn.close()
+
+
+def _mib(size) -> str:
+    return f"{(size or 0) / (1024 * 1024):.1f} MiB"
+
+
+def _speed(speed) -> str:
+    return f"{(speed or 0) / (1024 * 1024):.2f} MiB/s"
+
+
+def format_report(store: HistoryStore, days=14) -> str:
+    """Plain-text throughput report for the last `days` days"""
+    lines = [f"Downloads, last {days} days", ""]
+    lines.append(f"{'Day':<12}{'Items':>7}{'Failed':>8}{'Bytes':>14}{'Avg speed':>14}{'Peak':>14}")
+    for row in store.daily(days):
+        lines.append(
+            f"{row['day']:<12}{row['items']:>7}{row['failed'] or 0:>8}{_mib(row['bytes']):>14}"
+            f"{_speed(row['avg_speed']):>14}{_speed(row['peak_speed']):>14}"
+        )
+    lines += ["", f"{'Format':<16}{'Items':>7}{'Failed':>8}{'Avg speed':>14}{'Avg merge':>11}"]
+    for row in store.by_format(days):
+        lines.append(
+            f"{row['format_id']:<16}{row['items']:>7}{row['failed'] or 0:>8}"
+            f"{_speed(row['avg_speed']):>14}{(row['avg_process_seconds'] or 0):>10.1f}s"
+        )
+    lines += ["", "Slowest completed items:"]
+    for row in store.slowest(days):
+        lines.append(
+            f"  {_speed(row['avg_speed'])}  {_mib(row['bytes'])} in {row['download_seconds']:.0f}s "
+            f"[{row['host']} {row['format_id']}, {row['retries']} retries] {row['title']}"
+        )
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    """CLI: python -m core.history [--days N] (run from the app directory)"""
+    parser = argparse.ArgumentParser(description="VidGrab download history report")
+    parser.add_argument("--days", type=int, default=14, help="How many days back to report")
+    parser.add_argument("--db", help="History database (default ~/.vidgrab/history.db)")
+    args = parser.parse_args(argv)
+    store = HistoryStore(args.db)
+    try:
+        print(format_report(store, args.days))
+    finally:
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
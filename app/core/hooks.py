@@ -72,3 +72,16 @@ def progress_hook_factory(on_progress, on_done):
             on_done(d.get("filename"))
 
     return hook
+
+
+def cancellation_hook_factory(token):
+    """
+    Build a hook that aborts the download once `token` is cancelled.
+
+    yt-dlp calls progress hooks for every block read and from every fragment
+    thread, so raising here stops the transfer within one block.
+    """
+    def hook(d):
+        token.raise_if_cancelled()
+
+    return hook
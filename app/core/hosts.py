@@ -0,0 +1,11 @@
+from urllib.parse import urlparse
+
+
+def host_for(url: str) -> str:
+    """Normalize a page URL to the host whose limits and statistics apply"""
+    host = (urlparse(url).hostname or "").lower()
+    if host.startswith("www."):
+        host = host[4:]
+    if host in ("youtu.be", "m.youtube.com", "music.youtube.com"):
+        host = "youtube.com"
+    return host or "unknown"
@@ -0,0 +1,121 @@
+import getpass
+import json
+from PyQt6.QtCore import QObject
+from PyQt6.QtNetwork import QLocalServer, QLocalSocket
+from core.logger import log_info, log_warning, log_error
+
+# One local socket per user: a Unix domain socket on Linux/macOS, a named pipe on Windows
+SERVER_NAME = f"vidgrab-{getpass.getuser()}"
+MAX_REQUEST_BYTES = 64 * 1024 * 1024
+
+
+def instance_running(timeout_ms=500) -> bool:
+    """True if another instance is accepting connections on the local socket"""
+    probe = QLocalSocket()
+    probe.connectToServer(SERVER_NAME)
+    if not probe.waitForConnected(timeout_ms):
+        return False
+    probe.disconnectFromServer()
+    return True
+
+
+def send_request(request: dict, timeout_ms=2000) -> dict | None:
+    """
+    Send one request to the running instance and wait for its reply.
+
+    Returns None when no instance is listening.
+    """
+    socket = QLocalSocket()
+    socket.connectToServer(SERVER_NAME)
+    if not socket.waitForConnected(timeout_ms):
+        return None
+    socket.write(json.dumps(request).encode("utf-8") + b"\n")
+    socket.flush()
+    buffer = b""
+    while not buffer.endswith(b"\n"):
+        if not socket.waitForReadyRead(timeout_ms):
+            log_warning(f"No reply from running instance for {request.get('cmd')}")
+            return None
+        buffer += bytes(socket.readAll())
+    socket.disconnectFromServer()
+    return json.loads(buffer)
+
+
+class IpcServer(QObject):
+    """
+    Local enqueue/status API served by the running instance.
+
+    Requests and replies are single lines of JSON over a QLocalServer socket:
+      {"cmd": "enqueue", "urls": [...], "type": "auto"} -> {"ok": true, "added": n, ...}
+      {"cmd": "status"} -> {"ok": true, "session": {...}, "items": [...]}
+      {"cmd": "activate"} -> raise the window
+    `handler(request) -> dict` runs on the GUI thread, so it may touch the queue directly.
+    The server can listen before the handler exists (to claim the socket early);
+    requests are held until set_handler() is called.
+    """
+
+    def __init__(self, handler=None, parent=None):
+        super().__init__(parent)
+        self.handler = handler
+        self._buffers = {}
+        self._server = QLocalServer(self)
+        self._server.setSocketOptions(QLocalServer.SocketOption.UserAccessOption)
+        self._server.newConnection.connect(self._on_new_connection)
+
+    def listen(self) -> bool:
+        """Start serving; clears a socket left behind by a crashed instance"""
+        if not self._server.listen(SERVER_NAME):
+            if instance_running():
+                log_warning("Another instance is already serving the local API")
+                return False
+            QLocalServer.removeServer(SERVER_NAME)
+            if not self._server.listen(SERVER_NAME):
+                log_error(f"Local API unavailable: {self._server.errorString()}")
+                return False
+        log_info(f"Local API listening on {self._server.fullServerName()}")
+        return True
+
+    def set_handler(self, handler):
+        """Start answering requests, including any that arrived before now"""
+        self.handler = handler
+        for socket in list(self._buffers):
+            self._on_ready_read(socket)
+
+    def close(self):
+        self._server.close()
+
+    def _on_new_connection(self):
+        while self._server.hasPendingConnections():
+            socket = self._server.nextPendingConnection()
+            self._buffers[socket] = b""
+            socket.readyRead.connect(lambda s=socket: self._on_ready_read(s))
+            socket.disconnected.connect(lambda s=socket: self._forget(s))
+
+    def _forget(self, socket):
+        self._buffers.pop(socket, None)
+        socket.deleteLater()
+
+    def _on_ready_read(self, socket):
+        buffer = self._buffers.get(socket, b"") + bytes(socket.readAll())
+        if len(buffer) > MAX_REQUEST_BYTES:
+            log_warning("Local API request too large, dropping connection")
+            self._buffers.pop(socket, None)
+            socket.abort()
+            return
+        if self.handler is None:
+            self._buffers[socket] = buffer  # Answered once set_handler() is called
+            return
+        *lines, self._buffers[socket] = buffer.split(b"\n")
+        for line in lines:
+            if line.strip():
+                self._reply(socket, line)
+
+    def _reply(self, socket, line):
+        try:
+            request = json.loads(line)
+            response = self.handler(request)
+        except Exception as e:
+            log_error(f"Local API request failed: {e}", exc_info=True)
+            response = {"ok": False, "error": str(e)}
+        socket.write(json.dumps(response).encode("utf-8") + b"\n")
+        socket.flush()
@@ -0,0 +1,118 @@
+from dataclasses import dataclass, field
+from core.logger import log_info, log_warning
+from core.cancellation import DownloadCancelled
+
+PLAYLIST_TYPES = ("playlist", "multi_video")
+# Redirect hops followed before an extraction result is taken as-is
+MAX_REDIRECTS = 5
+# Failed entry IDs kept in the summary; the count keeps going past this
+MAX_FAILED_IDS = 200
+
+
+@dataclass
+class PlaylistSummary:
+    """What a playlist run produced, without any entry's metadata"""
+    title: str = ""
+    total: int = 0
+    downloaded: int = 0
+    failed: int = 0
+    failed_ids: list[str] = field(default_factory=list)
+
+    def add_failure(self, entry_id: str):
+        self.failed += 1
+        if len(self.failed_ids) < MAX_FAILED_IDS:
+            self.failed_ids.append(entry_id)
+
+    def merge(self, other: "PlaylistSummary"):
+        """Fold a nested playlist (e.g. a channel tab) into this one"""
+        self.total += other.total
+        self.downloaded += other.downloaded
+        for entry_id in other.failed_ids:
+            self.add_failure(entry_id)
+        self.failed += other.failed - len(other.failed_ids)
+
+
+def resolve(ydl, ie_result):
+    """Follow plain "url" redirects without processing, so playlists stay lazy"""
+    for _ in range(MAX_REDIRECTS):
+        if not ie_result or ie_result.get("_type") != "url":
+            break
+        ie_result = ydl.extract_info(ie_result["url"], ie_key=ie_result.get("ie_key"),
+                                     download=False, process=False)
+    return ie_result
+
+
+def is_playlist(ie_result) -> bool:
+    return bool(ie_result) and ie_result.get("_type") in PLAYLIST_TYPES
+
+
+def _playlist_fields(playlist) -> dict:
+    """The fields yt-dlp adds to each entry so output templates see the playlist"""
+    return {
+        "playlist": playlist.get("title") or playlist.get("id"),
+        "playlist_id": playlist.get("id"),
+        "playlist_title": playlist.get("title"),
+        "playlist_uploader": playlist.get("uploader"),
+        "playlist_uploader_id": playlist.get("uploader_id"),
+        "playlist_count": playlist.get("playlist_count"),
+        "extractor": playlist.get("extractor"),
+        "extractor_key": playlist.get("extractor_key"),
+        "webpage_url": playlist.get("webpage_url"),
+        "webpage_url_basename": playlist.get("webpage_url_basename"),
+        "webpage_url_domain": playlist.get("webpage_url_domain"),
+    }
+
+
+def stream_playlist(ydl, playlist, cancel_token=None) -> PlaylistSummary:
+    """
+    Download a playlist one entry at a time.
+
+    yt-dlp's own playlist processing returns every entry's full info dict
+    (formats included), so memory grows with the playlist. Here each entry
+    is extracted, downloaded and dropped before the next one is fetched from
+    the (lazy) entries iterator, and only counts and failed IDs are kept.
+    """
+    summary = PlaylistSummary(title=playlist.get("title") or playlist.get("id") or "")
+    extra = _playlist_fields(playlist)
+    entries = playlist.get("entries") or ()
+    # Known up front for most extractors; a lazy entries iterator only tells as it goes
+    n_entries = playlist.get("playlist_count") or (len(entries) if isinstance(entries, (list, tuple)) else None)
+    log_info(f"Streaming playlist: {summary.title}")
+
+    for index, entry in enumerate(entries, start=1):
+        if cancel_token:
+            cancel_token.raise_if_cancelled()
+        entry_id = (entry or {}).get("id") or f"#{index}"
+        # Counted before anything can fail, so every failure is also part of the total
+        summary.total += 1
+        if not entry:
+            summary.add_failure(entry_id)
+            continue
+        try:
+            entry = resolve(ydl, entry)
+            if is_playlist(entry):
+                summary.total -= 1  # A nested playlist counts through its own entries
+                summary.merge(stream_playlist(ydl, entry, cancel_token))
+                continue
+            # What yt-dlp's own playlist processing passes, so progress shows "Item X/Y"
+            count = n_entries or index
+            result = ydl.process_ie_result(entry, download=True, extra_info={
+                **extra,
+                "playlist_count": count,
+                "n_entries": count,
+                "playlist_index": index,
+                "playlist_autonumber": index,
+            }) if entry else None
+        except DownloadCancelled:
+            raise
+        except Exception as e:
+            log_warning(f"Playlist entry {entry_id} failed: {e}")
+            result = None
+        if result:
+            summary.downloaded += 1
+        else:
+            summary.add_failure(entry_id)
+        # Drop this entry's info dict before fetching the next one
+        del entry, result
+
+    return summary
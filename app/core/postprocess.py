@@ -0,0 +1,129 @@
+import os
+import subprocess
+import threading
+from concurrent.futures import ThreadPoolExecutor, Future
+from dataclasses import dataclass, field
+from core.logger import log_info, log_error, log_warning
+from core.staging import move_into_place
+
+
+@dataclass
+class StreamFile:
+    """One downloaded stream waiting to be merged"""
+    path: str
+    has_video: bool
+    has_audio: bool
+
+
+@dataclass
+class MergeJob:
+    """ffmpeg merge of separately downloaded streams into the final container"""
+    streams: list[StreamFile]
+    output: str
+    ffmpeg: str
+    title: str = ""
+    context: object = field(default=None, repr=False)  # Caller data returned with the result
+    destination_dir: str = ""  # Move the merged file here when merging in a staging dir
+    content_key: str = ""  # Dedupe index key for the merged video and format
+
+    @property
+    def final_path(self) -> str:
+        """Where the merged file ends up"""
+        if self.destination_dir:
+            return os.path.join(self.destination_dir, os.path.basename(self.output))
+        return self.output
+
+    def build_command(self, temp_output: str) -> list[str]:
+        """Stream-copy merge, mapping streams the same way yt-dlp's merger does"""
+        cmd = [self.ffmpeg, "-y", "-loglevel", "error"]
+        for stream in self.streams:
+            cmd.extend(["-i", stream.path])
+        cmd.extend(["-c", "copy"])
+        for i, stream in enumerate(self.streams):
+            if stream.has_audio:
+                cmd.extend(["-map", f"{i}:a:0"])
+            if stream.has_video:
+                cmd.extend(["-map", f"{i}:v:0"])
+        cmd.append(temp_output)
+        return cmd
+
+
+def run_merge(job: MergeJob) -> str:
+    """Merge job.streams into job.output, removing the inputs on success"""
+    root, ext = os.path.splitext(job.output)
+    temp_output = f"{root}.temp{ext}"
+    result = subprocess.run(
+        job.build_command(temp_output),
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        text=True,
+    )
+    if result.returncode != 0:
+        if os.path.exists(temp_output):
+            os.remove(temp_output)
+        raise RuntimeError(f"ffmpeg merge failed ({result.returncode}): {result.stderr.strip()[-500:]}")
+
+    os.replace(temp_output, job.output)
+    for stream in job.streams:
+        try:
+            os.remove(stream.path)
+        except OSError as e:
+            log_warning(f"Could not remove merged stream {stream.path}: {e}")
+    if job.destination_dir:
+        return move_into_place(job.output, job.destination_dir)
+    return job.output
+
+
+class PostProcessPool:
+    """
+    CPU-bound stage that runs ffmpeg merges off the download slot.
+
+    Downloads hand their finished streams to this pool and return immediately,
+    so the next network transfer overlaps with merging the previous item.
+    """
+
+    def __init__(self, max_workers=None):
+        self.max_workers = max_workers or os.cpu_count() or 2
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.max_workers,
+            thread_name_prefix="vidgrab-postprocess",
+        )
+        self._lock = threading.Lock()
+        self._pending = 0
+        log_info(f"Post-processing pool started with {self.max_workers} workers")
+
+    @property
+    def pending(self) -> int:
+        """Number of queued or running merge jobs"""
+        with self._lock:
+            return self._pending
+
+    def submit(self, job: MergeJob, on_done=None) -> Future:
+        """
+        Queue a merge job.
+
+        on_done(job, success, error_message) is called from a pool thread.
+        """
+        with self._lock:
+            self._pending += 1
+
+        def task():
+            try:
+                log_info(f"Merging {len(job.streams)} streams: {os.path.basename(job.output)}")
+                run_merge(job)
+                log_info(f"Merge complete: {os.path.basename(job.output)}")
+                success, error = True, ""
+            except Exception as e:
+                log_error(f"Merge failed for {job.output}: {e}", exc_info=True)
+                success, error = False, f"Merge failed: {e}"
+            finally:
+                with self._lock:
+                    self._pending -= 1
+            if on_done:
+                on_done(job, success, error)
+
+        return self._executor.submit(task)
+
+    def shutdown(self, wait=True):
+        """Stop accepting jobs; optionally wait for running merges"""
+        self._executor.shutdown(wait=wait)
@@ -0,0 +1,164 @@
+import math
+import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from core.logger import log_info, log_warning
+
+# Stream URLs carry their expiry as ?expire=<unix time> (or /expire/<t>/ in manifest URLs)
+_EXPIRE_PATTERN = re.compile(r"[?&/]expire[=/](\d{9,})")
+DEFAULT_TTL = 30 * 60  # Seconds an extraction is trusted when its URLs carry no expiry
+EXPIRY_MARGIN = 15 * 60  # Never hand out an extraction this close to expiring
+MAX_ENTRIES = 32  # Extractions kept (each holds a full format list); those downloaded last are dropped first
+TAKE_WAIT = 15.0  # Seconds a download waits for a prefetch of its URL that is already running
+
+
+def expires_at(ie_result, now=None) -> float:
+    """Earliest expiry among the result's stream URLs"""
+    now = time.time() if now is None else now
+    expiries = []
+    for fmt in ie_result.get("formats") or [ie_result]:
+        for key in ("url", "manifest_url"):
+            match = _EXPIRE_PATTERN.search(fmt.get(key) or "")
+            if match:
+                expiries.append(float(match.group(1)))
+    return min(expiries) if expiries else now + DEFAULT_TTL
+
+
+class ExtractionCache:
+    """
+    Extracted-but-unprocessed yt-dlp results by URL, each with its expiry.
+
+    Entries are taken, not read: a download consumes its extraction, and a
+    retry extracts again rather than reusing URLs that may have just failed.
+    Extractions in progress are reserved, so a download that starts while
+    its URL is being prefetched waits for that result instead of extracting
+    a second time. When full, the cache drops the entries whose URLs come
+    last in the download schedule (see set_schedule), then unscheduled ones.
+    """
+
+    def __init__(self, max_entries=MAX_ENTRIES, margin=EXPIRY_MARGIN):
+        self.max_entries = max_entries
+        self.margin = margin
+        self._entries = OrderedDict()  # url -> (ie_result, expires_at)
+        self._reserved = set()  # URLs being extracted for the cache right now
+        self._schedule = {}  # url -> position in the download order
+        self._lock = threading.Lock()
+        self._changed = threading.Condition(self._lock)
+        self.hits = 0
+        self.misses = 0
+
+    def reserve(self, url) -> bool:
+        """Claim `url` for an extraction; False if it is already cached or being extracted"""
+        with self._lock:
+            entry = self._entries.get(url)
+            if url in self._reserved or (entry is not None and self._fresh(entry)):
+                return False
+            self._reserved.add(url)
+            return True
+
+    def release(self, url):
+        """End a reservation without a result (the extraction failed or was skipped)"""
+        with self._changed:
+            self._reserved.discard(url)
+            self._changed.notify_all()
+
+    def set_schedule(self, urls):
+        """Upcoming URLs in download order, so a full cache keeps the ones needed soonest"""
+        schedule = {}
+        for position, url in enumerate(urls):
+            schedule.setdefault(url, position)
+        with self._lock:
+            self._schedule = schedule
+
+    def put(self, url, ie_result):
+        expiry = expires_at(ie_result)
+        with self._changed:
+            self._entries[url] = (ie_result, expiry)
+            self._entries.move_to_end(url)
+            self._evict()
+            self._reserved.discard(url)
+            self._changed.notify_all()
+        return expiry
+
+    def _evict(self):
+        while len(self._entries) > self.max_entries:
+            # Unscheduled entries go first, oldest first; then the one scheduled last
+            _, victim = max(enumerate(self._entries), key=lambda e: (self._schedule.get(e[1], math.inf), -e[0]))
+            del self._entries[victim]
+
+    def _fresh(self, entry) -> bool:
+        return entry[1] - time.time() > self.margin
+
+    def __contains__(self, url):
+        with self._lock:
+            entry = self._entries.get(url)
+            return entry is not None and self._fresh(entry)
+
+    def take(self, url, timeout=TAKE_WAIT, cancel_token=None):
+        """
+        The stored extraction for `url` if it is still fresh, else None.
+
+        Waits up to `timeout` seconds for an extraction of `url` that is in
+        progress; `cancel_token` is honored while waiting.
+        """
+        deadline = time.monotonic() + timeout
+        with self._changed:
+            if url in self._reserved:
+                log_info(f"Waiting for the running extraction of {url}")
+            while url in self._reserved and (remaining := deadline - time.monotonic()) > 0:
+                self._changed.wait(min(remaining, 0.2))
+                if cancel_token:
+                    cancel_token.raise_if_cancelled()
+            entry = self._entries.pop(url, None)
+        if entry and self._fresh(entry):
+            self.hits += 1
+            return entry[0]
+        if entry:
+            log_info(f"Stored extraction expired, extracting again: {url}")
+        self.misses += 1
+        return None
+
+    def discard(self, url):
+        with self._lock:
+            self._entries.pop(url, None)
+
+
+class Prefetcher:
+    """
+    Extracts the next few waiting items while the current one downloads.
+
+    `extract(url)` returns an unprocessed ie_result, or None for URLs that
+    should not be cached (e.g. playlists, which are streamed entry by entry).
+    """
+
+    def __init__(self, cache: ExtractionCache, extract, workers=1):
+        self.cache = cache
+        self.extract = extract
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="vidgrab-prefetch")
+
+    def schedule(self, items):
+        """Queue extraction for `items` (upcoming queue items) not already cached or in flight"""
+        for item in items:
+            if self.cache.reserve(item.url):
+                self._executor.submit(self._prefetch, item.url)
+
+    def _prefetch(self, url):
+        started = time.monotonic()
+        ie_result = None
+        try:
+            ie_result = self.extract(url)
+            if ie_result:
+                expiry = self.cache.put(url, ie_result)
+                log_info(f"Prefetched extraction in {time.monotonic() - started:.1f}s, "
+                         f"valid {(expiry - time.time()) / 60:.0f} min: {url}")
+        except Exception as e:
+            # The download extracts again and reports the real failure
+            log_warning(f"Prefetch failed for {url}: {e}")
+        finally:
+            if not ie_result:
+                self.cache.release(url)
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
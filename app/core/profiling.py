@@ -0,0 +1,184 @@
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from pathlib import Path
+from core.logger import log_info, log_error
+
+# Set to 1 to profile a session regardless of the diagnostics setting
+PROFILE_ENV = "VIDGRAB_PROFILE"
+PROFILES_DIR = Path.home() / ".vidgrab" / "profiles"
+
+SAMPLE_INTERVAL = 0.01  # Seconds between stack samples (~100 Hz)
+SNAPSHOT_INTERVAL = 60.0  # Seconds between tracemalloc snapshots and summary rewrites
+MAX_SNAPSHOTS = 10  # Snapshot files kept per profile; older ones are deleted
+TRACEMALLOC_FRAMES = 8
+TOP_N = 25
+MAX_STACKS = 20_000  # Distinct folded stacks kept; rarer ones are counted as "(other)"
+
+
+def env_enabled() -> bool:
+    return os.environ.get(PROFILE_ENV, "").strip().lower() in ("1", "true", "yes", "on")
+
+
+def _frame_key(code) -> str:
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class SamplingProfiler:
+    """
+    Low-overhead profiler for a live session.
+
+    A daemon thread samples every thread's stack with sys._current_frames()
+    instead of tracing each call, so the GUI and download threads run at
+    full speed between samples. Sampling is wall clock: threads blocked in
+    a wait show up too. tracemalloc snapshots are dumped
+    periodically, and summary.txt (top functions, top allocation sites,
+    growth since the previous snapshot) is rewritten each time; only the
+    last MAX_SNAPSHOTS snapshot files are kept. Output goes to
+    ~/.vidgrab/profiles/<timestamp>/; stacks.folded can be fed to any
+    flame graph tool.
+    """
+
+    def __init__(self, interval=SAMPLE_INTERVAL, snapshot_interval=SNAPSHOT_INTERVAL, out_dir=PROFILES_DIR):
+        self.interval = interval
+        self.snapshot_interval = snapshot_interval
+        self.out_dir = Path(out_dir) / time.strftime("%Y%m%d-%H%M%S")
+        self.samples = 0
+        self._self_counts = Counter()  # Leaf function -> samples
+        self._total_counts = Counter()  # Function anywhere on the stack -> samples
+        self._thread_counts = Counter()  # Thread name -> samples
+        self._stacks = Counter()  # Folded "thread;outer;...;leaf" -> samples
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._previous_snapshot = None
+        self._snapshot_index = 0
+        self._started_tracemalloc = False
+        self._started_at = 0.0
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        if self.running:
+            return
+        self.out_dir.mkdir(parents=True, exist_ok=True)
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(TRACEMALLOC_FRAMES)
+            self._started_tracemalloc = True
+        self._started_at = time.monotonic()
+        self._stop.clear()
+        # Not a daemon: the final checkpoint is written even while the app exits
+        self._thread = threading.Thread(target=self._run, name="vidgrab-profiler")
+        self._thread.start()
+        log_info(f"Profiler started ({1 / self.interval:.0f} Hz), writing to {self.out_dir}")
+
+    def stop(self):
+        """Stop sampling; the profiler thread writes the final snapshot and summary, off the caller's thread"""
+        if self.running:
+            self._stop.set()
+
+    def _run(self):
+        own = threading.get_ident()
+        next_checkpoint = time.monotonic() + self.snapshot_interval
+        while not self._stop.wait(self.interval):
+            try:
+                self._sample(own)
+                if time.monotonic() >= next_checkpoint:
+                    self._checkpoint()
+                    next_checkpoint = time.monotonic() + self.snapshot_interval
+            except Exception as e:
+                log_error(f"Profiler sample failed: {e}", exc_info=True)
+        try:
+            self._checkpoint()
+        except Exception as e:
+            log_error(f"Profiler final checkpoint failed: {e}", exc_info=True)
+        finally:
+            if self._started_tracemalloc:
+                tracemalloc.stop()
+                self._started_tracemalloc = False
+        log_info(f"Profiler stopped after {self.samples} samples: {self.out_dir / 'summary.txt'}")
+
+    def _sample(self, own_ident):
+        names = {t.ident: t.name for t in threading.enumerate()}
+        frames = sys._current_frames()
+        with self._lock:
+            self.samples += 1
+            for ident, frame in frames.items():
+                if ident == own_ident:
+                    continue
+                thread_name = names.get(ident, str(ident))
+                stack = []
+                while frame is not None:
+                    stack.append(_frame_key(frame.f_code))
+                    frame = frame.f_back
+                if not stack:
+                    continue
+                self._thread_counts[thread_name] += 1
+                self._self_counts[stack[0]] += 1
+                # Recursion counts a function once per sample
+                self._total_counts.update(set(stack))
+                folded = ";".join([thread_name] + stack[::-1])
+                if folded in self._stacks or len(self._stacks) < MAX_STACKS:
+                    self._stacks[folded] += 1
+                else:
+                    self._stacks[f"{thread_name};(other)"] += 1
+
+    def _checkpoint(self):
+        """Dump a tracemalloc snapshot and rewrite the summary and folded stacks"""
+        snapshot = None
+        if tracemalloc.is_tracing():
+            snapshot = tracemalloc.take_snapshot().filter_traces((
+                tracemalloc.Filter(False, tracemalloc.__file__),
+                tracemalloc.Filter(False, __file__),
+                tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+            ))
+            self._snapshot_index += 1
+            snapshot.dump(str(self.out_dir / f"snapshot-{self._snapshot_index:03d}.tracemalloc"))
+            if self._snapshot_index > MAX_SNAPSHOTS:
+                expired = self.out_dir / f"snapshot-{self._snapshot_index - MAX_SNAPSHOTS:03d}.tracemalloc"
+                expired.unlink(missing_ok=True)
+        with self._lock:
+            summary = self._format_summary(snapshot)
+            folded = "\n".join(f"{stack} {count}" for stack, count in self._stacks.items())
+        (self.out_dir / "summary.txt").write_text(summary)
+        (self.out_dir / "stacks.folded").write_text(folded + "\n")
+        if snapshot is not None:
+            self._previous_snapshot = snapshot
+
+    def _format_summary(self, snapshot) -> str:
+        elapsed = time.monotonic() - self._started_at
+        lines = [
+            f"Profile {self.out_dir.name}: {elapsed:.0f}s, {self.samples} samples every {self.interval * 1000:.0f} ms",
+            "",
+            "Samples by thread:",
+        ]
+        for name, count in self._thread_counts.most_common():
+            lines.append(f"  {count:8d}  {name}")
+
+        # Percentages are of sampler ticks, so a function busy in two threads can exceed 100%
+        ticks = max(self.samples, 1)
+        lines += ["", f"Top {TOP_N} functions (self time):"]
+        for key, count in self._self_counts.most_common(TOP_N):
+            lines.append(f"  {count / ticks:7.1%}  {count:8d}  {key}")
+        lines += ["", f"Top {TOP_N} functions (on stack):"]
+        for key, count in self._total_counts.most_common(TOP_N):
+            lines.append(f"  {count / ticks:7.1%}  {count:8d}  {key}")
+
+        if snapshot is not None:
+            current, peak = tracemalloc.get_traced_memory()
+            lines += ["", f"Traced memory: {current / 1e6:.1f} MB (peak {peak / 1e6:.1f} MB)",
+                      f"Top {TOP_N} allocation sites:"]
+            for stat in snapshot.statistics("lineno")[:TOP_N]:
+                frame = stat.traceback[0]
+                lines.append(f"  {stat.size / 1024:10.1f} KiB  {stat.count:8d} blocks  {frame.filename}:{frame.lineno}")
+            if self._previous_snapshot is not None:
+                lines += ["", f"Top {TOP_N} growth since previous snapshot:"]
+                for stat in snapshot.compare_to(self._previous_snapshot, "lineno")[:TOP_N]:
+                    frame = stat.traceback[0]
+                    lines.append(f"  {stat.size_diff / 1024:+10.1f} KiB  {stat.count_diff:+8d} blocks  {frame.filename}:{frame.lineno}")
+        return "\n".join(lines) + "\n"
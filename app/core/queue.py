@@ -1,23 +1,138 @@
-from core.types import QueueItem
+from collections import OrderedDict
+from core.types import QueueItem, ItemStatus
+from core.scheduling import make_scheduler, POLICY_FIFO
 
 class QueueManager:
-    def __init__(self):
-        self.queue: list[QueueItem] = []
-        self.current_index = -1
+    """
+    Queue items indexed by their stable ID.
+
+    An OrderedDict keeps display order and the ID index in one structure, so
+    lookup, remove and move to either end are O(1); which item downloads
+    next is decided by the scheduling policy.
+    """
+
+    def __init__(self, policy: str = POLICY_FIFO):
+        self._items: OrderedDict[str, QueueItem] = OrderedDict()
+        self.current_id: str | None = None
+        self.scheduler = make_scheduler(policy)
+        self._front_order = 0.0  # Lowest order handed out, for move-to-front
+        self._back_order = 0.0  # Highest order handed out
+
+    @property
+    def queue(self) -> list[QueueItem]:
+        """Snapshot of the items in display order"""
+        return list(self._items.values())
+
+    def __iter__(self):
+        return iter(self._items.values())
+
+    def __len__(self):
+        return len(self._items)
+
+    def __contains__(self, item_id):
+        return item_id in self._items
+
+    def get(self, item_id: str) -> QueueItem | None:
+        return self._items.get(item_id)
+
+    @property
+    def current_item(self) -> QueueItem | None:
+        return self._items.get(self.current_id) if self.current_id else None
 
     def add(self, url: str, title: str, download_type: str = "auto"):
-        item = QueueItem(url=url, title=title, download_type=download_type)
-        self.queue.append(item)
+        item = QueueItem.from_url(url, title, download_type=download_type)
+        self.append(item)
         return item
 
+    def append(self, item: QueueItem):
+        """Add an existing item (e.g. loaded from disk); it keeps a saved order"""
+        if item.order:
+            self._front_order = min(self._front_order, item.order)
+            self._back_order = max(self._back_order, item.order)
+        else:
+            self._back_order += 1
+            item.order = self._back_order
+        self._items[item.id] = item
+        if item.status == ItemStatus.WAITING:
+            self.scheduler.push(item)
+
+    @property
+    def policy(self) -> str:
+        return self.scheduler.name
+
+    def set_policy(self, policy: str):
+        """Switch scheduling policy; waiting items are rescheduled once"""
+        if policy == self.scheduler.name:
+            return
+        self.scheduler = make_scheduler(policy)
+        for item in self._items.values():
+            if item.status == ItemStatus.WAITING:
+                self.scheduler.push(item)
+
     def has_next(self)-> bool:
-        return self.current_index + 1 < len(self.queue)
+        return self.scheduler.peek() is not None
+
+    def upcoming(self, count: int) -> list[QueueItem]:
+        """Items next_item() would return next, in order, without taking them"""
+        return self.scheduler.upcoming(count) if count > 0 else []
 
     def next_item(self) -> QueueItem | None:
-        if self.has_next():
-            self.current_index += 1
-            return self.queue[self.current_index]
-        return None
+        item = self.scheduler.pop()
+        if item is None:
+            return None
+        self.current_id = item.id
+        return item
+
+    def mark_waiting(self, item: QueueItem):
+        """Make an item eligible for scheduling (retry due, requeued after stop)"""
+        item.status = ItemStatus.WAITING
+        self.scheduler.push(item)
+
+    def reschedule(self, item: QueueItem):
+        """Re-rank an item after its priority, order or estimate changed"""
+        if item.status == ItemStatus.WAITING:
+            self.scheduler.push(item)
+
+    def move_to_front(self, item: QueueItem):
+        """Move an item to the top of the list and ahead of everything with the same rank"""
+        self._front_order -= 1
+        item.order = self._front_order
+        self._items.move_to_end(item.id, last=False)
+        self.reschedule(item)
+
+    def set_priority(self, item: QueueItem, priority: int):
+        item.priority = priority
+        self.reschedule(item)
+
+    def pause(self, item: QueueItem):
+        """Hold a waiting item back from scheduling; partial files are kept"""
+        if item.status in (ItemStatus.WAITING, ItemStatus.DOWNLOADING):
+            item.status = ItemStatus.PAUSED
+            self.scheduler.remove(item)
+
+    def resume(self, item: QueueItem):
+        """Make a paused item eligible for scheduling again"""
+        if item.status == ItemStatus.PAUSED:
+            self.mark_waiting(item)
+
+    def requeue(self, item: QueueItem):
+        """Put a cancelled or failed item back in line; kept partial files are resumed"""
+        if item.status in (ItemStatus.CANCELLED, ItemStatus.FAILED):
+            item.error_message = ""
+            self.mark_waiting(item)
+
+    def remove(self, item_id: str) -> QueueItem | None:
+        item = self._items.pop(item_id, None)
+        if item:
+            self.scheduler.remove(item)
+            if item_id == self.current_id:
+                self.current_id = None
+        return item
+
+    def clear(self):
+        self._items.clear()
+        self.scheduler = make_scheduler(self.scheduler.name)
+        self.current_id = None
 
     def reset(self):
-        self.current_index = -1
+        self.current_id = None
@@ -19,6 +19,7 @@ class QueuePersistence:
             # Filter out completed items, keep everything else
             items_to_save = [
                 {
+                    "id": item.id,
                     "url": item.url,
                     "title": item.title,
                     "status": item.status.value,  # Convert enum to string for JSON
@@ -26,6 +27,13 @@ class QueuePersistence:
                     "retry_count": item.retry_count,
                     "max_retries": item.max_retries,
                     "download_type": item.download_type,
+                    "format_id": item.format_id,
+                    "downloaded_bytes": item.downloaded_bytes,
+                    "total_bytes": item.total_bytes,
+                    "priority": item.priority,
+                    "order": item.order,
+                    "duration": item.duration,
+                    "group": item.group,
                 }
                 for item in queue_manager.queue
                 if item.status != ItemStatus.COMPLETED  # Don't persist completed items
@@ -59,17 +67,29 @@ class QueuePersistence:
                 status_str = item_data.get("status", "Waiting")
                 # Convert string back to enum
                 status = ItemStatus(status_str) if status_str in [s.value for s in ItemStatus] else ItemStatus.WAITING
+                # Interrupted downloads resume from their .part files on the next run
+                if status in (ItemStatus.DOWNLOADING, ItemStatus.PROCESSING):
+                    status = ItemStatus.WAITING
                 
-                item = QueueItem(
-                    url=item_data.get("url", ""),
-                    title=item_data.get("title", ""),
+                item = QueueItem.from_url(
+                    item_data.get("url", ""),
+                    item_data.get("title", ""),
                     status=status,
                     error_message=item_data.get("error_message", ""),
                     retry_count=item_data.get("retry_count", 0),
                     max_retries=item_data.get("max_retries", 3),
                     download_type=item_data.get("download_type", "auto"),
+                    format_id=item_data.get("format_id", ""),
+                    downloaded_bytes=item_data.get("downloaded_bytes", 0),
+                    total_bytes=item_data.get("total_bytes", 0),
+                    priority=item_data.get("priority", 0),
+                    order=item_data.get("order", 0.0),
+                    duration=item_data.get("duration", 0.0),
+                    group=item_data.get("group", ""),
                 )
-                queue_manager.queue.append(item)
+                if item_data.get("id"):
+                    item.id = item_data["id"]
+                queue_manager.append(item)
             
             log_info(f"Queue loaded: {len(items_data)} items")
             return True
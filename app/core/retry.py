@@ -0,0 +1,152 @@
+import random
+import re
+import time
+from dataclasses import dataclass
+from enum import Enum
+from core.logger import log_info, log_warning
+
+
+class FailureKind(str, Enum):
+    """Failure classes used to decide whether and how soon to retry"""
+    NETWORK = "network"  # Timeouts, resets, truncated transfers - retry soon
+    THROTTLED = "throttled"  # HTTP 403/429 - retry, but back off harder
+    UNAVAILABLE = "unavailable"  # Private, removed, region/age locked - never retry
+    POSTPROCESS = "postprocess"  # ffmpeg merge/remux failed - retrying the download won't help
+    NO_SPACE = "no space"  # Larger than the whole disk - never retry
+    UNKNOWN = "unknown"
+
+
+RETRYABLE_KINDS = {FailureKind.NETWORK, FailureKind.THROTTLED, FailureKind.UNKNOWN}
+
+# Checked in order; the first match wins. Only yt-dlp's own wording counts
+# ("HTTP Error 403"), not the engine's "possibly HTTP 403" hints
+_FAILURE_PATTERNS = [
+    (FailureKind.UNAVAILABLE, re.compile(
+        r"video unavailable|private video|has been removed|no longer available|"
+        r"not available in your country|sign in to confirm your age|members-only|"
+        r"copyright|account associated with this video has been terminated|"
+        r"unsupported url|is not a valid url",
+        re.IGNORECASE,
+    )),
+    (FailureKind.NO_SPACE, re.compile(r"larger than the whole volume", re.IGNORECASE)),
+    (FailureKind.THROTTLED, re.compile(
+        r"http error 429|too many requests|http error 403|forbidden|rate.?limit",
+        re.IGNORECASE,
+    )),
+    (FailureKind.POSTPROCESS, re.compile(
+        r"merge failed|ffmpeg|postprocess|conversion failed|muxing",
+        re.IGNORECASE,
+    )),
+    (FailureKind.NETWORK, re.compile(
+        r"timed out|timeout|connection (reset|refused|aborted)|temporary failure in name resolution|"
+        r"network is unreachable|incompleteread|content too short|http error 5\d\d|"
+        r"unable to download|connection lost|no file was created|no complete file",
+        re.IGNORECASE,
+    )),
+]
+
+
+def classify_failure(error_message: str) -> FailureKind:
+    """Map a download error message to a FailureKind"""
+    for kind, pattern in _FAILURE_PATTERNS:
+        if pattern.search(error_message or ""):
+            return kind
+    return FailureKind.UNKNOWN
+
+
+@dataclass
+class FailureRecord:
+    """One item that failed for good, for the end-of-session summary"""
+    title: str
+    kind: FailureKind
+    error_message: str
+    attempts: int
+
+
+class RetryScheduler:
+    """
+    Decide which failures to retry and when.
+
+    Retryable failures get exponential backoff with jitter, so several
+    throttled items don't all come back at the same moment. The caller owns
+    the timer; this class only tracks what is pending and what gave up.
+    """
+
+    BASE_DELAY = {
+        FailureKind.NETWORK: 2.0,
+        FailureKind.THROTTLED: 15.0,
+        FailureKind.POSTPROCESS: 5.0,
+        FailureKind.UNKNOWN: 5.0,
+    }
+    MAX_DELAY = 300.0
+
+    def __init__(self, rng=None):
+        self._rng = rng or random.Random()
+        self._pending = {}  # item.id -> due time (time.monotonic)
+        self.failures: list[FailureRecord] = []
+
+    @property
+    def pending(self) -> int:
+        """Number of retries waiting for their backoff to expire"""
+        return len(self._pending)
+
+    def backoff(self, kind: FailureKind, attempt: int) -> float:
+        """Exponential backoff in seconds for `attempt` (1-based), jittered to 50-100%"""
+        base = self.BASE_DELAY.get(kind, self.BASE_DELAY[FailureKind.UNKNOWN])
+        ceiling = min(self.MAX_DELAY, base * (2 ** max(0, attempt - 1)))
+        return self._rng.uniform(ceiling / 2, ceiling)
+
+    def schedule(self, item, error_message: str, retryable=RETRYABLE_KINDS):
+        """
+        Record a failure for `item`.
+
+        Returns (kind, delay_seconds); delay is None when the item should not
+        be retried, in which case it is added to `failures`. Pipelined merges
+        pass POSTPROCESS in `retryable`: their streams are kept, so a retry
+        only merges again.
+        """
+        kind = classify_failure(error_message)
+        if kind not in retryable or item.retry_count >= item.max_retries:
+            self.give_up(item, kind, error_message)
+            return kind, None
+
+        item.retry_count += 1
+        delay = self.backoff(kind, item.retry_count)
+        self._pending[item.id] = time.monotonic() + delay
+        log_info(
+            f"Retry {item.retry_count}/{item.max_retries} for {item.title} "
+            f"({kind.value}) in {delay:.1f}s"
+        )
+        return kind, delay
+
+    def give_up(self, item, kind: FailureKind, error_message: str):
+        """Record a final failure for the summary"""
+        self._pending.pop(item.id, None)
+        self.failures.append(FailureRecord(item.title, kind, error_message, item.retry_count + 1))
+        log_warning(f"Not retrying {item.title} ({kind.value}): {error_message}")
+
+    def mark_due(self, item) -> bool:
+        """Clear the pending retry for `item`; False if it was cancelled meanwhile"""
+        return self._pending.pop(item.id, None) is not None
+
+    def cancel_all(self):
+        """Drop every pending retry (e.g. when the queue is stopped)"""
+        self._pending.clear()
+
+    def summary(self) -> str:
+        """Human-readable failure summary grouped by kind"""
+        if not self.failures:
+            return ""
+        lines = []
+        for kind in FailureKind:
+            records = [f for f in self.failures if f.kind == kind]
+            if not records:
+                continue
+            lines.append(f"{kind.value.capitalize()} ({len(records)}):")
+            lines.extend(f"  • {r.title} — {r.error_message}" for r in records)
+        return "\n".join(lines)
+
+    def reset(self):
+        """Forget failures and pending retries for a new session"""
+        self._pending.clear()
+        self.failures.clear()
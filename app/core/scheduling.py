@@ -0,0 +1,195 @@
+import heapq
+import itertools
+from collections import deque
+from core.types import ItemStatus
+
+POLICY_FIFO = "fifo"
+POLICY_PRIORITY = "priority"
+POLICY_SHORTEST = "shortest-first"
+POLICY_ROUND_ROBIN = "round-robin"
+
+# Items without a duration are ranked as if they were this long (seconds), so
+# unknown items neither jump the queue nor starve behind every known one
+DEFAULT_DURATION = 600.0
+# Bytes per second used to turn a known size into a duration estimate (~4 Mbit/s)
+ASSUMED_BYTE_RATE = 500_000
+
+
+def estimated_seconds(item) -> float:
+    """Playback length from metadata, else from size, else DEFAULT_DURATION"""
+    if item.duration:
+        return item.duration
+    if item.total_bytes:
+        return item.total_bytes / ASSUMED_BYTE_RATE
+    return DEFAULT_DURATION
+
+
+class KeyedScheduler:
+    """
+    Heap of waiting items ordered by `key(item)`.
+
+    Reordering an item pushes a fresh entry and invalidates the old one, so
+    a move or priority change costs O(log n) instead of reshuffling the queue.
+    """
+
+    name = POLICY_FIFO
+    uses_priority = False  # Whether item.priority changes the order
+
+    def __init__(self):
+        self._heap = []
+        self._entries = {}  # item.id -> live heap entry [*key, seq, item, valid]
+        self._seq = itertools.count()
+
+    def key(self, item):
+        return (item.order,)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def push(self, item):
+        """Schedule `item`, or move it if it is already scheduled"""
+        self.remove(item)
+        # Key fields are spliced into the entry so each item costs one list, not a list and a tuple
+        entry = [*self.key(item), next(self._seq), item, True]
+        self._entries[item.id] = entry
+        heapq.heappush(self._heap, entry)
+
+    def remove(self, item):
+        entry = self._entries.pop(item.id, None)
+        if entry:
+            entry[-1] = False
+
+    def _prune(self):
+        # Drop invalidated entries and items whose status changed behind our back
+        while self._heap and (not self._heap[0][-1] or self._heap[0][-2].status != ItemStatus.WAITING):
+            entry = heapq.heappop(self._heap)
+            if entry[-1]:
+                del self._entries[entry[-2].id]
+
+    def peek(self):
+        self._prune()
+        return self._heap[0][-2] if self._heap else None
+
+    def upcoming(self, count):
+        """The next `count` items in pop order, without popping them; O(count log n)"""
+        # Pop the best entries and push them back rather than scanning the whole heap
+        taken = []
+        while self._heap and len(taken) < count:
+            entry = heapq.heappop(self._heap)
+            if entry[-1] and entry[-2].status == ItemStatus.WAITING:
+                taken.append(entry)
+            elif entry[-1]:
+                del self._entries[entry[-2].id]  # As in _prune
+        for entry in taken:
+            heapq.heappush(self._heap, entry)
+        return [entry[-2] for entry in taken]
+
+    def pop(self):
+        self._prune()
+        if not self._heap:
+            return None
+        entry = heapq.heappop(self._heap)
+        del self._entries[entry[-2].id]
+        return entry[-2]
+
+
+class PriorityScheduler(KeyedScheduler):
+    """Highest priority first, queue order within a priority"""
+
+    name = POLICY_PRIORITY
+    uses_priority = True
+
+    def key(self, item):
+        return (-item.priority, item.order)
+
+
+class ShortestFirstScheduler(KeyedScheduler):
+    """Shortest estimated item first, so many short clips finish before one long video"""
+
+    name = POLICY_SHORTEST
+    uses_priority = True
+
+    def key(self, item):
+        return (-item.priority, estimated_seconds(item), item.order)
+
+
+class RoundRobinScheduler:
+    """Take one item from each parent playlist or channel in turn"""
+
+    name = POLICY_ROUND_ROBIN
+    uses_priority = True  # Within each group
+
+    def __init__(self):
+        self._groups = {}  # group -> PriorityScheduler (priority, then queue order)
+        self._rotation = deque()  # Groups with waiting items, next group first
+        self._group_of = {}  # item.id -> group it was scheduled under
+
+    def __len__(self):
+        return len(self._group_of)
+
+    def push(self, item):
+        self.remove(item)
+        group = item.group or ""
+        if group not in self._groups:
+            self._groups[group] = PriorityScheduler()
+            self._rotation.append(group)
+        self._groups[group].push(item)
+        self._group_of[item.id] = group
+
+    def remove(self, item):
+        group = self._group_of.pop(item.id, None)
+        if group in self._groups:
+            self._groups[group].remove(item)
+
+    def _next_group(self):
+        while self._rotation:
+            group = self._rotation[0]
+            if self._groups[group].peek() is not None:
+                return group
+            # Empty groups leave the rotation; they rejoin on the next push
+            self._rotation.popleft()
+            del self._groups[group]
+        return None
+
+    def peek(self):
+        group = self._next_group()
+        return self._groups[group].peek() if group is not None else None
+
+    def upcoming(self, count):
+        # Replay the rotation over each group's own upcoming items; only the first
+        # `count` groups with waiting items can contribute
+        queues = []
+        for group in self._rotation:
+            items = self._groups[group].upcoming(count)
+            if items:
+                queues.append(deque(items))
+                if len(queues) == count:
+                    break
+        items = []
+        while len(items) < count and any(queues):
+            for queue in queues:
+                if queue and len(items) < count:
+                    items.append(queue.popleft())
+        return items
+
+    def pop(self):
+        group = self._next_group()
+        if group is None:
+            return None
+        item = self._groups[group].pop()
+        self._group_of.pop(item.id, None)
+        self._rotation.rotate(-1)
+        return item
+
+
+SCHEDULERS = {
+    POLICY_FIFO: KeyedScheduler,
+    POLICY_PRIORITY: PriorityScheduler,
+    POLICY_SHORTEST: ShortestFirstScheduler,
+    POLICY_ROUND_ROBIN: RoundRobinScheduler,
+}
+
+
+def make_scheduler(policy: str):
+    """Scheduler for `policy`; unknown names fall back to FIFO"""
+    return SCHEDULERS.get(policy, KeyedScheduler)()
@@ -0,0 +1,227 @@
+import json
+import os
+import threading
+import time
+import yt_dlp
+from yt_dlp.networking import Request
+from core.logger import log_info, log_warning
+
+MIN_SEGMENT_BYTES = 8 * 1024 * 1024  # Smaller files gain nothing from extra connections
+CHUNK = 256 * 1024
+SEGMENT_RETRIES = 5
+REPORT_INTERVAL = 0.5  # Seconds between progress hook calls and state saves
+STATE_SUFFIX = ".segments"  # Resume state next to the .part file
+
+
+class _Segment:
+    __slots__ = ("start", "end", "done")
+
+    def __init__(self, start, end, done=0):
+        self.start = start
+        self.end = end  # Inclusive, as in a Range header
+        self.done = done
+
+    @property
+    def remaining(self) -> int:
+        return self.end - self.start + 1 - self.done
+
+
+class SegmentedDownload:
+    """
+    One progressive (single-URL) file fetched as byte ranges over several connections.
+
+    Each segment writes at its own offset in the preallocated .part file.
+    Finished byte counts are saved to "<file>.part.segments", so a
+    cancelled or failed transfer resumes every segment where it stopped.
+    Progress goes to the same hooks yt-dlp would call.
+    """
+
+    def __init__(self, ydl, url, filename, total, headers, segments, hooks, info):
+        self.ydl = ydl
+        self.url = url
+        self.filename = filename
+        self.tmpfilename = filename + ".part"
+        self.state_file = self.tmpfilename + STATE_SUFFIX
+        self.total = total
+        self.headers = headers
+        self.hooks = hooks
+        self.info = info
+        self.segments = self._load_state() or self._split(segments, self._existing_prefix())
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._errors = []
+
+    def _split(self, count, start=0):
+        """`count` segments over bytes start..total; the first `start` bytes are already done"""
+        done = [_Segment(0, start - 1, start)] if start else []
+        if start >= self.total:
+            return done
+        size = -(-(self.total - start) // count)
+        return done + [_Segment(offset, min(offset + size, self.total) - 1)
+                       for offset in range(start, self.total, size)]
+
+    def _existing_prefix(self) -> int:
+        """Bytes a single-connection attempt left in the .part file; it only ever writes a prefix"""
+        if os.path.exists(self.state_file) or not os.path.exists(self.tmpfilename):
+            return 0  # Our own .part always has a state file (an unusable one means start over)
+        prefix = min(os.path.getsize(self.tmpfilename), self.total)
+        if prefix:
+            log_info(f"Continuing a single-connection .part from byte {prefix}")
+        return prefix
+
+    def _load_state(self):
+        if not (os.path.exists(self.state_file) and os.path.exists(self.tmpfilename)):
+            return None
+        try:
+            with open(self.state_file) as f:
+                state = json.load(f)
+            if state.get("total") != self.total:
+                return None  # A different file now; start over
+            segments = [_Segment(*s) for s in state["segments"]]
+            log_info(f"Resuming {len(segments)} segments at {sum(s.done for s in segments)} of {self.total} bytes")
+            return segments
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            log_warning(f"Ignoring unreadable segment state {self.state_file}: {e}")
+            return None
+
+    def _save_state(self):
+        with self._lock:
+            state = {"total": self.total, "segments": [[s.start, s.end, s.done] for s in self.segments]}
+        temp = self.state_file + ".tmp"
+        with open(temp, "w") as f:
+            json.dump(state, f)
+        os.replace(temp, self.state_file)
+
+    @property
+    def downloaded(self) -> int:
+        with self._lock:
+            return sum(s.done for s in self.segments)
+
+    def _report(self, status, started, start_bytes):
+        downloaded = self.downloaded if status == "downloading" else self.total
+        elapsed = time.monotonic() - started
+        speed = (downloaded - start_bytes) / elapsed if elapsed > 0 else None
+        progress = {
+            "status": status,
+            "filename": self.filename,
+            "tmpfilename": self.tmpfilename,
+            "downloaded_bytes": downloaded,
+            "total_bytes": self.total,
+            "speed": speed,
+            "eta": (self.total - downloaded) / speed if speed else None,
+            "elapsed": elapsed,
+            "info_dict": self.info,
+            "segmented": True,  # Written out of order; the file is not a growing prefix
+        }
+        for hook in self.hooks:
+            hook(progress)
+
+    def _fetch(self, segment):
+        attempt = 0
+        with open(self.tmpfilename, "r+b") as f:
+            while segment.remaining > 0 and not self._stop.is_set():
+                offset = segment.start + segment.done
+                headers = dict(self.headers, Range=f"bytes={offset}-{segment.end}")
+                try:
+                    response = self.ydl.urlopen(Request(self.url, headers=headers))
+                    try:
+                        if response.status != 206:
+                            raise Exception(f"server ignored the range request (HTTP {response.status})")
+                        f.seek(offset)
+                        written = 0
+                        while not self._stop.is_set() and (chunk := response.read(min(CHUNK, segment.remaining))):
+                            f.write(chunk)
+                            written += len(chunk)
+                            with self._lock:
+                                segment.done += len(chunk)
+                    finally:
+                        response.close()
+                    if written:
+                        attempt = 0  # Progress was made; a later drop starts a fresh retry count
+                    elif not self._stop.is_set():
+                        raise Exception("connection closed before any data")
+                except Exception as e:
+                    attempt += 1
+                    # Through yt-dlp's logger, so HTTP 429/403 here reaches the throttle detection
+                    if attempt > SEGMENT_RETRIES:
+                        self.ydl.report_warning(f"Segment at byte {offset} failed ({e}), giving up")
+                        self._errors.append(f"bytes {offset}-{segment.end}: {e}")
+                        self._stop.set()
+                        return
+                    self.ydl.report_warning(f"Segment at byte {offset} failed ({e}), retry {attempt}/{SEGMENT_RETRIES}")
+                    self._stop.wait(min(2 ** attempt, 30))  # A cancel ends the wait
+
+    def run(self):
+        # Full size up front; a single-connection prefix is kept and extended
+        with open(self.tmpfilename, "r+b" if os.path.exists(self.tmpfilename) else "wb") as f:
+            if os.fstat(f.fileno()).st_size < self.total:
+                f.truncate(self.total)
+        self._save_state()  # From here on this .part is never taken for a plain prefix
+        started, start_bytes = time.monotonic(), self.downloaded
+        threads = [
+            threading.Thread(target=self._fetch, args=(segment,), name="vidgrab-segment", daemon=True)
+            for segment in self.segments if segment.remaining > 0
+        ]
+        log_info(f"Segmented download: {len(threads)} connections for {os.path.basename(self.filename)}")
+        for thread in threads:
+            thread.start()
+        try:
+            while any(thread.is_alive() for thread in threads):
+                time.sleep(REPORT_INTERVAL)
+                self._save_state()
+                self._report("downloading", started, start_bytes)
+        finally:
+            # Cancelled by the cancellation hook, or any other hook error: the segment threads
+            # must stop writing, and the state file keeps the progress for resume
+            self._stop.set()
+            for thread in threads:
+                thread.join(2.0)  # A read blocked on a stalled socket must not hold up the stop
+            self._save_state()
+        if self._errors or self.downloaded != self.total:
+            raise Exception(f"Segmented download incomplete: {'; '.join(self._errors) or 'connection closed early'}")
+        os.replace(self.tmpfilename, self.filename)
+        os.remove(self.state_file)
+        self._report("finished", started, start_bytes)
+        return True
+
+
+def probe_range_support(ydl, url, headers) -> int:
+    """Size of the resource if the server answers range requests, else 0"""
+    try:
+        response = ydl.urlopen(Request(url, headers=dict(headers, Range="bytes=0-0")))
+        content_range = response.headers.get("Content-Range", "")
+        response.close()
+        if response.status == 206 and "/" in content_range:
+            total = content_range.rsplit("/", 1)[1]
+            return int(total) if total.isdigit() else 0
+    except Exception as e:
+        log_warning(f"Range probe failed, using a single connection: {e}")
+    return 0
+
+
+class SegmentedYoutubeDL(yt_dlp.YoutubeDL):
+    """YoutubeDL that fetches large progressive http(s) streams over `segments` connections"""
+
+    def __init__(self, params=None, segments=1, **kwargs):
+        super().__init__(params, **kwargs)
+        self.segments = segments
+
+    def dl(self, name, info, subtitle=False, test=False):
+        if (self.segments > 1 and not subtitle and not test and name != "-"
+                and info.get("protocol") in ("http", "https") and info.get("url")):
+            headers = info.get("http_headers") or {}
+            total = probe_range_support(self, info["url"], headers)
+            count = min(self.segments, total // MIN_SEGMENT_BYTES)
+            if count > 1:
+                if os.path.exists(name) and os.path.getsize(name) == total:
+                    log_info(f"Already downloaded: {os.path.basename(name)}")
+                    # As yt-dlp does for a file already on disk, so the app still sees it finish
+                    progress = {"status": "finished", "filename": name, "downloaded_bytes": total,
+                                "total_bytes": total, "info_dict": info}
+                    for hook in self.params.get("progress_hooks", []):
+                        hook(progress)
+                    return True, False
+                download = SegmentedDownload(self, info["url"], name, total, headers, count,
+                                             self.params.get("progress_hooks", []), info)
+                return download.run(), True
+        return super().dl(name, info, subtitle=subtitle, test=test)
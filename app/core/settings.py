@@ -9,11 +9,34 @@ class Settings:
     download_folder: str = str(Path.home() / "Downloads")
     video_quality: str = "best"  # best, 1080p, 720p, 480p, audio-only
     format: str = "mp4"  # mp4, mkv, webm
+    format_policy: str = "quality"  # quality, size-efficient
     auto_start: bool = False  # Auto-start downloads on queue add
     dark_mode: bool = False
+    cancel_mode: str = "keep"  # keep (resume later), discard (delete partial files)
+    pipeline_merges: bool = True  # Merge video+audio in a background pool while the next item downloads
+    staging_folder: str = ""  # Fast local dir for .part files and merges; empty = download folder
+    dedupe_downloads: bool = True  # Link an already downloaded copy of the same video/format instead of downloading
+    schedule_policy: str = "fifo"  # fifo, priority, shortest-first, round-robin
+    download_connections: int = 1  # Byte-range connections per progressive stream; 1 = single connection
+    external_downloader: str = "native"  # native, aria2c (falls back to native when not installed)
+    share_extraction: bool = True  # Keep the title fetch's full extraction for the download instead of extracting twice
+    prefetch_count: int = 2  # Waiting items to extract ahead of time; 0 disables prefetching
+    parallel_downloads: int = 2  # Most items downloading at once per site; lowered while the site throttles
+    transcode_target: str = "none"  # none, mp3, opus, hevc; converts each finished file in the background
+    transcode_cores: str = "auto"  # Concurrent single-threaded ffmpeg jobs; auto = all cores but one
+    diagnostics_mode: bool = False  # Sampling profiler + allocation snapshots to ~/.vidgrab/profiles
     
     QUALITY_OPTIONS = ["best", "1080p", "720p", "480p", "audio-only"]
     FORMAT_OPTIONS = ["mp4", "mkv", "webm"]
+    FORMAT_POLICY_OPTIONS = ["quality", "size-efficient"]
+    CANCEL_MODE_OPTIONS = ["keep", "discard"]
+    SCHEDULE_POLICY_OPTIONS = ["fifo", "priority", "shortest-first", "round-robin"]
+    PREFETCH_COUNT_OPTIONS = ["0", "1", "2", "3", "5"]
+    PARALLEL_DOWNLOADS_OPTIONS = ["1", "2", "3", "4"]
+    DOWNLOAD_CONNECTIONS_OPTIONS = ["1", "2", "4", "8", "16"]
+    EXTERNAL_DOWNLOADER_OPTIONS = ["native", "aria2c"]
+    TRANSCODE_TARGET_OPTIONS = ["none", "mp3", "opus", "hevc"]
+    TRANSCODE_CORES_OPTIONS = ["auto", "1", "2", "4", "8"]
 
 
 class SettingsManager:
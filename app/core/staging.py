@@ -0,0 +1,47 @@
+import os
+import shutil
+from core.logger import log_info, log_warning
+
+
+def same_filesystem(path_a: str, path_b: str) -> bool:
+    """True if both existing paths live on the same device (so rename is atomic)"""
+    try:
+        return os.stat(path_a).st_dev == os.stat(path_b).st_dev
+    except OSError:
+        return False
+
+
+def move_into_place(path: str, dest_dir: str) -> str:
+    """
+    Move a finished file from the staging directory into `dest_dir`.
+
+    Renames when both are on one filesystem. Otherwise copies to a hidden
+    temporary name next to the destination, checks the size and renames it,
+    so the output folder never shows a half-copied file. Returns the new path.
+    """
+    os.makedirs(dest_dir, exist_ok=True)
+    name = os.path.basename(path)
+    dest = os.path.join(dest_dir, name)
+
+    if same_filesystem(path, dest_dir):
+        os.replace(path, dest)
+        log_info(f"Moved into download folder: {name}")
+        return dest
+
+    temp = os.path.join(dest_dir, f".{name}.vidgrab-tmp")
+    try:
+        shutil.copyfile(path, temp)
+        expected, copied = os.path.getsize(path), os.path.getsize(temp)
+        if copied != expected:
+            raise OSError(f"copy of {name} is {copied} bytes, expected {expected}")
+        os.replace(temp, dest)
+    except OSError:
+        if os.path.exists(temp):
+            try:
+                os.remove(temp)
+            except OSError as e:
+                log_warning(f"Could not remove temporary copy {temp}: {e}")
+        raise
+    os.remove(path)
+    log_info(f"Copied into download folder: {name}")
+    return dest
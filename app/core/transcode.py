@@ -0,0 +1,256 @@
+import os
+import shutil
+import sqlite3
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from core.logger import log_info, log_error, log_warning
+
+NICE_LEVEL = 10
+SHUTDOWN_WAIT = 5.0  # Seconds shutdown waits for killed jobs to wind down
+
+# Target -> (output extension, ffmpeg codec arguments). Every job is single-threaded,
+# so the pool size is the number of cores conversions may use.
+PRESETS = {
+    "mp3": ("mp3", ["-vn", "-c:a", "libmp3lame", "-q:a", "2"]),
+    "opus": ("opus", ["-vn", "-c:a", "libopus", "-b:a", "128k"]),
+    "hevc": ("mp4", ["-c:v", "libx265", "-crf", "28", "-preset", "medium", "-x265-params", "pools=1:log-level=error",
+                     "-tag:v", "hvc1", "-c:a", "copy"]),
+}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY,
+    source TEXT NOT NULL,
+    preset TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',  -- pending, running, done, failed
+    output TEXT NOT NULL DEFAULT '',
+    error TEXT NOT NULL DEFAULT '',
+    created_at REAL NOT NULL,
+    finished_at REAL
+);
+CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, id);
+"""
+
+
+def default_cores() -> int:
+    """All cores but one, so downloads and the UI keep a core to themselves"""
+    return max(1, (os.cpu_count() or 2) - 1)
+
+
+def output_path(source: str, preset: str) -> str:
+    root, ext = os.path.splitext(source)
+    target_ext = PRESETS[preset][0]
+    if f".{target_ext}" == ext.lower():
+        return f"{root}.{preset}.{target_ext}"  # Re-encode into the same container
+    return f"{root}.{target_ext}"
+
+
+def low_priority_command(cmd: list[str]) -> list[str]:
+    """Run `cmd` under nice (and idle-class ionice on Linux) where available"""
+    if sys.platform == "win32":
+        return cmd  # Priority is set with creationflags instead
+    prefix = []
+    ionice = shutil.which("ionice")
+    if ionice and sys.platform.startswith("linux"):
+        prefix += [ionice, "-c", "3"]
+    nice = shutil.which("nice")
+    if nice:
+        prefix += [nice, "-n", str(NICE_LEVEL)]
+    return prefix + cmd
+
+
+class TranscodeQueue:
+    """Persistent transcode jobs in ~/.vidgrab/transcode.db; survives restarts"""
+
+    def __init__(self, db_file=None):
+        self.db_file = Path(db_file) if db_file else Path.home() / ".vidgrab" / "transcode.db"
+        self.db_file.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.db_file, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+        self._conn.commit()
+
+    def add(self, source: str, preset: str) -> int:
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                "INSERT INTO jobs (source, preset, created_at) VALUES (?, ?, ?)", (source, preset, time.time())
+            )
+            return cursor.lastrowid
+
+    def requeue_interrupted(self) -> int:
+        """Jobs left running by a previous session start over"""
+        with self._lock, self._conn:
+            return self._conn.execute("UPDATE jobs SET status = 'pending' WHERE status = 'running'").rowcount
+
+    def pending(self) -> list:
+        """Jobs not yet started, oldest first"""
+        with self._lock:
+            return self._conn.execute("SELECT * FROM jobs WHERE status = 'pending' ORDER BY id").fetchall()
+
+    def mark(self, job_id: int, status: str, output: str = "", error: str = ""):
+        finished = time.time() if status in ("done", "failed") else None
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, output = ?, error = ?, finished_at = ? WHERE id = ?",
+                (status, output, error, finished, job_id),
+            )
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class TranscodePool:
+    """
+    Background ffmpeg conversions (mp3/opus audio, HEVC archives).
+
+    Each job is a single-threaded ffmpeg process started at nice 10 and, on
+    Linux, idle I/O priority, so a batch uses up to `cores` cores without
+    slowing downloads or the UI. The pool threads only wait on ffmpeg, and
+    jobs are recorded in the TranscodeQueue before they run, so a batch cut
+    short by closing the app resumes on the next start. A converted file
+    replaces its source, so the source's dedupe entry is dropped.
+    """
+
+    def __init__(self, queue: TranscodeQueue, ffmpeg, cores=None, dedupe_index=None):
+        self.queue = queue
+        self.ffmpeg = ffmpeg
+        self.dedupe_index = dedupe_index
+        self.cores = cores or default_cores()
+        self._executor = ThreadPoolExecutor(max_workers=self.cores, thread_name_prefix="vidgrab-transcode")
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._processes = set()
+        self._futures = set()
+        self._started = set()  # Job IDs handed to the executor by this pool
+        self._closing = False
+        self.stopped = threading.Event()  # Set once shutdown() has begun and every job has ended
+        log_info(f"Transcode pool started with {self.cores} cores")
+
+    @property
+    def pending(self) -> int:
+        with self._lock:
+            return self._pending
+
+    def resume(self, after=None):
+        """
+        Run jobs left pending or interrupted by a previous session.
+
+        `after` is a pool being shut down (e.g. on a cores change): its jobs
+        are requeued only once they have stopped, from a background thread,
+        so a job is never restarted while its old ffmpeg still writes.
+        """
+        if after is None:
+            self._resume()
+            return
+        threading.Thread(target=lambda: (after.stopped.wait(), self._resume()),
+                         name="vidgrab-transcode-resume", daemon=True).start()
+
+    def _resume(self):
+        if self._closing:
+            return
+        requeued = self.queue.requeue_interrupted()
+        jobs = self.queue.pending()
+        if jobs:
+            log_info(f"Resuming {len(jobs)} transcode job(s) ({requeued} interrupted)")
+        for job in jobs:
+            self._start(job["id"], job["source"], job["preset"])
+
+    def submit(self, source: str, preset: str):
+        if preset not in PRESETS:
+            log_warning(f"Unknown transcode target {preset}, skipping {source}")
+            return
+        self._start(self.queue.add(source, preset), source, preset)
+
+    def _start(self, job_id, source, preset):
+        with self._lock:
+            if self._closing or job_id in self._started:
+                return  # Left pending for the next pool, or already submitted here
+            self._started.add(job_id)
+            self._pending += 1
+            future = self._executor.submit(self._run, job_id, source, preset)
+            self._futures.add(future)
+        future.add_done_callback(self._forget_future)
+
+    def _forget_future(self, future):
+        with self._lock:
+            self._futures.discard(future)
+            if self._closing and not self._futures:
+                self.stopped.set()
+
+    def _run(self, job_id, source, preset):
+        output = output_path(source, preset)
+        try:
+            if self._closing:
+                return  # Stays pending in the queue for the next session
+            if not os.path.exists(source):
+                raise FileNotFoundError(f"source file is gone: {source}")
+            self.queue.mark(job_id, "running")
+            self._transcode(source, output, preset)
+            # Marked first: if closing cuts this short, the source is still there to convert again
+            self.queue.mark(job_id, "done", output=output)
+            os.remove(source)
+            if self.dedupe_index:
+                self.dedupe_index.forget(source)
+            log_info(f"Transcoded to {preset}: {os.path.basename(output)}")
+        except Exception as e:
+            if self._closing:
+                return  # Killed by shutdown; requeued on the next start
+            log_error(f"Transcode failed for {source}: {e}")
+            self.queue.mark(job_id, "failed", error=str(e))
+        finally:
+            with self._lock:
+                self._pending -= 1
+
+    def _transcode(self, source, output, preset):
+        root, ext = os.path.splitext(output)
+        temp_output = f"{root}.temp{ext}"
+        cmd = low_priority_command([
+            self.ffmpeg, "-y", "-loglevel", "error", "-nostdin", "-i", source,
+            "-threads", "1", *PRESETS[preset][1], temp_output,
+        ])
+        kwargs = {}
+        if sys.platform == "win32":
+            kwargs["creationflags"] = subprocess.BELOW_NORMAL_PRIORITY_CLASS
+        process = subprocess.Popen(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True, **kwargs)
+        with self._lock:
+            self._processes.add(process)
+            closing = self._closing
+        if closing:
+            process.kill()  # Started after shutdown() killed the others
+        try:
+            _, stderr = process.communicate()
+        finally:
+            with self._lock:
+                self._processes.discard(process)
+        if process.returncode != 0:
+            if os.path.exists(temp_output):
+                os.remove(temp_output)
+            raise RuntimeError(f"ffmpeg exited with {process.returncode}: {stderr.strip()[-500:]}")
+        os.replace(temp_output, output)
+
+    def shutdown(self, wait=True):
+        """
+        Stop running conversions; unfinished jobs resume on the next start.
+
+        With `wait`, waits up to SHUTDOWN_WAIT for the killed jobs to end;
+        otherwise returns at once and `stopped` reports when they have.
+        """
+        with self._lock:
+            self._closing = True
+            processes = list(self._processes)
+        for process in processes:
+            process.kill()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        with self._lock:
+            if not self._futures:
+                self.stopped.set()
+        # Killed jobs end within moments; don't hold the caller beyond that
+        if wait and not self.stopped.wait(SHUTDOWN_WAIT):
+            log_warning(f"Transcode jobs still stopping after {SHUTDOWN_WAIT:.0f}s")
@@ -1,20 +1,108 @@
-from dataclasses import dataclass
+import sys
+import uuid
+from dataclasses import dataclass, field
 from enum import Enum
 
 class ItemStatus(str, Enum):
     """Queue item status states"""
     WAITING = "Waiting"
     DOWNLOADING = "Downloading"
+    PAUSED = "Paused"
+    PROCESSING = "Processing"  # Streams downloaded, merge queued in the post-processing pool
     COMPLETED = "Completed"
     FAILED = "Failed"
     CANCELLED = "Cancelled"
 
-@dataclass
+# Rebuildable URL prefixes, stored as a short code plus the video ID.
+# Codes contain no "/" so they can never collide with a real http(s) URL.
+URL_PREFIXES = (
+    ("yt:", "https://www.youtube.com/watch?v="),
+    ("ytb:", "https://youtu.be/"),
+    ("yts:", "https://www.youtube.com/shorts/"),
+)
+
+
+def compact_url(url: str) -> str:
+    """Short form of `url` (e.g. "yt:dQw4w9WgXcQ"); unknown URLs are kept as-is"""
+    for code, prefix in URL_PREFIXES:
+        if url.startswith(prefix):
+            return code + url[len(prefix):]
+    return url
+
+
+def expand_url(source: str) -> str:
+    """Inverse of compact_url"""
+    for code, prefix in URL_PREFIXES:
+        if source.startswith(code):
+            return prefix + source[len(code):]
+    return source
+
+
+@dataclass(slots=True)
 class QueueItem:
-    url: str
-    title: str
+    """
+    One queue entry, kept small for channel-sized queues.
+
+    Slots drop the per-instance __dict__, the URL is stored in its compact
+    form, and a title equal to the URL is not stored at all. Use from_url()
+    to build one from a full URL.
+    """
+    source: str  # compact_url() of the item URL
+    label: str = ""  # Title, empty until it differs from the URL
     status: ItemStatus = ItemStatus.WAITING
     error_message: str = ""
     retry_count: int = 0
     max_retries: int = 3
     download_type: str = "auto"
+    # Resume state: pinned format (e.g. "401+251") and last known byte offsets
+    format_id: str = ""
+    downloaded_bytes: int = 0
+    total_bytes: int = 0
+    # Scheduling: explicit priority, queue position, metadata estimate, parent playlist/channel
+    priority: int = 0
+    order: float = 0.0
+    duration: float = 0.0
+    group: str = ""
+    # Stable identity for signals, lookups and persistence; rows move, IDs don't
+    id: str = field(default_factory=lambda: uuid.uuid4().hex[:12])
+
+    def __post_init__(self):
+        # Values repeated across thousands of items share one string object
+        self.download_type = sys.intern(self.download_type)
+        self.format_id = sys.intern(self.format_id)
+        self.group = sys.intern(self.group)
+
+    @classmethod
+    def from_url(cls, url: str, title: str = "", **fields) -> "QueueItem":
+        item = cls(source=compact_url(url), **fields)
+        item.title = title
+        return item
+
+    @property
+    def url(self) -> str:
+        return expand_url(self.source)
+
+    @url.setter
+    def url(self, value: str):
+        self.source = compact_url(value)
+
+    @property
+    def title(self) -> str:
+        return self.label or self.url
+
+    @title.setter
+    def title(self, value: str):
+        self.label = "" if value == self.url else value
+
+    @property
+    def progress_percent(self) -> int:
+        """Last known progress from persisted byte offsets"""
+        if not self.total_bytes:
+            return 0
+        return min(100, int(self.downloaded_bytes / self.total_bytes * 100))
+
+    def clear_resume_state(self):
+        """Forget byte offsets and pinned format once the item is done"""
+        self.format_id = ""
+        self.downloaded_bytes = 0
+        self.total_bytes = 0
@@ -1,4 +1,8 @@
+import json
+import os
 import sys
+import time
+from collections import deque
 from typing import Optional
 from PyQt6.QtWidgets import (
     QApplication, QWidget, QVBoxLayout, QLabel, QLineEdit, QPushButton,
@@ -6,12 +10,12 @@ from PyQt6.QtWidgets import (
     QHBoxLayout, QDialog, QSpacerItem, QSizePolicy, QFrame, QMenu, QMainWindow,
     QMenuBar, QRadioButton, QButtonGroup
 )
-from PyQt6.QtCore import QThread, pyqtSignal, Qt, QTimer
+from PyQt6.QtCore import QThread, QObject, pyqtSignal, Qt, QTimer
 from PyQt6.QtGui import QColor, QKeySequence
 
 import subprocess
-from core.engine import DownloadEngine
-from core.hooks import progress_hook_factory
+from core.engine import DownloadEngine, extract_for_download, _resolve_ffmpeg
+from core.hooks import progress_hook_factory, _format_size
 from core.queue import QueueManager
 from core.settings import SettingsManager
 from core.logger import log_error, log_info, log_warning, get_logger
@@ -19,85 +23,211 @@ from core.validators import URLValidator
 from core.queue_persistence import QueuePersistence
 from core.types import ItemStatus
 from core.download_session import DownloadSession
+from core.cancellation import CancellationToken, CancelMode, DownloadCancelled
+from core.postprocess import PostProcessPool
+from core.retry import RetryScheduler, FailureKind, RETRYABLE_KINDS
+from core.concurrency import AdaptiveConcurrency
+from core.hosts import host_for
+from core.dedupe import DedupeIndex
+from core.prefetch import ExtractionCache, Prefetcher
+from core.profiling import SamplingProfiler, env_enabled as profiling_env_enabled
+from core.transcode import TranscodePool, TranscodeQueue, default_cores
+from core.history import HistoryStore, HistoryRecord, TransferStats
+from core.ipc import IpcServer, instance_running, send_request
 from ui.settings_dialog import SettingsDialog
 from ui.splash_screen import show_splash, hide_splash
 from ui.theme import load_stylesheet, Colors
-from ui.notifications import show_notification
+from ui.notifications import NotificationDispatcher
+from ui.watchdog import DIAGNOSTICS_TICK_MS, TICK_MS, LatencyWatchdog
 
 
 # ---------------- Worker Thread ----------------
 class DownloadWorker(QThread):
-    progress = pyqtSignal(int, str)  # percent, detail_string
-    finished_one = pyqtSignal(bool, str)  # success, error_message
-    started_one = pyqtSignal()
+    progress = pyqtSignal(str, int, str)  # item_id, percent, detail_string
+    finished_one = pyqtSignal(str, bool, str)  # item_id, success, error_message
+    started_one = pyqtSignal(str)  # item_id
 
-    def __init__(self, queue_item, output_dir, quality="best", format="mp4"):
+    def __init__(self, queue_item, output_dir, quality="best", format="mp4", cancel_mode="keep",
+                 pipeline_merges=False, format_policy="quality", concurrency=None, staging_dir="",
+                 dedupe_index=None, extraction_cache=None, connections=1, external_downloader="native"):
         super().__init__()
         self.item = queue_item
         self.output_dir = output_dir
         self.quality = quality
         self.format = format
+        self.cancel_mode = cancel_mode
+        self.pipeline_merges = pipeline_merges
+        self.merge_job = None  # Set when the merge is left to the post-processing pool
+        self.format_policy = format_policy
+        self.concurrency = concurrency
+        self.staging_dir = staging_dir
+        self.dedupe_index = dedupe_index
+        self.extraction_cache = extraction_cache
+        self.connections = connections
+        self.external_downloader = external_downloader
+        self.bytes_saved = 0  # Bytes avoided by the size-efficient format policy
+        self.stats = TransferStats()  # Bytes and speeds for the download history
+        self.started_at = 0.0
+        self.finished_at = 0.0
+        self.format_id = ""  # Format actually downloaded, kept after resume state is cleared
+        self.final_files = []  # Finished output files, handed to the transcode stage
+        self.cancel_token = CancellationToken()
         self._is_running = True
         self.error_message = ""
 
     def run(self):
         def on_progress(percent, detail=""):
             if self._is_running:
-                self.progress.emit(percent, detail)
+                self.progress.emit(self.item.id, percent, detail)
 
         def on_done(filename):
             pass
 
         engine = DownloadEngine(
             self.output_dir,
-            hooks=[progress_hook_factory(on_progress, on_done)],
+            hooks=[progress_hook_factory(on_progress, on_done), self.stats],
             quality=self.quality,
-            format=self.format
+            format=self.format,
+            cancel_token=self.cancel_token,
+            cancel_mode=self.cancel_mode,
+            format_id=self.item.format_id or None,
+            pipeline_merges=self.pipeline_merges,
+            format_policy=self.format_policy,
+            concurrency=self.concurrency,
+            on_disk_wait=lambda message: on_progress(0, message),
+            staging_dir=self.staging_dir or None,
+            dedupe_index=self.dedupe_index,
+            extraction_cache=self.extraction_cache,
+            connections=self.connections,
+            external_downloader=self.external_downloader,
         )
 
+        self.started_at = time.time()
         try:
             self.item.status = ItemStatus.DOWNLOADING
-            self.started_one.emit()
+            self.started_one.emit(self.item.id)
             log_info(f"Starting download: {self.item.url}")
             
             # Check if we should stop before starting
             if not self._is_running:
                 self.item.status = ItemStatus.CANCELLED
-                self.finished_one.emit(False, "Download cancelled by user")
+                self.finished_one.emit(self.item.id, False, "Download cancelled by user")
                 return
             
-            engine.download(self.item.url)
+            try:
+                engine.download(self.item.url)
+            finally:
+                self._save_resume_state(engine)
+                self.bytes_saved = engine.bytes_saved
+                self.format_id = engine.pinned_format_id or self.item.format_id
+                self.final_files = engine.final_files
+                self.finished_at = time.time()
             
             # Check again after download completes
-            if self._is_running:
+            if self._is_running and engine.pending_merge:
+                self.merge_job = engine.pending_merge
+                self.merge_job.context = self.item
+                self.item.status = ItemStatus.PROCESSING
+                log_info(f"Download finished, merge pending: {self.item.title}")
+                self.finished_one.emit(self.item.id, True, "")
+            elif self._is_running:
                 self.item.status = ItemStatus.COMPLETED
+                self.item.clear_resume_state()
                 log_info(f"Download completed: {self.item.title}")
-                self.finished_one.emit(True, "")
+                self.finished_one.emit(self.item.id, True, "")
             else:
                 self.item.status = ItemStatus.CANCELLED
-                self.finished_one.emit(False, "Download cancelled by user")
+                self.finished_one.emit(self.item.id, False, "Download cancelled by user")
+        except DownloadCancelled:
+            self._report_stopped()
         except Exception as e:
             error_msg = f"Download failed: {str(e)}"
             log_error(f"Error downloading {self.item.url}: {str(e)}", exc_info=True)
             if self._is_running:
                 self.item.status = ItemStatus.FAILED
                 self.error_message = error_msg
-                self.finished_one.emit(False, error_msg)
+                self.finished_one.emit(self.item.id, False, error_msg)
+            else:
+                # Stopped meanwhile; the GUI still needs to hear that this item ended
+                self._report_stopped()
+
+    def _report_stopped(self):
+        """Report the item as paused or cancelled after pause()/stop()"""
+        if self.cancel_token.paused:
+            self.item.status = ItemStatus.PAUSED
+            log_info(f"Download paused at {self.item.downloaded_bytes} bytes: {self.item.title}")
+            self.finished_one.emit(self.item.id, False, "Download paused")
+            return
+        self.item.status = ItemStatus.CANCELLED
+        log_info(f"Download aborted {self.cancel_token.elapsed_ms():.0f} ms after stop: {self.item.title}")
+        self.finished_one.emit(self.item.id, False, "Download cancelled by user")
+
+    def _save_resume_state(self, engine):
+        """Copy pinned format and byte offsets onto the queue item for persistence"""
+        state = engine.resume_state
+        if state["format_ids"]:
+            self.item.format_id = engine.pinned_format_id
+            self.item.downloaded_bytes = state["downloaded_bytes"]
+            self.item.total_bytes = state["total_bytes"]
 
     def stop(self):
-        """Signal the worker to stop"""
+        """Signal the worker to stop; the next progress hook aborts the transfer"""
+        self._is_running = False
+        self.cancel_token.cancel()
+
+    def pause(self):
+        """Abort the transfer but keep partial files so it can resume later"""
         self._is_running = False
+        self.cancel_token.cancel(pause=True)
+
+    def stop_and_wait(self, timeout_ms=5000, pause=False):
+        """Cancel and block until the thread exits, terminating it as a last resort"""
+        if pause:
+            self.pause()
+        else:
+            self.stop()
+        if not self.wait(timeout_ms):
+            log_warning(f"Worker did not stop within {timeout_ms} ms, terminating")
+            self.terminate()
+            self.wait()
+        log_info(f"Stop to idle: {self.cancel_token.elapsed_ms():.0f} ms")
+
+
+# ---------------- Post-processing Bridge ----------------
+class MergeBridge(QObject):
+    """Delivers post-processing pool results to the GUI thread"""
+    merge_finished = pyqtSignal(object, bool, str)  # MergeJob, success, error_message
 
 
 # ---------------- Metadata Worker ----------------
 class MetadataWorker(QThread):
-    title_fetched = pyqtSignal(str)
+    title_fetched = pyqtSignal(str, float, str)  # title, duration (s), group for round-robin
 
-    def __init__(self, url):
+    def __init__(self, url, extraction_cache=None):
         super().__init__()
         self.url = url
+        # When set, single videos get the download's own extraction, stored for the engine to reuse;
+        # the caller has reserved the URL in the cache
+        self.extraction_cache = extraction_cache
+
+    def _run_shared(self) -> bool:
+        """Full (unprocessed) extraction kept for the download; False to fall back to a title-only fetch"""
+        try:
+            ie_result = extract_for_download(self.url)
+        except Exception:
+            ie_result = None
+        if not ie_result:
+            self.extraction_cache.release(self.url)  # Reserved by the window before starting
+            return False
+        expiry = self.extraction_cache.put(self.url, ie_result)
+        log_info(f"Stored extraction for download, valid {(expiry - time.time()) / 60:.0f} min: {self.url}")
+        group = ie_result.get("playlist_id") or ie_result.get("channel_id") or ""
+        self.title_fetched.emit(ie_result.get("title") or self.url, float(ie_result.get("duration") or 0), group)
+        return True
 
     def run(self):
+        if self.extraction_cache is not None and self._run_shared():
+            return
         try:
             import yt_dlp
             ydl_opts = {
@@ -108,14 +238,21 @@ class MetadataWorker(QThread):
             with yt_dlp.YoutubeDL(ydl_opts) as ydl:
                 info = ydl.extract_info(self.url, download=False)
                 title = info.get("title", self.url)
-                self.title_fetched.emit(title)
+                if info.get("_type") == "playlist":
+                    entries = info.get("entries") or []
+                    duration = sum((e or {}).get("duration") or 0 for e in entries)
+                    group = info.get("id") or ""
+                else:
+                    duration = info.get("duration") or 0
+                    group = info.get("playlist_id") or info.get("channel_id") or ""
+                self.title_fetched.emit(title, float(duration), group)
         except Exception:
-            self.title_fetched.emit(self.url)
+            self.title_fetched.emit(self.url, 0.0, "")
 
 
 # ---------------- Main GUI ----------------
 class YouTubeDownloader(QMainWindow):
-    def __init__(self):
+    def __init__(self, ipc_server=None):
         super().__init__()
         self.setWindowTitle("VidGrab")
         self.setMinimumSize(700, 550)
@@ -134,14 +271,68 @@ class YouTubeDownloader(QMainWindow):
         self.settings = self.settings_manager.get()
         self.queue_persistence = QueuePersistence()
 
-        self.queue = QueueManager()
+        self.queue = QueueManager(policy=self.settings.schedule_policy)
         
         # Load saved queue if exists
         self.queue_persistence.load_queue(self.queue)
         
         # Initialize download session (None when not downloading)
         self.session: Optional[DownloadSession] = None
+        
+        # Per-host fragment/item limits, lowered on throttling and raised when healthy
+        self.concurrency = AdaptiveConcurrency(max_items=self.settings.parallel_downloads)
+        
+        # Failed items wait out their backoff here while the rest of the queue runs
+        self.retry_scheduler = RetryScheduler()
+        self._summary_box = None
+        
+        # ffmpeg merges run here so the download slot moves on to the next item
+        self.postprocess_pool = PostProcessPool()
+        self.merge_bridge = MergeBridge()
+        # Merges submitted but not yet handled by on_merge_finished; counted on the GUI thread,
+        # since the pool's own count drops before the result signal is delivered
+        self._merges_in_flight = 0
+        
+        # Per-item timings, sizes and speeds for throughput analysis
+        self.history = HistoryStore()
+        self._pending_history = {}  # item.id -> HistoryRecord waiting for its merge
+        self._list_items = {}  # item.id -> QListWidgetItem showing it
+        
+        # Scripts and second launches enqueue through this instance
+        self._live_progress = {}  # item.id -> percent, for items downloading right now
+        if ipc_server is None:
+            ipc_server = IpcServer()
+            ipc_server.listen()
+        self.ipc_server = ipc_server
+        self.ipc_server.setParent(self)
+        self.ipc_server.set_handler(self.handle_api_request)
+        
+        # Desktop notifications are sent and coalesced off the GUI thread
+        self.notifier = NotificationDispatcher()
+        
+        # Finished files by video and format, so other folders can link instead of downloading
+        self.dedupe_index = DedupeIndex()
+        
+        # Upcoming items are extracted while the current one downloads
+        self.extraction_cache = ExtractionCache()
+        self.prefetcher = Prefetcher(self.extraction_cache, extract_for_download)
+        self.merge_bridge.merge_finished.connect(self.on_merge_finished)
+        
+        # Finished files are converted in the background; jobs persist across restarts
+        self.transcode_queue = TranscodeQueue()
+        self.transcode_pool = None
+        self._apply_transcode()
+        
+        # Event-loop lag histogram and stacks of calls that block the GUI thread
+        self.latency_watchdog = LatencyWatchdog(self)
+        self.latency_watchdog.start()
+        
+        # Diagnostics mode: Settings checkbox or VIDGRAB_PROFILE=1
+        self.profiler = None
+        self._apply_diagnostics()
         self.metadata_workers = []  # Track active metadata workers
+        self._live_workers = set()  # Download workers whose thread has not exited yet
+        self._pending_metadata = deque()  # Item IDs waiting for a metadata worker
 
         # URL input section
         url_label = QLabel("YouTube URL")
@@ -363,6 +554,12 @@ class YouTubeDownloader(QMainWindow):
             elif item.status == ItemStatus.CANCELLED:
                 color = QColor(Colors.STATUS_CANCELLED)
                 icon = "⏹️"
+            elif item.status == ItemStatus.PAUSED:
+                color = QColor(Colors.STATUS_PAUSED)
+                icon = "⏸️"
+            elif item.status == ItemStatus.PROCESSING:
+                color = QColor(Colors.STATUS_PROCESSING)
+                icon = "⚙️"
             else:  # Waiting, Downloading
                 color = QColor(Colors.STATUS_WAITING)
                 icon = "⏳"
@@ -370,31 +567,18 @@ class YouTubeDownloader(QMainWindow):
             type_suffix = f" ({type_label})" if type_label else ""
             list_item = QListWidgetItem(f"{icon} {item.status.value}{type_suffix}: {item.title}")
             list_item.setForeground(color)
-            self.list_widget.addItem(list_item)
+            self._add_list_item(item.id, list_item)
         self._refresh_queue_counter()
 
-    def closeEvent(self, event):
-        """Clean up threads and save state before closing"""
-        # Stop all metadata workers with timeout
-        for worker in self.metadata_workers:
-            if worker.isRunning():
-                worker.quit()
-                if not worker.wait(2000):  # 2 second timeout
-                    worker.terminate()
-                    worker.wait()
-        
-        # Stop the current download worker with timeout
-        if self.session and self.session.current_worker and self.session.current_worker.isRunning():
-            self.session.current_worker.stop()
-            if not self.session.current_worker.wait(5000):  # 5 second timeout
-                self.session.current_worker.terminate()
-                self.session.current_worker.wait()
-        
-        # Save queue before closing
-        self.queue_persistence.save_queue(self.queue)
-        log_info("Application closed")
-        
-        event.accept()
+    def _interrupt_for_shutdown(self):
+        """Pause the running downloads and requeue them so they resume after restart"""
+        workers = self.session.active_workers if self.session else []
+        for worker in workers:
+            worker.pause()  # Signal all first so they wind down together
+        for worker in workers:
+            worker.stop_and_wait(5000, pause=True)
+            if worker.item.status in (ItemStatus.PAUSED, ItemStatus.DOWNLOADING):
+                self.queue.mark_waiting(worker.item)
 
     # ---------------- Queue Management ----------------
     def clear_queue(self):
@@ -411,9 +595,9 @@ class YouTubeDownloader(QMainWindow):
         )
         
         if reply == QMessageBox.StandardButton.Yes:
-            self.queue.queue.clear()
-            self.queue.current_index = -1
+            self.queue.clear()
             self.list_widget.clear()
+            self._list_items.clear()
             self.queue_persistence.clear_saved_queue()
             self.status_label.setText("Queue cleared")
             log_info("Queue cleared by user")
@@ -428,6 +612,54 @@ class YouTubeDownloader(QMainWindow):
             self.settings = self.settings_manager.get()
             self.output_dir = self.settings.download_folder
             self.folder_label.setText(f"Download folder: {self.output_dir}")
+            self.queue.set_policy(self.settings.schedule_policy)
+            self.concurrency.max_items = self.settings.parallel_downloads
+            self._apply_diagnostics()
+            self._apply_transcode()
+            if self.session and self.session.is_running:
+                self.start_next_download()  # A higher limit takes effect right away
+
+    def _apply_diagnostics(self):
+        """Start or stop the sampling profiler to match settings and the environment"""
+        wanted = self.settings.diagnostics_mode or profiling_env_enabled()
+        # Stalls are caught either way; fine-grained lag sampling only while diagnosing
+        self.latency_watchdog.set_tick_ms(DIAGNOSTICS_TICK_MS if wanted else TICK_MS)
+        if wanted and not self.profiler:
+            self.profiler = SamplingProfiler()
+            self.profiler.start()
+        elif not wanted and self.profiler:
+            self.profiler.stop()
+            self.profiler = None
+
+    def _apply_transcode(self):
+        """Start the transcode pool when conversions are enabled or left over, sized by settings"""
+        cores = default_cores() if self.settings.transcode_cores == "auto" else int(self.settings.transcode_cores)
+        if self.transcode_pool and self.transcode_pool.cores == cores:
+            return
+        old_pool = self.transcode_pool
+        if old_pool:
+            # Don't wait on the GUI thread; the new pool picks up interrupted jobs once these have stopped
+            old_pool.shutdown(wait=False)
+            self.transcode_pool = None
+        if self.settings.transcode_target == "none" and not self.transcode_queue.pending():
+            return
+        ffmpeg = _resolve_ffmpeg()
+        if not ffmpeg:
+            log_warning("ffmpeg not found; finished files will not be converted")
+            return
+        self.transcode_pool = TranscodePool(self.transcode_queue, ffmpeg, cores, dedupe_index=self.dedupe_index)
+        self.transcode_pool.resume(after=old_pool)
+
+    def _transcode(self, paths):
+        """Queue conversion of finished files to the configured target"""
+        if self.settings.transcode_target == "none":
+            return
+        self._apply_transcode()
+        if not self.transcode_pool:
+            return
+        for path in paths:
+            if os.path.exists(path):
+                self.transcode_pool.submit(path, self.settings.transcode_target)
 
     def view_logs(self):
         """Open log file in default text editor"""
@@ -488,35 +720,154 @@ class YouTubeDownloader(QMainWindow):
             return
 
         log_info(f"Adding URL to queue: {url}")
+        self._append_to_queue(url, download_type)
+        self.url_input.clear()
+        self._refresh_queue_counter()
 
+    def _append_to_queue(self, url, download_type, fetch_title=True):
+        """Add a validated URL to the queue and the list widget"""
         # Temporarily use URL as title until metadata is fetched
-        item_index = self.list_widget.count()
-        self.queue.add(url, url, download_type=download_type)
+        queue_item = self.queue.add(url, url, download_type=download_type)
         type_label = self._format_type_label(download_type)
         type_suffix = f" ({type_label})" if type_label else ""
-        list_item = QListWidgetItem(f"⏳ Waiting{type_suffix}: Fetching title...")
+        list_item = QListWidgetItem(f"⏳ Waiting{type_suffix}: " + ("Fetching title..." if fetch_title else url))
         list_item.setForeground(QColor(Colors.STATUS_WAITING))
-        self.list_widget.addItem(list_item)
+        self._add_list_item(queue_item.id, list_item)
+        if not fetch_title:
+            return
 
-        # Fetch metadata in background
-        worker = MetadataWorker(url)
-        worker.title_fetched.connect(
-            lambda title, row=item_index, w=worker: self.on_title_ready(row, title, w)
-        )
-        self.metadata_workers.append(worker)
-        worker.start()
-        self.url_input.clear()
+        # Fetch metadata in background, a few items at a time
+        self._pending_metadata.append(queue_item.id)
+        self._start_metadata_workers()
+
+    # Metadata threads running at once; later items wait for a free one
+    METADATA_THREADS = 4
+
+    def _start_metadata_workers(self):
+        """Start metadata workers for waiting items while fewer than METADATA_THREADS run"""
+        shared_ids = None
+        while self._pending_metadata and len(self.metadata_workers) < self.METADATA_THREADS:
+            queue_item = self.queue.get(self._pending_metadata.popleft())
+            if queue_item is None:
+                continue  # Removed before its title was fetched
+            if shared_ids is None:
+                upcoming = self._update_extraction_schedule()
+                shared_ids = {item.id for item in upcoming[:max(1, self.settings.prefetch_count)]}
+            url = queue_item.url
+            # Single videos about to download are fully extracted now so the download skips its
+            # own extraction; items further back only get their title (the prefetcher covers them later)
+            share = (self.settings.share_extraction and queue_item.id in shared_ids and "list=" not in url
+                     and URLValidator.matches_type(url, "video")[0]
+                     and queue_item.download_type in ("auto", "video")
+                     and self.extraction_cache.reserve(url))
+            worker = MetadataWorker(url, extraction_cache=self.extraction_cache if share else None)
+            worker.title_fetched.connect(
+                lambda title, duration, group, item_id=queue_item.id, w=worker: self.on_title_ready(item_id, title, duration, group, w)
+            )
+            self.metadata_workers.append(worker)
+            worker.start()
+
+    # ---------------- Local API ----------------
+    # Larger batches keep the URL as title instead of starting one metadata thread per URL
+    API_TITLE_FETCH_LIMIT = 20
+
+    def handle_api_request(self, request: dict) -> dict:
+        """Serve a request from the local API (see core.ipc.IpcServer)"""
+        cmd = request.get("cmd")
+        if cmd == "enqueue":
+            return self._api_enqueue(request)
+        if cmd == "status":
+            return self._api_status()
+        if cmd == "activate":
+            self.showNormal()
+            self.raise_()
+            self.activateWindow()
+            return {"ok": True}
+        return {"ok": False, "error": f"unknown command: {cmd}"}
+
+    def _api_enqueue(self, request: dict) -> dict:
+        urls = request.get("urls") or []
+        if not isinstance(urls, list):
+            # A bare string would otherwise be enqueued one character at a time
+            return {"ok": False, "error": "urls must be a list of URL strings"}
+        download_type = request.get("type", "auto")
+        known = {item.url.strip().lower() for item in self.queue.queue}
+        fetch_titles = len(urls) <= self.API_TITLE_FETCH_LIMIT
+        added, rejected = 0, []
+        self.list_widget.setUpdatesEnabled(False)
+        try:
+            for url in urls:
+                url = str(url).strip()
+                is_valid, error_msg = URLValidator.is_valid_youtube_url(url)
+                if is_valid:
+                    is_valid, error_msg = URLValidator.matches_type(url, download_type)
+                if not is_valid:
+                    rejected.append({"url": url, "error": error_msg})
+                    continue
+                if url.lower() in known:
+                    rejected.append({"url": url, "error": "already in queue"})
+                    continue
+                known.add(url.lower())
+                self._append_to_queue(url, download_type, fetch_title=fetch_titles)
+                added += 1
+        finally:
+            self.list_widget.setUpdatesEnabled(True)
+        log_info(f"Local API enqueued {added} URL(s), rejected {len(rejected)}")
         self._refresh_queue_counter()
 
-    def on_title_ready(self, row, title, worker):
-        self.queue.queue[row].title = title
-        type_label = self._format_type_label(self.queue.queue[row].download_type)
-        type_suffix = f" ({type_label})" if type_label else ""
-        self.list_widget.item(row).setText(f"⏳ Waiting{type_suffix}: {title}")
+        if added and self.session and self.session.is_running:
+            self.session.total_items = len(self.queue.queue)
+            self.start_next_download()
+        elif added and request.get("start"):
+            self.start_queue()
+        return {"ok": True, "added": added, "rejected": rejected}
+
+    def _api_status(self) -> dict:
+        running = bool(self.session and self.session.is_running)
+        items = []
+        for item in self.queue:
+            progress = item.progress_percent
+            if running and item.id in self._live_progress:
+                progress = self._live_progress[item.id]
+            items.append({
+                "id": item.id,
+                "url": item.url,
+                "title": item.title,
+                "status": item.status.value,
+                "progress": progress,
+                "error": item.error_message,
+            })
+        return {
+            "ok": True,
+            "session": {
+                "running": running,
+                "total": self.session.total_items if self.session else 0,
+                "completed": self.session.completed_items if self.session else 0,
+                "percent": self.session.progress_percent if self.session else 0,
+                "pending_merges": self._merges_in_flight,
+                "pending_transcodes": self.transcode_pool.pending if self.transcode_pool else 0,
+                "pending_retries": self.retry_scheduler.pending,
+            },
+            "ui_latency": self.latency_watchdog.metrics(),
+            "items": items,
+        }
+
+    def on_title_ready(self, item_id, title, duration, group, worker):
         # Wait for thread to finish and remove it
         worker.wait()
         if worker in self.metadata_workers:
             self.metadata_workers.remove(worker)
+        self._start_metadata_workers()
+        queue_item = self.queue.get(item_id)
+        if queue_item is None:
+            return  # Removed while the title was being fetched
+        queue_item.title = title
+        # Metadata feeds the shortest-first and round-robin policies
+        queue_item.duration = duration
+        queue_item.group = sys.intern(group)
+        self.queue.reschedule(queue_item)
+        if queue_item.status == ItemStatus.WAITING:
+            self.set_item_status(item_id, ItemStatus.WAITING)
         self._refresh_queue_counter()
 
     def _format_type_label(self, download_type: str) -> str:
@@ -539,12 +890,13 @@ class YouTubeDownloader(QMainWindow):
 
     def _refresh_queue_counter(self):
         total = len(self.queue.queue)
-        remaining = len([i for i in self.queue.queue if i.status in (ItemStatus.WAITING, ItemStatus.DOWNLOADING)])
+        remaining = len([i for i in self.queue.queue if i.status in (ItemStatus.WAITING, ItemStatus.DOWNLOADING, ItemStatus.PROCESSING)])
         completed = len([i for i in self.queue.queue if i.status == ItemStatus.COMPLETED])
         failed = len([i for i in self.queue.queue if i.status == ItemStatus.FAILED])
         cancelled = len([i for i in self.queue.queue if i.status == ItemStatus.CANCELLED])
+        paused = len([i for i in self.queue.queue if i.status == ItemStatus.PAUSED])
         self.queue_counter.setText(
-            f"Queue: {total} • Remaining: {remaining} • Completed: {completed} • Failed: {failed} • Cancelled: {cancelled}"
+            f"Queue: {total} • Remaining: {remaining} • Completed: {completed} • Failed: {failed} • Cancelled: {cancelled} • Paused: {paused}"
         )
 
     # ---------------- Queue Processing ----------------
@@ -552,6 +904,12 @@ class YouTubeDownloader(QMainWindow):
         if not self.output_dir:
             QMessageBox.warning(self, "Missing folder", "Please choose a download folder first")
             return
+        if self.settings.cancel_mode == CancelMode.KEEP.value:
+            # Items stopped mid-download kept their .part files; Start continues them
+            for queue_item in self.queue:
+                if queue_item.status == ItemStatus.CANCELLED:
+                    self.queue.requeue(queue_item)
+                    self.set_item_status(queue_item.id, ItemStatus.WAITING)
         if not self.queue.has_next():
             QMessageBox.information(self, "Queue empty", "Please add at least one URL to the queue")
             return
@@ -565,39 +923,78 @@ class YouTubeDownloader(QMainWindow):
         self.start_next_download()
 
     def start_next_download(self):
-        item = self.queue.next_item()
-        if not item:
-            self.status_label.setText("All downloads completed")
-            self.progress_bar.setValue(100)
-            self.start_btn.setEnabled(True)
-            if self.session:
-                self.session.reset()
-            self.playlist_counter_label.setText("")
-            self._refresh_queue_counter()
+        """Start waiting items, in schedule order, while their host has a free download slot"""
+        if not self.session or not self.session.is_running:
             return
-
-        index = self.queue.current_index + 1
-        if self.session:
-            self.status_label.setText(f"Downloading {index} of {self.session.total_items}")
-            self.progress_bar.setValue(self.session.progress_percent)
+        while True:
+            upcoming = self.queue.upcoming(1)
+            if not upcoming:
+                if not self.session.workers:
+                    self._maybe_finish_session()
+                break
+            host = host_for(upcoming[0].url)
+            if self.session.active_on(host) >= self.concurrency.items(host):
+                break  # The next item waits for a slot; later items don't overtake it
+            self._start_worker(self.queue.next_item())
+        self._prefetch_upcoming()
+
+    def _start_worker(self, item):
+        index = self.session.completed_items + len(self.session.workers) + 1
+        self.status_label.setText(f"Downloading {index} of {self.session.total_items}")
+        self.progress_bar.setValue(self.session.progress_percent)
 
         worker = DownloadWorker(
             item,
             self.output_dir,
             quality=self.settings.video_quality,
-            format=self.settings.format
+            format=self.settings.format,
+            cancel_mode=self.settings.cancel_mode,
+            pipeline_merges=self.settings.pipeline_merges,
+            format_policy=self.settings.format_policy,
+            concurrency=self.concurrency,
+            staging_dir=self.settings.staging_folder,
+            dedupe_index=self.dedupe_index if self.settings.dedupe_downloads else None,
+            extraction_cache=self.extraction_cache,
+            connections=self.settings.download_connections,
+            external_downloader=self.settings.external_downloader,
         )
-        if self.session:
-            self.session.current_worker = worker
+        self.session.workers[item.id] = worker
         
-        worker.progress.connect(lambda p, d, row=self.queue.current_index: self.update_item_progress(row, p, d))
-        worker.started_one.connect(lambda row=self.queue.current_index: self.set_item_status(row, ItemStatus.DOWNLOADING))
+        worker.progress.connect(self.update_item_progress)
+        worker.started_one.connect(lambda item_id: self.set_item_status(item_id, ItemStatus.DOWNLOADING))
         worker.finished_one.connect(self.on_item_finished)
+        worker.finished.connect(lambda w=worker: self._on_worker_exited(w))
+        self._live_workers.add(worker)  # A QThread must outlive its thread
         worker.start()
 
-    def set_item_status(self, row, status, error_msg=""):
-        item = self.list_widget.item(row)
-        queue_item = self.queue.queue[row]
+    def _on_worker_exited(self, worker):
+        """A download thread ended; after Stop this is the moment the queue is idle"""
+        self._live_workers.discard(worker)
+        if worker.cancel_token.is_cancelled:
+            log_info(f"Stop to idle: {worker.cancel_token.elapsed_ms():.0f} ms")
+
+    def _prefetch_upcoming(self):
+        """Extract the next few waiting single videos in the background"""
+        upcoming = self._update_extraction_schedule()[:self.settings.prefetch_count]
+        self.prefetcher.schedule([item for item in upcoming if item.download_type in ("auto", "video")])
+
+    def _update_extraction_schedule(self):
+        """Pass the download order to the extraction cache; returns the upcoming items"""
+        upcoming = self.queue.upcoming(self.extraction_cache.max_entries)
+        self.extraction_cache.set_schedule([item.url for item in upcoming])
+        return upcoming
+
+    def _add_list_item(self, item_id, list_item):
+        """Append a row for a queue item; rows are found by ID, never by position"""
+        list_item.setData(Qt.ItemDataRole.UserRole, item_id)
+        self._list_items[item_id] = list_item
+        self.list_widget.addItem(list_item)
+
+    def set_item_status(self, item_id, status, error_msg=""):
+        item = self._list_items.get(item_id)
+        queue_item = self.queue.get(item_id)
+        if item is None or queue_item is None:
+            return  # Removed from the queue meanwhile
         title = queue_item.title
         
         if status == ItemStatus.DOWNLOADING:
@@ -614,10 +1011,25 @@ class YouTubeDownloader(QMainWindow):
         elif status == ItemStatus.CANCELLED:
             item.setText(f"⏹️ {title}")
             item.setForeground(QColor(Colors.STATUS_CANCELLED))
+        elif status == ItemStatus.PROCESSING:
+            item.setText(f"⚙️ Merging: {title}")
+            item.setForeground(QColor(Colors.STATUS_PROCESSING))
+        elif status == ItemStatus.PAUSED:
+            percent_text = f" ({queue_item.progress_percent}%)" if queue_item.total_bytes else ""
+            item.setText(f"⏸️ Paused{percent_text}: {title}")
+            item.setForeground(QColor(Colors.STATUS_PAUSED))
+        elif status == ItemStatus.WAITING:
+            type_label = self._format_type_label(queue_item.download_type)
+            type_suffix = f" ({type_label})" if type_label else ""
+            item.setText(f"⏳ Waiting{type_suffix}: {title}")
+            item.setForeground(QColor(Colors.STATUS_WAITING))
 
-    def update_item_progress(self, row, percent, detail=""):
-        item = self.list_widget.item(row)
-        title = self.queue.queue[row].title
+    def update_item_progress(self, item_id, percent, detail=""):
+        item = self._list_items.get(item_id)
+        queue_item = self.queue.get(item_id)
+        if item is None or queue_item is None:
+            return
+        title = queue_item.title
         detail_text = detail or ""
         playlist_text = ""
         if "• Item " in detail_text:
@@ -626,93 +1038,244 @@ class YouTubeDownloader(QMainWindow):
             playlist_text = f"Item {parts[1].strip()}"
 
         self.playlist_counter_label.setText(playlist_text)
+        self._live_progress[item_id] = percent
         detail_str = f" — {detail_text}" if detail_text else ""
         item.setText(f"▶️ {title} ({percent}%){detail_str}")
-        # Update main progress bar with current download percentage
-        self.progress_bar.setValue(percent)
+        # The main bar follows a lone download; with several it shows the batch
+        if self.session and len(self.session.workers) > 1:
+            self.progress_bar.setValue(self.session.progress_percent)
+        else:
+            self.progress_bar.setValue(percent)
 
-    def on_item_finished(self, success, error_msg=""):
-        row = self.queue.current_index
-        queue_item = self.queue.queue[row]
+    def on_item_finished(self, item_id, success, error_msg=""):
+        worker = self.session.workers.pop(item_id, None) if self.session else None
+        self._live_progress.pop(item_id, None)
+        queue_item = worker.item if worker else self.queue.get(item_id)
+        if queue_item is None:
+            return
+        if success and worker:
+            self.session.add_bytes_saved(worker.bytes_saved)
         
-        if success:
+        if queue_item.status == ItemStatus.CANCELLED:
+            # User stopped the queue; don't count this as a failure or retry it
+            self._record_history(worker, queue_item, ItemStatus.CANCELLED.value)
+            self.set_item_status(item_id, ItemStatus.CANCELLED)
+            self._refresh_queue_counter()
+            return
+        
+        if queue_item.status == ItemStatus.PAUSED:
+            # Only this item was paused; keep the rest of the queue moving
+            self.set_item_status(item_id, ItemStatus.PAUSED)
+            self._refresh_queue_counter()
+            self.start_next_download()
+            return
+        
+        if success and queue_item.status == ItemStatus.PROCESSING:
+            # Network part is done; merge in the pool while the next item downloads
+            if worker and worker.merge_job:
+                self._pending_history[queue_item.id] = self._history_record(worker, queue_item, "")
+                self._merges_in_flight += 1
+                self.postprocess_pool.submit(worker.merge_job, on_done=self._on_merge_done)
+            self.set_item_status(item_id, ItemStatus.PROCESSING)
+            self._refresh_queue_counter()
+        elif success:
             if self.session:
                 self.session.mark_item_done()
-            self.set_item_status(row, ItemStatus.COMPLETED)
+            self._record_history(worker, queue_item, ItemStatus.COMPLETED.value)
+            self.set_item_status(item_id, ItemStatus.COMPLETED)
             log_info(f"Successfully downloaded: {queue_item.title}")
+            if worker:
+                self._transcode(worker.final_files)
             # Show notification
-            show_notification("Download Complete", f"✅ {queue_item.title}", sound=True)
+            self.notifier.notify("Download Complete", f"✅ {queue_item.title}",
+                                 summary="✅ {count} downloads complete")
             self._show_toast(f"Download complete: {queue_item.title}")
             self._refresh_queue_counter()
         else:
-            # Try to retry if we haven't exceeded max retries
-            if queue_item.retry_count < queue_item.max_retries:
-                queue_item.retry_count += 1
-                self.set_item_status(row, ItemStatus.FAILED, error_msg)
-                log_warning(f"Download failed, retrying ({queue_item.retry_count}/{queue_item.max_retries}): {queue_item.title}")
-                
-                # Show error to user
-                QMessageBox.warning(
-                    self,
-                    "Download Failed",
-                    f"Failed to download: {queue_item.title}\n\nError: {error_msg}\n\nRetrying ({queue_item.retry_count}/{queue_item.max_retries})..."
+            kind, delay = self.retry_scheduler.schedule(queue_item, error_msg)
+            if kind == FailureKind.THROTTLED:
+                self.concurrency.record_throttle(host_for(queue_item.url), kind.value)
+            # Every attempt is kept, so retried failures show up in the history too
+            self._record_history(worker, queue_item, "Retried" if delay is not None else ItemStatus.FAILED.value,
+                                 f"{kind.value}: {error_msg}")
+            self.set_item_status(item_id, ItemStatus.FAILED, error_msg)
+            if delay is not None:
+                # Retry later without blocking; the pinned format reuses finished streams
+                log_warning(f"Download failed ({kind.value}), retry {queue_item.retry_count}/{queue_item.max_retries} in {delay:.0f}s: {queue_item.title}")
+                self._list_items[item_id].setText(
+                    f"❌ {queue_item.title} ({kind.value}, retry {queue_item.retry_count}/{queue_item.max_retries} in {delay:.0f}s)"
                 )
-                
-                # Retry this item
-                if self.session and self.session.is_running:
-                    self.start_next_download()
-                return
+                QTimer.singleShot(int(delay * 1000), lambda item=queue_item: self._retry_due(item))
             else:
                 if self.session:
                     self.session.mark_item_done()
-                self.set_item_status(row, ItemStatus.FAILED, error_msg)
-                log_error(f"Download failed after {queue_item.max_retries} retries: {queue_item.title}")
-                self._refresh_queue_counter()
-                
-                # Show final error to user
-                QMessageBox.critical(
-                    self,
-                    "Download Failed",
-                    f"Failed to download: {queue_item.title}\n\nError: {error_msg}\n\nMax retries exceeded."
-                )
+                log_error(f"Download failed ({kind.value}), not retrying: {queue_item.title}")
+                self._show_toast(f"Download failed: {queue_item.title}")
+            self._refresh_queue_counter()
 
         # Update overall progress
         if self.session:
             self.progress_bar.setValue(self.session.progress_percent)
 
-        if self.session and self.session.is_running and self.queue.has_next():
+        # After Stop the session stays stopped; it never reports completion
+        if self.session and self.session.is_running:
             self.start_next_download()
-        else:
-            self.status_label.setText("All downloads completed")
-            self.start_btn.setEnabled(True)
-            self.stop_btn.setEnabled(False)
-            self.progress_bar.setValue(100)
+
+    def _history_record(self, worker, queue_item, status, error="") -> HistoryRecord:
+        """History row for the attempt `worker` just finished"""
+        stats = worker.stats if worker else TransferStats()
+        finished_at = (worker.finished_at if worker else 0) or time.time()
+        return HistoryRecord(
+            url=queue_item.url,
+            title=queue_item.title,
+            status=status,
+            started_at=(worker.started_at if worker else 0) or finished_at,
+            finished_at=finished_at,
+            format_id=(worker.format_id if worker else "") or queue_item.format_id,
+            quality=self.settings.video_quality,
+            container=self.settings.format,
+            download_seconds=stats.seconds,
+            bytes=stats.bytes,
+            avg_speed=stats.avg_speed,
+            peak_speed=stats.peak_speed,
+            retries=queue_item.retry_count,
+            error=error,
+        )
+
+    def _record_history(self, worker, queue_item, status, error=""):
+        self.history.record(self._history_record(worker, queue_item, status, error))
+
+    def _retry_due(self, queue_item):
+        """Backoff expired: requeue the item and start it if the download slot is free"""
+        if not self.retry_scheduler.mark_due(queue_item):
+            return  # Cancelled by stop or removed
+        if queue_item.id not in self.queue:
+            return
+        self.queue.mark_waiting(queue_item)
+        self.set_item_status(queue_item.id, ItemStatus.WAITING)
+        self._refresh_queue_counter()
+        self.start_next_download()
+
+    def _maybe_finish_session(self):
+        """Finish the session unless merges or backed-off retries are still outstanding"""
+        pending_merges = self._merges_in_flight
+        pending_retries = self.retry_scheduler.pending
+        if pending_merges or pending_retries:
+            # on_merge_finished / _retry_due pick the session up again
+            self.status_label.setText(
+                f"Waiting for {pending_merges} merge(s) and {pending_retries} retry(ies)..."
+            )
+            return
+        self._finish_session()
+
+    def _finish_session(self):
+        """Reset controls and notify once every item has been downloaded and merged"""
+        status = "All downloads completed"
+        if self.session and self.session.bytes_saved:
+            status += f" • Size-efficient policy saved {_format_size(self.session.bytes_saved)}"
+            log_info(f"Session bytes saved by size-efficient policy: {self.session.bytes_saved}")
+        self.status_label.setText(status)
+        self.start_btn.setEnabled(True)
+        self.stop_btn.setEnabled(False)
+        self.progress_bar.setValue(100)
+        if self.session:
+            self.session.reset()
+        # Show completion notification
+        self.notifier.notify("All Downloads Complete", "✅ All items have been processed")
+        # Auto-open download folder on completion
+        self.open_download_folder()
+        self._show_toast("All downloads complete")
+        self.playlist_counter_label.setText("")
+        self._refresh_queue_counter()
+        self._show_failure_summary()
+        self.retry_scheduler.reset()
+
+    def _show_failure_summary(self):
+        """Non-modal summary of items that failed for good this session"""
+        summary = self.retry_scheduler.summary()
+        if not summary:
+            return
+        self._summary_box = QMessageBox(self)
+        self._summary_box.setIcon(QMessageBox.Icon.Warning)
+        self._summary_box.setWindowTitle("Some Downloads Failed")
+        self._summary_box.setText(f"{len(self.retry_scheduler.failures)} item(s) could not be downloaded.")
+        self._summary_box.setDetailedText(summary)
+        self._summary_box.setWindowModality(Qt.WindowModality.NonModal)
+        self._summary_box.show()
+
+    def _on_merge_done(self, job, success, error_msg):
+        """Pool-thread callback: index the merged file, then hand off to the GUI thread"""
+        if success and job.content_key and os.path.exists(job.final_path):
+            try:
+                self.dedupe_index.record(job.content_key, job.final_path, os.path.getsize(job.final_path))
+            except OSError as e:
+                log_warning(f"Could not index merged file {job.final_path}: {e}")
+        self.merge_bridge.merge_finished.emit(job, success, error_msg)
+
+    def on_merge_finished(self, job, success, error_msg=""):
+        self._merges_in_flight -= 1
+        queue_item = job.context
+        record = self._pending_history.pop(queue_item.id, None)
+        if record:
+            now = time.time()
+            record.process_seconds = now - record.finished_at
+            record.finished_at = now
+            record.status = ItemStatus.COMPLETED.value if success else ItemStatus.FAILED.value
+            record.error = error_msg
+            self.history.record(record)
+        if queue_item.id not in self.queue:
+            return  # Removed from the queue while merging
+
+        if success:
             if self.session:
-                self.session.reset()
-            # Show completion notification
-            show_notification("All Downloads Complete", "✅ All items have been processed", sound=True)
-            # Auto-open download folder on completion
-            self.open_download_folder()
-            self._show_toast("All downloads complete")
-            self.playlist_counter_label.setText("")
-            self._refresh_queue_counter()
+                self.session.mark_item_done()
+            queue_item.status = ItemStatus.COMPLETED
+            queue_item.clear_resume_state()
+            self.set_item_status(queue_item.id, ItemStatus.COMPLETED)
+            self._transcode([job.final_path])
+            log_info(f"Successfully downloaded: {queue_item.title}")
+            self.notifier.notify("Download Complete", f"✅ {queue_item.title}",
+                                 summary="✅ {count} downloads complete")
+            self._show_toast(f"Download complete: {queue_item.title}")
+        else:
+            queue_item.status = ItemStatus.FAILED
+            self.set_item_status(queue_item.id, ItemStatus.FAILED, error_msg)
+            # The streams are kept, so a retry finds them already downloaded and only merges again
+            kind, delay = self.retry_scheduler.schedule(queue_item, error_msg,
+                                                        retryable=RETRYABLE_KINDS | {FailureKind.POSTPROCESS})
+            if delay is not None:
+                log_warning(f"Merge failed, retry {queue_item.retry_count}/{queue_item.max_retries} "
+                            f"in {delay:.0f}s: {queue_item.title}: {error_msg}")
+                QTimer.singleShot(int(delay * 1000), lambda item=queue_item: self._retry_due(item))
+            else:
+                if self.session:
+                    self.session.mark_item_done()
+                log_error(f"Merge failed: {queue_item.title}: {error_msg}")
+        self._refresh_queue_counter()
+
+        if self.session and self.session.is_running and not self.session.workers and not self.queue.has_next():
+            self._maybe_finish_session()
 
     def stop_downloads(self):
         """Stop current download and pause the queue"""
         if self.session:
             self.session.is_running = False
+        # Items waiting out a backoff go back to Waiting for the next start
+        for queue_item in self.queue:
+            if queue_item.status == ItemStatus.FAILED and self.retry_scheduler.mark_due(queue_item):
+                self.queue.mark_waiting(queue_item)
+                self.set_item_status(queue_item.id, ItemStatus.WAITING)
+        self.retry_scheduler.cancel_all()
         self.status_label.setText("Downloads stopped")
         self.start_btn.setEnabled(True)
         self.stop_btn.setEnabled(False)
         self.playlist_counter_label.setText("")
         
-        # Stop the current worker gracefully
-        if self.session and self.session.current_worker and self.session.current_worker.isRunning():
-            self.session.current_worker.stop()
-            # Wait with timeout to prevent freezing
-            if not self.session.current_worker.wait(5000):  # 5 second timeout
-                self.session.current_worker.terminate()
-                self.session.current_worker.wait()
+        # Cancel the running workers without waiting; their progress hooks abort the transfers
+        # promptly and each reports through finished_one and _on_worker_exited
+        workers = self.session.active_workers if self.session else []
+        for worker in workers:
+            worker.stop()
 
     def show_queue_context_menu(self, position):
         """Show right-click context menu for queue items"""
@@ -720,49 +1283,126 @@ class YouTubeDownloader(QMainWindow):
         if not item:
             return
         
-        row = self.list_widget.row(item)
-        queue_item = self.queue.queue[row]
+        item_id = item.data(Qt.ItemDataRole.UserRole)
+        queue_item = self.queue.get(item_id)
+        if queue_item is None:
+            return
         
         menu = QMenu(self)
         
         # Copy URL action
         copy_action = menu.addAction("Copy URL")
-        copy_action.triggered.connect(lambda: self.copy_queue_item_url(row))
+        copy_action.triggered.connect(lambda: self.copy_queue_item_url(item_id))
         
         # Copy title action
         copy_title_action = menu.addAction("Copy Title")
-        copy_title_action.triggered.connect(lambda: self.copy_queue_item_title(row))
+        copy_title_action.triggered.connect(lambda: self.copy_queue_item_title(item_id))
+        
+        menu.addSeparator()
+        
+        # Pause/resume actions (partial files are kept across restarts)
+        if queue_item.status in (ItemStatus.WAITING, ItemStatus.DOWNLOADING):
+            pause_action = menu.addAction("Pause")
+            pause_action.triggered.connect(lambda: self.pause_queue_item(item_id))
+        elif queue_item.status == ItemStatus.PAUSED:
+            resume_action = menu.addAction("Resume")
+            resume_action.triggered.connect(lambda: self.resume_queue_item(item_id))
+        elif queue_item.status == ItemStatus.CANCELLED:
+            # "keep" cancel mode leaves .part files, so the item continues where it stopped
+            kept = self.settings.cancel_mode == CancelMode.KEEP.value and queue_item.downloaded_bytes
+            label = "Resume" if kept else "Retry"
+            requeue_action = menu.addAction(label)
+            requeue_action.triggered.connect(lambda: self.requeue_queue_item(item_id))
+        
+        # Reordering re-ranks the item in the scheduler; only Download Next moves its row
+        if queue_item.status in (ItemStatus.WAITING, ItemStatus.PAUSED):
+            top_action = menu.addAction("Download Next")
+            top_action.triggered.connect(lambda: self.prioritize_queue_item(item_id, to_front=True))
+            # fifo ignores priority, so the actions would do nothing visible there
+            if self.queue.scheduler.uses_priority:
+                raise_action = menu.addAction(f"Raise Priority ({queue_item.priority + 1})")
+                raise_action.triggered.connect(lambda: self.prioritize_queue_item(item_id, delta=1))
+                lower_action = menu.addAction(f"Lower Priority ({queue_item.priority - 1})")
+                lower_action.triggered.connect(lambda: self.prioritize_queue_item(item_id, delta=-1))
         
         menu.addSeparator()
         
         # Remove item action
         remove_action = menu.addAction("Remove from Queue")
-        remove_action.triggered.connect(lambda: self.remove_queue_item(row))
+        remove_action.triggered.connect(lambda: self.remove_queue_item(item_id))
         
         # Show menu at cursor position
         menu.exec(self.list_widget.mapToGlobal(position))
 
-    def copy_queue_item_url(self, row):
+    def copy_queue_item_url(self, item_id):
         """Copy queue item URL to clipboard"""
         from PyQt6.QtGui import QClipboard
         clipboard = QApplication.clipboard()
-        queue_item = self.queue.queue[row]
+        queue_item = self.queue.get(item_id)
         clipboard.setText(queue_item.url)
         log_info(f"Copied URL to clipboard: {queue_item.url}")
 
-    def copy_queue_item_title(self, row):
+    def copy_queue_item_title(self, item_id):
         """Copy queue item title to clipboard"""
         from PyQt6.QtGui import QClipboard
         clipboard = QApplication.clipboard()
-        queue_item = self.queue.queue[row]
+        queue_item = self.queue.get(item_id)
         clipboard.setText(queue_item.title)
         log_info(f"Copied title to clipboard: {queue_item.title}")
 
-    def remove_queue_item(self, row):
+    def pause_queue_item(self, item_id):
+        """Pause a waiting or downloading item, keeping its partial files"""
+        queue_item = self.queue.get(item_id)
+        worker = self.session.workers.get(item_id) if self.session else None
+        if worker and worker.isRunning():
+            # The worker reports PAUSED through finished_one, which starts the next item
+            worker.pause()
+        else:
+            self.queue.pause(queue_item)
+            self.set_item_status(item_id, ItemStatus.PAUSED)
+            self._refresh_queue_counter()
+        log_info(f"Paused: {queue_item.title}")
+
+    def resume_queue_item(self, item_id):
+        """Return a paused item to the queue; it continues from its .part files"""
+        queue_item = self.queue.get(item_id)
+        self.queue.resume(queue_item)
+        self.set_item_status(item_id, ItemStatus.WAITING)
+        self._refresh_queue_counter()
+        log_info(f"Resumed: {queue_item.title}")
+        self.start_next_download()
+
+    def requeue_queue_item(self, item_id):
+        """Return a cancelled item to the queue; it continues from any kept .part files"""
+        queue_item = self.queue.get(item_id)
+        self.queue.requeue(queue_item)
+        self.set_item_status(item_id, ItemStatus.WAITING)
+        self._refresh_queue_counter()
+        log_info(f"Requeued: {queue_item.title}")
+        self.start_next_download()
+
+    def prioritize_queue_item(self, item_id, delta=0, to_front=False):
+        """Change an item's place in the schedule; Download Next also moves its row to the top"""
+        queue_item = self.queue.get(item_id)
+        if to_front:
+            # Match the highest priority, then go first among equals
+            top = max((item.priority for item in self.queue.queue), default=0)
+            self.queue.set_priority(queue_item, max(queue_item.priority, top))
+            self.queue.move_to_front(queue_item)
+            list_item = self._list_items[item_id]
+            self.list_widget.insertItem(0, self.list_widget.takeItem(self.list_widget.row(list_item)))
+        else:
+            self.queue.set_priority(queue_item, queue_item.priority + delta)
+        log_info(f"Rescheduled {queue_item.title}: priority {queue_item.priority} ({self.queue.policy})")
+
+    def remove_queue_item(self, item_id):
         """Remove item from queue"""
-        self.queue.queue.pop(row)
-        self.list_widget.takeItem(row)
-        log_info(f"Removed item at index {row} from queue")
+        queue_item = self.queue.remove(item_id)
+        list_item = self._list_items.pop(item_id, None)
+        if list_item is not None:
+            self.list_widget.takeItem(self.list_widget.row(list_item))
+        if queue_item:
+            log_info(f"Removed from queue: {queue_item.title}")
         self._refresh_queue_counter()
 
     def open_download_folder(self):
@@ -850,15 +1490,31 @@ Elabo Evans
 
     def closeEvent(self, event):
         """Handle window close and cleanup"""
-        # Stop any running download workers
-        if self.session and self.session.current_worker and self.session.current_worker.isRunning():
-            self.session.current_worker.stop()
-            self.session.current_worker.wait(5000)
+        # Stop any running download workers, keeping partial files for the next run
+        self._interrupt_for_shutdown()
         
-        # Wait for metadata workers to finish
+        # Wait for metadata workers to finish; a QThread must not be destroyed while running
+        self._pending_metadata.clear()
         for worker in self.metadata_workers:
-            if worker.isRunning():
-                worker.wait(1000)
+            if worker.isRunning() and not worker.wait(2000):
+                log_warning("Metadata fetch still running at shutdown, terminating it")
+                worker.terminate()
+                worker.wait()
+        
+        # Let queued merges finish so their items are saved with a final status
+        if self.postprocess_pool.pending:
+            log_info(f"Waiting for {self.postprocess_pool.pending} merge(s) before closing")
+        self.postprocess_pool.shutdown(wait=True)
+        self.notifier.shutdown()
+        self.prefetcher.shutdown()
+        if self.transcode_pool:
+            self.transcode_pool.shutdown()
+        self.transcode_queue.close()
+        self.history.close()
+        self.ipc_server.close()
+        if self.profiler:
+            self.profiler.stop()
+        self.latency_watchdog.stop()
         
         # Save queue before closing
         self.queue_persistence.save_queue(self.queue)
@@ -867,9 +1523,82 @@ Elabo Evans
 
 
 # ---------------- App Entry ----------------
+# How long a launch that lost the race for the local socket keeps trying to hand over
+HANDOFF_RETRY_SECONDS = 10
+
+
+def _launch_urls(argv) -> list:
+    """URLs given on the command line; `-` reads more from stdin, one per line"""
+    args = argv[1:]
+    urls = [a for a in args if not a.startswith("-")]
+    if "-" in args:
+        urls.extend(line.strip() for line in sys.stdin if line.strip())
+    return urls
+
+
+def _handoff_to_running_instance(argv, urls) -> bool:
+    """
+    Pass this launch's URLs to an already running instance.
+
+    `vidgrab URL...` enqueues, `-` reads URLs from stdin, `--status` prints
+    the queue as JSON. Returns False when no instance is running.
+    """
+    args = argv[1:]
+    if "--status" in args:
+        response = send_request({"cmd": "status"})
+        if response is None:
+            return False
+        print(json.dumps(response, indent=2))
+        return True
+
+    request = {"cmd": "enqueue", "urls": urls, "start": "--start" in args} if urls else {"cmd": "activate"}
+    response = send_request(request, timeout_ms=30000 if urls else 2000)
+    if response is None:
+        return False
+    if urls:
+        print(f"Queued {response.get('added', 0)} URL(s) in the running instance")
+        for rejected in response.get("rejected", []):
+            print(f"  skipped {rejected['url']}: {rejected['error']}")
+    log_info("Handed launch over to the running instance")
+    return True
+
+
+def _claim_instance(argv, urls) -> IpcServer | None:
+    """
+    Become the instance that owns queue.json, or hand over to the one that does.
+
+    Returns the listening server, or None when this launch handed over and
+    should exit. Two launches racing each other both miss the first handoff;
+    the one that loses the socket retries until the winner answers.
+    """
+    server = IpcServer()
+    if server.listen():
+        return server
+    if not instance_running():
+        log_warning("Starting without the local API; URLs from other launches won't reach this window")
+        return server
+    deadline = time.monotonic() + HANDOFF_RETRY_SECONDS
+    while time.monotonic() < deadline:
+        if _handoff_to_running_instance(argv, urls):
+            return None
+        time.sleep(0.5)
+    log_error("Another instance holds the local API but is not answering; not starting a second one")
+    QMessageBox.critical(None, "VidGrab is already running",
+                         "Another VidGrab window is open but not responding. Close it and try again.")
+    sys.exit(1)
+
+
 def main():
     app = QApplication(sys.argv)
     
+    # Only one instance owns queue.json; later launches hand over and exit
+    launch_urls = _launch_urls(sys.argv)
+    if _handoff_to_running_instance(sys.argv, launch_urls):
+        sys.exit(0)
+    ipc_server = _claim_instance(sys.argv, launch_urls)
+    if ipc_server is None:
+        sys.exit(0)
+    
     # Apply stylesheet
     stylesheet = load_stylesheet()
     app.setStyleSheet(stylesheet)
@@ -880,9 +1609,13 @@ def main():
     log_info("Splash screen shown")
     
     # Create main window (but don't show it yet)
-    window = YouTubeDownloader()
+    window = YouTubeDownloader(ipc_server)
     log_info("Main window created")
     
+    # URLs passed to the first launch (arguments or stdin) go straight into its own queue
+    if launch_urls:
+        window.handle_api_request({"cmd": "enqueue", "urls": launch_urls, "start": "--start" in sys.argv})
+    
     # Hide splash and show main window after delay
     hide_splash(splash, window, delay_ms=3000)
     
@@ -1,8 +1,15 @@
 """Desktop notification utilities for VidGrab"""
 
 import sys
+import queue
 import subprocess
-from core.logger import log_info, log_error
+import threading
+import time
+from core.logger import log_info, log_error, log_debug
+
+_DBUS_SERVICE = "org.freedesktop.Notifications"
+_DBUS_PATH = "/org/freedesktop/Notifications"
+_dbus_interface = None
 
 
 def show_notification(title: str, message: str, sound: bool = True):
@@ -56,8 +63,51 @@ def _notify_windows(title: str, message: str):
         log_error(f"Windows notification failed: {str(e)}", exc_info=True)
 
 
-def _notify_linux(title: str, message: str):
-    """Show Linux notification using notify-send"""
+def _notify_dbus(title: str, message: str, replaces_id: int = 0):
+    """
+    Send a notification straight to the freedesktop notification service.
+
+    Returns the notification id, or None when D-Bus is unavailable.
+    """
+    global _dbus_interface
+    try:
+        from PyQt6.QtCore import QMetaType
+        from PyQt6.QtDBus import QDBusArgument, QDBusConnection, QDBusInterface, QDBusMessage
+    except ImportError:
+        return None
+
+    if _dbus_interface is None:
+        bus = QDBusConnection.sessionBus()
+        if not bus.isConnected():
+            return None
+        _dbus_interface = QDBusInterface(_DBUS_SERVICE, _DBUS_PATH, _DBUS_SERVICE, bus)
+    if not _dbus_interface.isValid():
+        return None
+
+    reply = _dbus_interface.call(
+        "Notify",
+        "VidGrab",
+        QDBusArgument(replaces_id, QMetaType.Type.UInt),
+        "",
+        title,
+        message,
+        QDBusArgument([], QMetaType.Type.QStringList),
+        {},
+        -1,
+    )
+    if reply.type() == QDBusMessage.MessageType.ErrorMessage:
+        log_debug(f"D-Bus notification failed: {reply.errorMessage()}")
+        return None
+    args = reply.arguments()
+    return int(args[0]) if args else 0
+
+
+def _notify_linux(title: str, message: str, replaces_id: int = 0):
+    """Show Linux notification over D-Bus, falling back to notify-send"""
+    notification_id = _notify_dbus(title, message, replaces_id)
+    if notification_id is not None:
+        log_info(f"Notification sent (Linux, D-Bus): {title}")
+        return notification_id
     try:
         subprocess.run(["notify-send", title, message], check=False)
         log_info(f"Notification sent (Linux): {title}")
@@ -65,3 +115,88 @@ def _notify_linux(title: str, message: str):
         log_error("notify-send not found. Install libnotify-bin for desktop notifications")
     except Exception as e:
         log_error(f"Linux notification failed: {str(e)}", exc_info=True)
+
+
+class NotificationDispatcher:
+    """
+    Send notifications from a background thread, coalescing bursts.
+
+    Notifications arriving within `coalesce_window` seconds of each other are
+    grouped by title, and at most one popup is shown per `min_interval`, so a
+    fast queue produces "12 downloads complete" rather than twelve popups.
+    """
+
+    def __init__(self, coalesce_window=2.0, min_interval=5.0, max_listed=3):
+        self.coalesce_window = coalesce_window
+        self.min_interval = min_interval
+        self.max_listed = max_listed
+        self._queue = queue.Queue()
+        self._last_sent = 0.0
+        self._linux_ids = {}  # title -> D-Bus id, so a new summary replaces the old popup
+        self._thread = threading.Thread(target=self._run, name="vidgrab-notify", daemon=True)
+        self._thread.start()
+
+    def notify(self, title: str, message: str, sound: bool = True, summary: str = None):
+        """
+        Queue a notification; returns immediately.
+
+        `summary` is used when several notifications with this title are
+        coalesced, with `{count}` replaced by their number.
+        """
+        self._queue.put((title, message, sound, summary))
+
+    def shutdown(self, timeout=2.0):
+        """Flush pending notifications and stop the thread"""
+        self._queue.put(None)
+        self._thread.join(timeout)
+
+    def _collect(self, first):
+        """Gather everything that arrives within the coalescing window and rate limit"""
+        batch = [first]
+        deadline = max(time.monotonic() + self.coalesce_window, self._last_sent + self.min_interval)
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return batch, False
+            try:
+                event = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                return batch, False
+            if event is None:
+                return batch, True
+            batch.append(event)
+
+    def _run(self):
+        while True:
+            first = self._queue.get()
+            if first is None:
+                return
+            batch, stopping = self._collect(first)
+            groups = {}
+            for event in batch:
+                groups.setdefault(event[0], []).append(event)
+            for title, events in groups.items():
+                self._send(title, events)
+            self._last_sent = time.monotonic()
+            if stopping:
+                return
+
+    def _send(self, title, events):
+        _, message, sound, summary = events[-1]
+        if len(events) > 1:
+            lines = [(summary or "{count} notifications").format(count=len(events))]
+            lines.extend(e[1] for e in events[:self.max_listed])
+            if len(events) > self.max_listed:
+                lines.append(f"…and {len(events) - self.max_listed} more")
+            message = "\n".join(lines)
+            sound = any(e[2] for e in events)
+            log_info(f"Coalesced {len(events)} notifications: {title}")
+        try:
+            if sys.platform == "linux":
+                notification_id = _notify_linux(title, message, self._linux_ids.get(title, 0))
+                if notification_id:
+                    self._linux_ids[title] = notification_id
+            else:
+                show_notification(title, message, sound)
+        except Exception as e:
+            log_error(f"Failed to show notification: {str(e)}", exc_info=True)
@@ -51,6 +51,26 @@ class SettingsDialog(QDialog):
         folder_row.addWidget(self.folder_input)
         folder_row.addWidget(folder_btn)
         folder_layout.addLayout(folder_row)
+        
+        staging_label = QLabel("Staging:")
+        staging_label.setMinimumWidth(80)
+        self.staging_input = QLineEdit()
+        self.staging_input.setText(self.current_settings.staging_folder)
+        self.staging_input.setPlaceholderText("Same as download folder")
+        self.staging_input.setToolTip(
+            "Partial files and merges are written here (e.g. a local SSD);\n"
+            "only finished files are moved into the download folder"
+        )
+        staging_btn = QPushButton("Browse")
+        staging_btn.clicked.connect(self.choose_staging_folder)
+        staging_btn.setMaximumWidth(100)
+        
+        staging_row = QHBoxLayout()
+        staging_row.setSpacing(10)
+        staging_row.addWidget(staging_label)
+        staging_row.addWidget(self.staging_input)
+        staging_row.addWidget(staging_btn)
+        folder_layout.addLayout(staging_row)
         folder_group.setLayout(folder_layout)
         layout.addWidget(folder_group)
         
@@ -87,6 +107,24 @@ class SettingsDialog(QDialog):
         format_row.addStretch()
         quality_layout.addLayout(format_row)
         
+        policy_label = QLabel("Policy:")
+        policy_label.setMinimumWidth(80)
+        self.policy_combo = QComboBox()
+        self.policy_combo.addItems(Settings.FORMAT_POLICY_OPTIONS)
+        self.policy_combo.setCurrentText(self.current_settings.format_policy)
+        self.policy_combo.setToolTip(
+            "quality: best stream up to the selected resolution\n"
+            "size-efficient: smallest stream at that resolution (e.g. AV1/VP9)"
+        )
+        self.policy_combo.setMinimumWidth(150)
+        
+        policy_row = QHBoxLayout()
+        policy_row.setSpacing(10)
+        policy_row.addWidget(policy_label)
+        policy_row.addWidget(self.policy_combo)
+        policy_row.addStretch()
+        quality_layout.addLayout(policy_row)
+        
         quality_group.setLayout(quality_layout)
         layout.addWidget(quality_group)
         
@@ -99,6 +137,141 @@ class SettingsDialog(QDialog):
         self.auto_start_check.setChecked(self.current_settings.auto_start)
         pref_layout.addWidget(self.auto_start_check)
         
+        cancel_label = QLabel("On stop:")
+        cancel_label.setMinimumWidth(80)
+        self.cancel_mode_combo = QComboBox()
+        self.cancel_mode_combo.addItems(Settings.CANCEL_MODE_OPTIONS)
+        self.cancel_mode_combo.setCurrentText(self.current_settings.cancel_mode)
+        self.cancel_mode_combo.setToolTip(
+            "keep: leave partial files so the download can resume\n"
+            "discard: delete partial files when a download is stopped"
+        )
+        self.cancel_mode_combo.setMinimumWidth(150)
+        
+        cancel_row = QHBoxLayout()
+        cancel_row.setSpacing(10)
+        cancel_row.addWidget(cancel_label)
+        cancel_row.addWidget(self.cancel_mode_combo)
+        cancel_row.addStretch()
+        pref_layout.addLayout(cancel_row)
+        
+        schedule_label = QLabel("Order:")
+        schedule_label.setMinimumWidth(80)
+        self.schedule_combo = QComboBox()
+        self.schedule_combo.addItems(Settings.SCHEDULE_POLICY_OPTIONS)
+        self.schedule_combo.setCurrentText(self.current_settings.schedule_policy)
+        self.schedule_combo.setToolTip(
+            "fifo: in the order added (Download Next still moves an item up)\n"
+            "priority: highest priority first\n"
+            "shortest-first: shortest videos first, so more items finish sooner\n"
+            "round-robin: one item from each playlist or channel in turn\n"
+            "Right-click an item to raise or lower its priority; fifo ignores priority"
+        )
+        self.schedule_combo.setMinimumWidth(150)
+        
+        schedule_row = QHBoxLayout()
+        schedule_row.setSpacing(10)
+        schedule_row.addWidget(schedule_label)
+        schedule_row.addWidget(self.schedule_combo)
+        schedule_row.addStretch()
+        pref_layout.addLayout(schedule_row)
+        
+        prefetch_label = QLabel("Prefetch:")
+        prefetch_label.setMinimumWidth(80)
+        self.prefetch_combo = QComboBox()
+        self.prefetch_combo.addItems(Settings.PREFETCH_COUNT_OPTIONS)
+        self.prefetch_combo.setCurrentText(str(self.current_settings.prefetch_count))
+        self.prefetch_combo.setToolTip(
+            "Resolve formats for this many upcoming items while the current one downloads,\n"
+            "so the next download starts transferring right away (0 = off)"
+        )
+        self.prefetch_combo.setMinimumWidth(150)
+        
+        prefetch_row = QHBoxLayout()
+        prefetch_row.setSpacing(10)
+        prefetch_row.addWidget(prefetch_label)
+        prefetch_row.addWidget(self.prefetch_combo)
+        prefetch_row.addStretch()
+        pref_layout.addLayout(prefetch_row)
+        
+        parallel_label = QLabel("Parallel:")
+        parallel_label.setMinimumWidth(80)
+        self.parallel_combo = QComboBox()
+        self.parallel_combo.addItems(Settings.PARALLEL_DOWNLOADS_OPTIONS)
+        self.parallel_combo.setCurrentText(str(self.current_settings.parallel_downloads))
+        self.parallel_combo.setToolTip(
+            "Most items downloading at once from the same site; lowered automatically\n"
+            "while the site throttles and raised again as downloads stay healthy"
+        )
+        self.parallel_combo.setMinimumWidth(150)
+        
+        parallel_row = QHBoxLayout()
+        parallel_row.setSpacing(10)
+        parallel_row.addWidget(parallel_label)
+        parallel_row.addWidget(self.parallel_combo)
+        parallel_row.addStretch()
+        pref_layout.addLayout(parallel_row)
+        
+        connections_label = QLabel("Connections:")
+        connections_label.setMinimumWidth(80)
+        self.connections_combo = QComboBox()
+        self.connections_combo.addItems(Settings.DOWNLOAD_CONNECTIONS_OPTIONS)
+        self.connections_combo.setCurrentText(str(self.current_settings.download_connections))
+        self.connections_combo.setToolTip(
+            "Split large single-file streams into byte ranges fetched in parallel\n"
+            "(DASH/HLS fragments are already parallel; 1 = off)"
+        )
+        self.downloader_combo = QComboBox()
+        self.downloader_combo.addItems(Settings.EXTERNAL_DOWNLOADER_OPTIONS)
+        self.downloader_combo.setCurrentText(self.current_settings.external_downloader)
+        self.downloader_combo.setToolTip("aria2c is used when installed; otherwise the built-in downloader")
+        
+        connections_row = QHBoxLayout()
+        connections_row.setSpacing(10)
+        connections_row.addWidget(connections_label)
+        connections_row.addWidget(self.connections_combo)
+        connections_row.addWidget(self.downloader_combo)
+        connections_row.addStretch()
+        pref_layout.addLayout(connections_row)
+        
+        transcode_label = QLabel("Convert to:")
+        transcode_label.setMinimumWidth(80)
+        self.transcode_combo = QComboBox()
+        self.transcode_combo.addItems(Settings.TRANSCODE_TARGET_OPTIONS)
+        self.transcode_combo.setCurrentText(self.current_settings.transcode_target)
+        self.transcode_combo.setToolTip(
+            "Convert each finished file in the background at low CPU and disk priority\n"
+            "(mp3/opus audio or an HEVC archive copy; the original is replaced)"
+        )
+        self.transcode_cores_combo = QComboBox()
+        self.transcode_cores_combo.addItems(Settings.TRANSCODE_CORES_OPTIONS)
+        self.transcode_cores_combo.setCurrentText(self.current_settings.transcode_cores)
+        self.transcode_cores_combo.setToolTip("Cores used for conversions (auto = all but one)")
+        
+        transcode_row = QHBoxLayout()
+        transcode_row.setSpacing(10)
+        transcode_row.addWidget(transcode_label)
+        transcode_row.addWidget(self.transcode_combo)
+        transcode_row.addWidget(self.transcode_cores_combo)
+        transcode_row.addStretch()
+        pref_layout.addLayout(transcode_row)
+        
+        self.pipeline_merges_check = QCheckBox("Merge video and audio in the background while the next item downloads")
+        self.pipeline_merges_check.setChecked(self.current_settings.pipeline_merges)
+        pref_layout.addWidget(self.pipeline_merges_check)
+        
+        self.dedupe_check = QCheckBox("Reuse files already downloaded to another folder (hardlink)")
+        self.dedupe_check.setChecked(self.current_settings.dedupe_downloads)
+        pref_layout.addWidget(self.dedupe_check)
+        
+        self.share_extraction_check = QCheckBox("Reuse the metadata lookup for the download (extract each video once)")
+        self.share_extraction_check.setChecked(self.current_settings.share_extraction)
+        pref_layout.addWidget(self.share_extraction_check)
+        
+        self.diagnostics_check = QCheckBox("Diagnostics mode: profile CPU and memory to ~/.vidgrab/profiles")
+        self.diagnostics_check.setChecked(self.current_settings.diagnostics_mode)
+        pref_layout.addWidget(self.diagnostics_check)
+        
         self.dark_mode_check = QCheckBox("Dark mode (coming soon)")
         self.dark_mode_check.setChecked(self.current_settings.dark_mode)
         self.dark_mode_check.setEnabled(False)  # Not implemented yet
@@ -138,14 +311,37 @@ class SettingsDialog(QDialog):
         if folder:
             self.folder_input.setText(folder)
     
+    def choose_staging_folder(self):
+        folder = QFileDialog.getExistingDirectory(
+            self,
+            "Select Staging Folder",
+            self.staging_input.text() or self.folder_input.text()
+        )
+        if folder:
+            self.staging_input.setText(folder)
+    
     def save_settings(self):
         """Save settings and close dialog"""
         new_settings = Settings(
             download_folder=self.folder_input.text(),
             video_quality=self.quality_combo.currentText(),
             format=self.format_combo.currentText(),
+            format_policy=self.policy_combo.currentText(),
             auto_start=self.auto_start_check.isChecked(),
             dark_mode=self.dark_mode_check.isChecked(),
+            cancel_mode=self.cancel_mode_combo.currentText(),
+            pipeline_merges=self.pipeline_merges_check.isChecked(),
+            staging_folder=self.staging_input.text().strip(),
+            dedupe_downloads=self.dedupe_check.isChecked(),
+            schedule_policy=self.schedule_combo.currentText(),
+            prefetch_count=int(self.prefetch_combo.currentText()),
+            parallel_downloads=int(self.parallel_combo.currentText()),
+            share_extraction=self.share_extraction_check.isChecked(),
+            download_connections=int(self.connections_combo.currentText()),
+            external_downloader=self.downloader_combo.currentText(),
+            transcode_target=self.transcode_combo.currentText(),
+            transcode_cores=self.transcode_cores_combo.currentText(),
+            diagnostics_mode=self.diagnostics_check.isChecked(),
         )
         
         if self.settings_manager.save(new_settings):
@@ -168,5 +364,19 @@ class SettingsDialog(QDialog):
             self.folder_input.setText(defaults.download_folder)
             self.quality_combo.setCurrentText(defaults.video_quality)
             self.format_combo.setCurrentText(defaults.format)
+            self.policy_combo.setCurrentText(defaults.format_policy)
             self.auto_start_check.setChecked(defaults.auto_start)
             self.dark_mode_check.setChecked(defaults.dark_mode)
+            self.cancel_mode_combo.setCurrentText(defaults.cancel_mode)
+            self.pipeline_merges_check.setChecked(defaults.pipeline_merges)
+            self.staging_input.setText(defaults.staging_folder)
+            self.dedupe_check.setChecked(defaults.dedupe_downloads)
+            self.schedule_combo.setCurrentText(defaults.schedule_policy)
+            self.prefetch_combo.setCurrentText(str(defaults.prefetch_count))
+            self.parallel_combo.setCurrentText(str(defaults.parallel_downloads))
+            self.share_extraction_check.setChecked(defaults.share_extraction)
+            self.connections_combo.setCurrentText(str(defaults.download_connections))
+            self.downloader_combo.setCurrentText(defaults.external_downloader)
+            self.transcode_combo.setCurrentText(defaults.transcode_target)
+            self.transcode_cores_combo.setCurrentText(defaults.transcode_cores)
+            self.diagnostics_check.setChecked(defaults.diagnostics_mode)
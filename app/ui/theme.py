@@ -25,6 +25,8 @@ class Colors:
     # Status colors for download items
     STATUS_WAITING = "#a0aec0"
     STATUS_DOWNLOADING = "#00d9ff"
+    STATUS_PAUSED = "#fbbf24"
+    STATUS_PROCESSING = "#a78bfa"
     STATUS_COMPLETED = "#34d399"
     STATUS_FAILED = "#f87171"
     STATUS_CANCELLED = "#718096"
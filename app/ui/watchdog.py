@@ -0,0 +1,154 @@
+import bisect
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from PyQt6.QtCore import QObject, Qt, QTimer
+from core.logger import log_info, log_warning
+
+TICK_MS = 100  # Expected spacing of event-loop ticks; coarse enough to cost nothing when idle
+DIAGNOSTICS_TICK_MS = 10  # Fine-grained lag histogram while diagnostics mode is on
+STALL_MS = 250  # A tick this late is reported as a stall with the blocking stack
+# Histogram bucket upper bounds for tick lag, in ms; the last bucket is open-ended
+LAG_BUCKETS_MS = (5, 16, 33, 50, 100, 250, 500, 1000, 2500, 5000)
+SUMMARY_INTERVAL = 600.0  # Seconds between histogram lines in the log
+MAX_RECENT_STALLS = 20
+
+
+def _innermost_frame(stack: str) -> str:
+    """'File "...", line N, in func' of the call that was blocking"""
+    for line in reversed(stack.splitlines()):
+        if line.strip().startswith("File "):
+            return line.strip()
+    return stack
+
+
+class LatencyWatchdog(QObject):
+    """
+    Measures how late the Qt event loop runs a periodic timer.
+
+    Every tick's lag (actual minus expected interval) goes into a histogram.
+    A daemon thread watches the tick heartbeat: when the GUI thread has been
+    silent for STALL_MS it captures the GUI thread's stack, so the blocking
+    call is logged along with the stall duration once the loop recovers.
+    """
+
+    def __init__(self, parent=None, tick_ms=TICK_MS, stall_ms=STALL_MS):
+        super().__init__(parent)
+        self.tick_ms = tick_ms
+        self.stall_ms = stall_ms
+        self.buckets = [0] * (len(LAG_BUCKETS_MS) + 1)
+        self.ticks = 0
+        self.max_lag_ms = 0.0
+        self.stalls = 0
+        self.recent_stalls = deque(maxlen=MAX_RECENT_STALLS)  # (wall time, ms, stack)
+        self._last_tick = time.monotonic()
+        self._last_summary = self._last_tick
+        self._gui_ident = threading.get_ident()
+        self._stall_stack = None  # Captured by the watcher thread during a stall
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._timer = QTimer(self)
+        # A coarse timer may fire up to 5% early or late by design, which would read as lag
+        self._timer.setTimerType(Qt.TimerType.PreciseTimer)
+        self._timer.setInterval(tick_ms)
+        self._timer.timeout.connect(self._on_tick)
+
+    def start(self):
+        self._gui_ident = threading.get_ident()
+        self._last_tick = time.monotonic()
+        self._stop.clear()
+        self._timer.start()
+        self._thread = threading.Thread(target=self._watch, name="vidgrab-latency-watchdog", daemon=True)
+        self._thread.start()
+        log_info(f"Event-loop watchdog started ({self.tick_ms} ms ticks, stalls over {self.stall_ms} ms)")
+
+    def stop(self):
+        self._timer.stop()
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+        log_info(f"UI latency: {self.format_histogram()}")
+
+    def set_tick_ms(self, tick_ms):
+        """Change the tick spacing, e.g. to DIAGNOSTICS_TICK_MS while diagnostics mode is on"""
+        if tick_ms == self.tick_ms:
+            return
+        with self._lock:
+            self.tick_ms = tick_ms
+            self._last_tick = time.monotonic()  # The switch itself is not lag
+        self._timer.setInterval(tick_ms)
+        log_info(f"Event-loop watchdog ticks every {tick_ms} ms")
+
+    def _on_tick(self):
+        with self._lock:
+            now = time.monotonic()
+            silent_ms = (now - self._last_tick) * 1000
+            self._last_tick = now
+            stack, self._stall_stack = self._stall_stack, None
+        lag_ms = max(0.0, silent_ms - self.tick_ms)
+        self.ticks += 1
+        self.buckets[bisect.bisect_right(LAG_BUCKETS_MS, lag_ms)] += 1
+        self.max_lag_ms = max(self.max_lag_ms, lag_ms)
+
+        # Same measure as the watcher thread, so a captured stack always belongs to this stall
+        if silent_ms >= self.stall_ms:
+            self.stalls += 1
+            stack = stack or "(stack not captured)"
+            self.recent_stalls.append((time.time(), lag_ms, stack))
+            log_warning(f"UI thread stalled for {lag_ms:.0f} ms in:\n{stack}")
+
+        if now - self._last_summary >= SUMMARY_INTERVAL:
+            self._last_summary = now
+            log_info(f"UI latency: {self.format_histogram()}")
+
+    def _watch(self):
+        # Poll at half the stall threshold so a stall is caught while it is still blocking
+        while not self._stop.wait(self.stall_ms / 2000):
+            with self._lock:
+                silent_ms = (time.monotonic() - self._last_tick) * 1000
+                if silent_ms < self.stall_ms or self._stall_stack is not None:
+                    continue  # One stack per stall, taken near its start
+                frame = sys._current_frames().get(self._gui_ident)
+                if frame is not None:
+                    self._stall_stack = "".join(traceback.format_stack(frame)).rstrip()
+
+    def percentile(self, fraction) -> float:
+        """Bucket upper bound (ms) below which `fraction` of ticks fell"""
+        if not self.ticks:
+            return 0.0
+        target = fraction * self.ticks
+        seen = 0
+        for bound, count in zip(LAG_BUCKETS_MS, self.buckets):
+            seen += count
+            if seen >= target:
+                return float(bound)
+        return self.max_lag_ms
+
+    def metrics(self) -> dict:
+        labels = [f"<{bound}ms" for bound in LAG_BUCKETS_MS] + [f">={LAG_BUCKETS_MS[-1]}ms"]
+        return {
+            "ticks": self.ticks,
+            "p50_ms": self.percentile(0.5),
+            "p99_ms": self.percentile(0.99),
+            "max_ms": round(self.max_lag_ms, 1),
+            "stalls": self.stalls,
+            "histogram": dict(zip(labels, self.buckets)),
+            "recent_stalls": [
+                {
+                    "at": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(at)),
+                    "ms": round(ms),
+                    "where": _innermost_frame(stack),
+                }
+                for at, ms, stack in self.recent_stalls
+            ],
+        }
+
+    def format_histogram(self) -> str:
+        metrics = self.metrics()
+        buckets = ", ".join(f"{label} {count}" for label, count in metrics["histogram"].items() if count)
+        return (f"{metrics['ticks']} ticks, p50 {metrics['p50_ms']:.0f} ms, p99 {metrics['p99_ms']:.0f} ms, "
+                f"max {metrics['max_ms']:.0f} ms, {metrics['stalls']} stalls [{buckets}]")
@@ -0,0 +1,81 @@
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from core.cancellation import CancellationToken, CancelMode, DownloadCancelled
+from core.engine import DownloadEngine
+
+SIZE = 64 * 1024 * 1024
+STOP_TO_IDLE_LIMIT_MS = 1000
+
+
+class _SlowVideo(BaseHTTPRequestHandler):
+    """A direct .mp4 link served at roughly 6 MiB/s, so a download is always mid-transfer"""
+
+    def log_message(self, *args):
+        pass
+
+    def _headers(self):
+        self.send_response(200)
+        self.send_header("Content-Type", "video/mp4")
+        self.send_header("Content-Length", str(SIZE))
+        self.end_headers()
+
+    def do_HEAD(self):
+        self._headers()
+
+    def do_GET(self):
+        self._headers()
+        try:
+            for _ in range(SIZE // 65536):
+                self.wfile.write(b"\0" * 65536)
+                time.sleep(0.01)
+        except OSError:
+            pass  # Client went away after cancelling
+
+
+@pytest.fixture
+def video_url():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _SlowVideo)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_port}/video.mp4"
+    server.shutdown()
+
+
+@pytest.mark.parametrize("mode", [CancelMode.KEEP, CancelMode.DISCARD])
+def test_stop_to_idle(tmp_path, video_url, mode):
+    token = CancellationToken()
+    transferring = threading.Event()
+    outcome = {}
+
+    def on_progress(d):
+        if d.get("downloaded_bytes", 0) > 1_000_000:
+            transferring.set()
+
+    engine = DownloadEngine(str(tmp_path), hooks=[on_progress], cancel_token=token, cancel_mode=mode)
+
+    def run():
+        try:
+            engine.download(video_url)
+        except DownloadCancelled:
+            outcome["cancelled"] = True
+
+    thread = threading.Thread(target=run)
+    thread.start()
+    assert transferring.wait(30), "download never started transferring"
+
+    token.cancel()
+    thread.join(10)
+    stop_to_idle_ms = token.elapsed_ms()
+
+    assert not thread.is_alive()
+    assert outcome.get("cancelled")
+    assert stop_to_idle_ms < STOP_TO_IDLE_LIMIT_MS, f"stop to idle ({mode.value}) took {stop_to_idle_ms:.0f} ms"
+    part_files = [name for name in os.listdir(tmp_path) if name.endswith(".part")]
+    if mode == CancelMode.KEEP:
+        assert part_files, "partial file should be kept for resume"
+    else:
+        assert not part_files, "partial file should be deleted"
@@ -0,0 +1,31 @@
+import json
+import tracemalloc
+
+from core.queue import QueueManager
+from core.types import QueueItem
+
+ITEMS = 50_000
+# Measured ~590 bytes per item; before slots and URL compaction it was ~800
+MAX_BYTES_PER_ITEM = 650
+
+
+def test_queue_bytes_per_item():
+    """Memory retained per item after loading a channel-mirror shaped saved queue"""
+    manager = QueueManager()
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        # Round-trip through JSON so every string is a fresh object, as on load
+        records = json.loads(json.dumps([
+            {"url": f"https://www.youtube.com/watch?v={n:011d}", "download_type": "video", "group": "Channel"}
+            for n in range(ITEMS)
+        ]))
+        for record in records:
+            manager.append(QueueItem.from_url(record["url"], record["url"],
+                                              download_type=record["download_type"], group=record["group"]))
+        del records
+        bytes_per_item = (tracemalloc.get_traced_memory()[0] - before) / ITEMS
+    finally:
+        tracemalloc.stop()
+
+    assert bytes_per_item < MAX_BYTES_PER_ITEM, f"{bytes_per_item:.0f} bytes per queued item"